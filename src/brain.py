@@ -1,9 +1,21 @@
-import google.generativeai as genai
+import asyncio
 import logging
 import json
 import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, TimeoutError as FutureTimeout
 from dotenv import load_dotenv
-from src.utils.config_loader import load_config
+from src.utils.config_loader import CONFIG, load_config
+from src.utils.intent_matcher import IntentMatcher
+from src.utils.intent_cache import IntentCache
+from src.utils.llm_backends import create_backend
+from src.utils.intents import IntentError, IntentValidator, to_json
+from src.utils.profile_registry import DEFAULT_AIRCRAFT, PROFILES
+from src.utils.startup import STARTUP
+from src.utils.text_normalizer import normalize_utterance
+from src.utils.tracing import TRACER
 
 # Load environment variables
 load_dotenv()
@@ -39,8 +51,11 @@ JSON SCHEMA:
 
 STRICT OUTPUT RULES:
 1. Output ONLY valid JSON.
-2. Output a SINGLE JSON Object.
-3. If multiple parameters are given (heading + alt), include all in "parameters".
+2. Output a SINGLE JSON Object per action.
+3. If multiple parameters are given (heading + alt), include all in "parameters" of ONE object.
+4. If the pilot gives several different actions in one phrase, output a JSON list of objects in the order spoken.
+5. Multi-step sequences have their own actions (no parameters): "weapons_setup" (laser, Hellfires, master arm),
+   "takeoff_config" (master arm safe, takeoff, 500 ft at 60 knots) and "cancel_procedure" to stop a running one.
 
 EXAMPLES:
 Input: "Master arm on"
@@ -48,56 +63,326 @@ Output: {"aircraft": "OH-58D", "action": "set_master_arm", "parameters": {"state
 
 Input: "Take us up to angels 1.5 and head West at 60 knots"
 Output: {"aircraft": "OH-58D", "action": "set_flight_parameters", "parameters": {"altitude": 1500, "heading": 270, "speed": 60}}
+
+Input: "Master arm on, rockets"
+Output: [{"aircraft": "OH-58D", "action": "set_master_arm", "parameters": {"state": 1}}, {"aircraft": "OH-58D", "action": "weapon_rockets", "parameters": {}}]
+
+Input: "Cancel that sequence"
+Output: {"aircraft": "OH-58D", "action": "cancel_procedure", "parameters": {}}
 """
 
 class Brain:
+    """
+    Turns transcripts into intents: local fast path, then the intent cache,
+    then the LLM.
+
+    LLM calls go to the configured backend (brain.backend: Gemini over a
+    warm pooled connection, or a local llama.cpp model that needs no
+    network) and run on a private asyncio loop. Each
+    request has a deadline; when it is slower than the recent `hedge`
+    percentile a duplicate is fired and the first answer wins. A prefetch
+    for a partial transcript that a newer partial superseded is cancelled,
+    and a request that misses its deadline degrades to a lenient local
+    match or a stale cache entry.
+    """
     def __init__(self):
         self.config = load_config()
-        
+        b_config = self.config.get('brain', {})
+        # Local grammar for trivial commands; only misses go to Gemini
+        self.matcher = IntentMatcher()
+        # Looser grammar only used when the LLM misses its deadline
+        self.degraded_matcher = IntentMatcher(max_leftover=3)
+        # Every answer, whatever its source, is validated once here
+        self.validator = IntentValidator(PROFILES)
+
+        # Cache of previous LLM answers keyed on normalized transcript
+        c_config = b_config.get('cache', {})
+        cache_path = c_config.get('path')
+        if cache_path and not os.path.isabs(cache_path):
+            cache_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), cache_path)
+        self.cache = IntentCache(
+            max_size=c_config.get('max_size', 256),
+            ttl=c_config.get('ttl'),
+            path=cache_path
+        )
+
+        # Deadline and hedging
+        self.latencies = deque(maxlen=b_config['hedge']['window'])
+        self._configure(b_config)
+        CONFIG.subscribe(self._on_config, 'brain')
+
+        # Requests in flight per normalized utterance, for cancel()
+        self.inflight_lock = threading.Lock()
+        self.inflight = {}  # key -> concurrent Future
+        # LLM call started early from a stable partial transcript
+        self.prefetched = None  # (normalized text, Future)
+        self.prefetch_hits = 0
+        self.counters = {"requests": 0, "hedges": 0, "hedge_wins": 0, "deadline_misses": 0,
+                         "degraded": 0, "cancelled": 0, "errors": 0}
+
         # API Key Logic: Check Env Var first, then Config
-        self.api_key = os.getenv("GEMINI_API_KEY") or self.config['brain'].get('api_key')
-        
-        if not self.api_key or "YOUR_API_KEY" in self.api_key:
-            logging.error("No valid Gemini API Key found in env GEMINI_API_KEY or config.json")
-            # We don't raise immediately to allow the app to start so user can see the error
+        self.api_key = os.getenv("GEMINI_API_KEY") or b_config.get('api_key')
+
+        self.loop = asyncio.new_event_loop()
+        self.loop_thread = threading.Thread(target=self.loop.run_forever, name="brain-loop", daemon=True)
+        self.loop_thread.start()
+
+        # None when unusable (e.g. no API key); we don't raise so the app
+        # still starts and the user can see the error
+        self.backend = create_backend(b_config, SYSTEM_PROMPT, PROFILES[DEFAULT_AIRCRAFT], api_key=self.api_key)
+        if self.backend:
+            if self.backend.name == 'llama_cpp':
+                self.model_name = os.path.basename(self.backend.model_path)
+            else:
+                self.model_name = b_config.get('model', 'gemini-2.0-flash-exp')
+            logging.info(f"Brain initialized with {self.backend.name} model: {self.model_name}")
+            # Open the connection / load the model now so the first command is fast
+            asyncio.run_coroutine_threadsafe(self._warm(), self.loop)
         else:
-            genai.configure(api_key=self.api_key)
-            self.model_name = self.config['brain'].get('model', 'gemini-2.0-flash-exp')
-            logging.info(f"Brain initialized with model: {self.model_name}")
-            
-            # Initialize the model
-            self.model = genai.GenerativeModel(
-                model_name=self.model_name,
-                system_instruction=SYSTEM_PROMPT,
-                generation_config={"response_mime_type": "application/json"}
-            )
+            self.model_name = None
+
+    def _configure(self, b_config):
+        h_config = b_config['hedge']
+        self.deadline = b_config['deadline']
+        self.hedge_enabled = h_config['enabled']
+        self.hedge_percentile = h_config['percentile']
+        self.hedge_min_delay = h_config['min_delay']
+        self.hedge_initial_delay = h_config['initial_delay']
+
+    def _on_config(self, b_config, old):
+        self._configure(b_config)
+        if any(b_config[k] != old[k] for k in ('backend', 'model', 'endpoint', 'llama_cpp')):
+            logging.warning("brain backend/model changes take effect after a restart.")
+        logging.info(f"Brain deadline {self.deadline}s, hedging {'on' if self.hedge_enabled else 'off'}.")
 
     def think(self, text):
         """
-        Sends text to Gemini and returns a JSON object (dict).
+        Resolves text to a tuple of validated Intents (several for compound
+        commands), or None.
+        Phrases the local fast-path matcher understands never leave the machine.
         """
-        if not self.api_key or "YOUR_API_KEY" in self.api_key:
-            logging.error("Cannot think: Missing API Key.")
+        with TRACER.span("fast_path"):
+            intents = self._validate(self.matcher.match(text), "fast path")
+        if intents:
+            logging.info(f"Fast path: {json.dumps(to_json(intents))}")
+            return intents
+
+        intents = self._validate(self.cache.get(text), "cache")
+        if intents:
+            logging.info(f"Cache hit: {json.dumps(to_json(intents))}")
+            return intents
+
+        if not self.online():
+            logging.error("Cannot think: no LLM backend (missing API key or local model).")
             return None
 
+        key = normalize_utterance(text)
+
+        # Reuse a prefetch started from a partial transcript that turned out
+        # final. Any other prefetch is left alone: it may already belong to
+        # the next utterance, and the next prefetch supersedes it anyway.
+        future = None
+        with self.inflight_lock:
+            if self.prefetched and self.prefetched[0] == key and not self.prefetched[1].cancelled():
+                future = self.prefetched[1]
+                self.prefetched = None
+        if future is not None:
+            self.prefetch_hits += 1
+            logging.info("Using prefetched LLM result.")
+        else:
+            future = self._submit(key, text)
+        return self._wait(future)
+
+    def prefetch(self, partial_text):
+        """
+        Starts the LLM call for a stable partial transcript in the background.
+        If the final transcript normalizes to the same text, think() uses the
+        result instead of calling the model again. Phrases the fast path or
+        cache can answer are not prefetched. A newer partial supersedes
+        (cancels) the previous prefetch; requests think() is waiting on are
+        never cancelled here, so an earlier command still completes while
+        the pilot speaks the next one.
+        """
+        if not self.online() or not partial_text:
+            return
+        key = normalize_utterance(partial_text)
+        with self.inflight_lock:
+            if self.prefetched and self.prefetched[0] == key:
+                return
+        # Peeks, so partials don't count as fast-path or cache lookups
+        if self.matcher.peek(partial_text) or self.cache.peek(partial_text):
+            return
+        future = self._submit(key, partial_text)
+        with self.inflight_lock:
+            previous = self.prefetched
+            self.prefetched = (key, future)
+        if previous and previous[0] != key:
+            self._cancel([previous[1]], "a superseded partial transcript")
+
+    def cancel(self):
+        """Cancels every LLM request in flight (e.g. the pilot said "belay that")."""
+        with self.inflight_lock:
+            futures = list(self.inflight.values())
+            self.prefetched = None
+        self._cancel(futures, "a cancelled utterance")
+
+    def online(self):
+        return self.backend is not None
+
+    def _submit(self, key, text):
+        future = asyncio.run_coroutine_threadsafe(self._ask_model(text), self.loop)
+        with self.inflight_lock:
+            self.inflight[key] = future
+        future.add_done_callback(lambda f, k=key: self._done(k, f))
+        return future
+
+    def _done(self, key, future):
+        with self.inflight_lock:
+            if self.inflight.get(key) is future:
+                del self.inflight[key]
+
+    def _cancel(self, futures, reason):
+        for future in futures:
+            if future.cancel():
+                self.counters["cancelled"] += 1
+                logging.info(f"Cancelled LLM request for {reason}.")
+
+    def _wait(self, future):
         try:
-            logging.info(f"Thinking about: '{text}'")
-            # Generate content
-            response = self.model.generate_content(text)
-            
-            # Parse JSON
-            # Gemini 2.0 Flash is good at JSON mode, usually returns pure JSON.
-            # We strip markdown code blocks just in case.
-            clean_text = response.text.strip()
-            if clean_text.startswith("```json"):
-                clean_text = clean_text[7:-3]
-            elif clean_text.startswith("```"):
-                clean_text = clean_text[3:-3]
-            
-            intent = json.loads(clean_text)
-            logging.info(f"Thought: {json.dumps(intent)}")
-            return intent
+            # The coroutine enforces the deadline; this is only a backstop
+            return future.result(timeout=self.deadline + 1.0)
+        except CancelledError:
+            return None
+        except FutureTimeout:
+            future.cancel()
+            return None
 
+    async def _warm(self):
+        try:
+            with STARTUP.phase(f"{self.backend.name} warmup"):
+                await self.backend.warm()
         except Exception as e:
-            logging.error(f"Brain freeze (Error): {e}")
+            logging.warning(f"Could not warm up the LLM backend: {e}")
+
+    async def _close_backend(self):
+        # Gemini closes its connection pool asynchronously, llama.cpp synchronously
+        closing = self.backend.close()
+        if asyncio.iscoroutine(closing):
+            await closing
+
+    def _hedge_delay(self):
+        """Delay before firing a duplicate request: recent latency percentile, floored."""
+        if len(self.latencies) < 10:
+            return self.hedge_initial_delay
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile / 100))
+        return max(self.hedge_min_delay, ordered[index])
+
+    async def _ask_model(self, text):
+        logging.info(f"Thinking about: '{text}'")
+        self.counters["requests"] += 1
+        start = time.perf_counter()
+        deadline = start + self.deadline
+        tasks = [asyncio.ensure_future(self.backend.generate(text))]
+        try:
+            with TRACER.span("llm"):
+                answer = await self._first_answer(text, tasks, deadline)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        latency = time.perf_counter() - start
+        if answer is None:
+            return self._degrade(text)
+
+        self.latencies.append(latency)
+        try:
+            intents = self.validator.parse(answer)
+        except IntentError as e:
+            logging.error(f"Rejected model answer {answer!r}: {e}")
+            return self._degrade(text)
+        logging.info(f"Thought: {json.dumps(to_json(intents))} ({latency:.2f}s)")
+        self.cache.put(text, to_json(intents), latency)
+        return intents
+
+    async def _first_answer(self, text, tasks, deadline):
+        """
+        Waits for the first successful answer before `deadline`, firing one
+        hedged duplicate when the first request is slower than usual.
+        Returns None on deadline or when every attempt failed.
+        """
+        hedge_at = time.perf_counter() + self._hedge_delay()
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                self.counters["deadline_misses"] += 1
+                logging.warning(f"LLM missed its {self.deadline:.1f}s deadline.")
+                return None
+            pending = [t for t in tasks if not t.done()]
+            can_hedge = self.hedge_enabled and self.backend.hedgeable and len(tasks) == 1
+            if not pending and not can_hedge:
+                return None
+            wake = min(deadline, hedge_at) if can_hedge else deadline
+            if pending:
+                done, _ = await asyncio.wait(pending, timeout=max(0.0, wake - now),
+                                             return_when=asyncio.FIRST_COMPLETED)
+            else:
+                done = set()
+            for task in done:
+                if task.exception() is None:
+                    if task is not tasks[0]:
+                        self.counters["hedge_wins"] += 1
+                    return task.result()
+                self.counters["errors"] += 1
+                logging.error(f"Brain freeze (Error): {task.exception()}")
+
+            if can_hedge and (time.perf_counter() >= hedge_at or not any(not t.done() for t in tasks)):
+                # Slow or failed first attempt: race a duplicate against it
+                self.counters["hedges"] += 1
+                logging.info("LLM request is slow; sending a hedged duplicate.")
+                tasks.append(asyncio.ensure_future(self.backend.generate(text)))
+
+    def _degrade(self, text):
+        """Best local answer when the LLM could not answer in time."""
+        intents = (self._validate(self.degraded_matcher.match(text), "lenient match")
+                   or self._validate(self.cache.get(text, allow_stale=True), "stale cache"))
+        if intents:
+            self.counters["degraded"] += 1
+            logging.warning(f"Degraded answer: {json.dumps(to_json(intents))}")
+        return intents
+
+    def _validate(self, intent, source):
+        """Validated Intents for a matcher/cache dict (or list), None if empty or invalid."""
+        if not intent:
             return None
+        try:
+            return self.validator.parse(intent)
+        except IntentError as e:
+            logging.error(f"Rejected {source} intent {intent!r}: {e}")
+            return None
+
+    def stats(self):
+        s = dict(self.counters, prefetch_hits=self.prefetch_hits)
+        s["hedge_delay_s"] = self._hedge_delay()
+        return s
+
+    def close(self):
+        CONFIG.unsubscribe(self._on_config)
+        self.cancel()
+        if self.backend:
+            try:
+                asyncio.run_coroutine_threadsafe(self._close_backend(), self.loop).result(timeout=2)
+            except Exception as e:
+                logging.warning(f"Could not close the LLM backend cleanly: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.loop_thread.join(timeout=2)
+        s = self.stats()
+        if s["requests"]:
+            logging.info(
+                f"LLM: {s['requests']} request(s), {s['hedges']} hedged ({s['hedge_wins']} won), "
+                f"{s['deadline_misses']} missed the deadline, {s['degraded']} degraded, "
+                f"{s['cancelled']} cancelled, {s['prefetch_hits']} prefetch hit(s)"
+            )
+        self.matcher.log_stats()
+        self.cache.log_stats()
+        self.cache.save()
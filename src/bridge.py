@@ -1,87 +1,280 @@
 import logging
-import json
+import time
 from src.utils.dcs_bios import DcsBiosSender
 from src.utils.input_emitter import InputEmitter
-from src.profiles import oh58d
+from src.utils.config_loader import load_config
+from src.utils.dcs_bios_export import CockpitState, ExportListener, load_control_definitions
+from src.utils.intent_grammar import CANCEL_ACTION
+from src.utils.intents import IntentError, IntentValidator
+from src.utils.procedures import ProcedureRunner
+from src.utils.profile_registry import PROFILES
+from src.utils.tracing import TRACER
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 class Bridge:
     def __init__(self):
-        self.sender = DcsBiosSender()
+        config = load_config()
+
+        # Optional live cockpit state from the DCS-BIOS export stream
+        self.cockpit = None
+        self.export_listener = None
+        e_config = config['dcs_bios'].get('export', {})
+        if e_config.get('enabled'):
+            try:
+                controls = load_control_definitions(e_config['controls']) if e_config.get('controls') else {}
+                self.cockpit = CockpitState(controls)
+                self.export_listener = ExportListener(self.cockpit, e_config.get('group'), e_config.get('port', 5010))
+                self.export_listener.start()
+            except Exception as e:
+                logging.error(f"Could not start DCS-BIOS export listener: {e}")
+                self.cockpit = None
+
+        # Confirm BIOS commands through the export stream and retry lost ones
+        self.ack_enabled = bool(self.cockpit) and config['dcs_bios'].get('ack', {}).get('enabled', False)
+
+        self.sender = DcsBiosSender(cockpit=self.cockpit)
         self.keyboard = InputEmitter()
-        self.profiles = {
-            "OH-58D": oh58d
-            # Add AH-64D later
-        }
+        # Aircraft from src/profiles/ and keybinds.json, each loaded on first use
+        self.profiles = PROFILES
+        self.validator = IntentValidator(self.profiles)
+        # Profile PROCEDURES run here in the background; looked up per call
+        # so a replaced sender or keyboard is picked up
+        self.procedures = ProcedureRunner(self._send_procedure_bios,
+                                          lambda keys: self.keyboard.press_combo(keys),
+                                          self.cockpit)
+        self.last_report = None
 
     def process_intent(self, intent_json):
         """
-        Parses the intent JSON and executes the command.
-        
-        Expected JSON structure:
+        Validates the intent(s) and executes the command.
+
+        Accepts Intents already validated by the Brain (used as is), or the
+        JSON structure (as a string or dict):
         {
           "aircraft": "OH-58D",
           "action": "search_sector",
           "parameters": { ... }
         }
+
+        A list of intents is executed in order as one batch. An invalid
+        intent rejects the whole batch before anything is dispatched; a
+        valid one cancels any procedure still running.
+        Returns True if every step succeeded; the per-step report is kept
+        in self.last_report.
         """
         try:
-            # If input is a string, parse it. If dict, use as is.
-            # If input is a string, parse it. If dict/list, use as is.
-            if isinstance(intent_json, str):
-                data = json.loads(intent_json)
-            else:
-                data = intent_json
+            try:
+                intents = self.validator.parse(intent_json)
+            except IntentError as e:
+                logging.error(f"Rejected intent: {e}")
+                self.last_report = {"ok": False, "steps": [], "datagrams": 0, "elapsed_ms": 0.0,
+                                    "pending": [], "error": str(e)}
+                return False
 
-            # Handle List output (rare LLM flake) - take the first item
-            if isinstance(data, list):
-                if len(data) > 0:
-                    logging.warning("Received a list of intents. Using the first one.")
-                    data = data[0]
-                else:
-                    logging.error("Received empty list of intents.")
-                    return False
+            # A new command supersedes a running procedure
+            self.procedures.cancel_all()
+            with TRACER.span("resolve"):
+                plan = self.build_plan(intents)
+            report = self.execute_plan(plan)
+            self.last_report = report
+            return report["ok"]
 
-            if not isinstance(data, dict):
-                logging.error(f"Invalid intent format. Expected dict, got {type(data)}")
-                return False
+        except Exception as e:
+            logging.error(f"Error processing intent: {e}")
+            return False
 
-            aircraft = data.get("aircraft")
-            action = data.get("action")
-            parameters = data.get("parameters", {})
+    def build_plan(self, intents):
+        """
+        Expands validated Intents into an ordered list of steps.
+        Each step is a dict with aircraft, action, type ("bios", "keyboard",
+        "procedure", "cancel", "skip" or "error") and the command payload
+        (or error message). BIOS commands the live cockpit state shows as
+        already applied are marked "skip".
+        """
+        plan = []
+        for aircraft, action, parameters in intents:
+            profile = self.profiles[aircraft]
 
-            if not aircraft or not action:
-                logging.error("Invalid intent: missing aircraft or action")
-                return False
+            if action == CANCEL_ACTION:
+                plan.append({"aircraft": aircraft, "action": action, "type": "cancel", "payload": None})
+                continue
+            if action in getattr(profile, "procedures", {}):
+                plan.append({"aircraft": aircraft, "action": action, "type": "procedure", "payload": action})
+                continue
 
-            profile = self.profiles.get(aircraft)
-            if not profile:
-                logging.error(f"Profile not found for aircraft: {aircraft}")
-                return False
+            if hasattr(profile, "get_commands"):
+                commands = profile.get_commands(action, parameters)
+            else:
+                command = profile.get_command(action, parameters)
+                commands = [command] if command else []
+
+            if not commands:
+                logging.warning(f"No command mapping found for action: {action}")
+                plan.append(_error_step(aircraft, action, "no command mapping"))
+                continue
 
-            command = profile.get_command(action, parameters)
-            if command:
+            for command in commands:
                 # Check if it's a specialized command dict or a simple string
                 if isinstance(command, dict) and command.get("type") == "keyboard":
-                    keys = command.get("keys")
-                    logging.info(f"Executing Keyboard Combo: {keys} for {aircraft}")
-                    self.keyboard.press_combo(keys)
+                    if command.get("keys"):
+                        plan.append({"aircraft": aircraft, "action": action, "type": "keyboard", "payload": command["keys"]})
+                    else:
+                        plan.append(_error_step(aircraft, action, command.get("log", "empty key combo")))
                 elif isinstance(command, str):
-                    logging.info(f"Executing BIOS: {command} for {aircraft}")
-                    self.sender.send_command(command)
-                return True
-            else:
-                logging.warning(f"No command mapping found for action: {action}")
-                return False
+                    step_type = "skip" if self._already_set(command) else "bios"
+                    plan.append({"aircraft": aircraft, "action": action, "type": step_type, "payload": command})
+                else:
+                    plan.append(_error_step(aircraft, action, f"unsupported command {command!r}"))
+        return plan
+
+    def execute_plan(self, plan):
+        """
+        Runs a plan in order. Consecutive BIOS commands are coalesced into a
+        single datagram; key combos are queued on the InputEmitter scheduler,
+        which sequences them without blocking this thread, and procedures
+        are started on the ProcedureRunner.
+        Returns a report dict: ok, steps (with per-step ok/error), datagrams,
+        elapsed_ms and the completion futures of queued key combos, of
+        acknowledged BIOS sends and of started procedures (which resolve to
+        the procedure's report).
+        """
+        start = time.perf_counter()
+        results = []
+        pending_bios = []
+        datagrams = 0
+        pending = []
+
+        def flush_bios():
+            nonlocal datagrams
+            if not pending_bios:
+                return
+            commands = [step["payload"] for step in pending_bios]
+            logging.info(f"Executing BIOS batch: {commands}")
+            try:
+                sent, futures = self._dispatch_bios(commands)
+                datagrams += sent
+                pending.extend(futures)
+                ok, error = True, None
+            except Exception as e:
+                ok, error = False, str(e)
+            for step in pending_bios:
+                results.append(_result(step, ok, error))
+            pending_bios.clear()
+
+        for step in plan:
+            if step["type"] == "bios":
+                pending_bios.append(step)
+                continue
+
+            flush_bios()
+            if step["type"] == "skip":
+                logging.info(f"Skipping BIOS: {step['payload']} (cockpit already in that state)")
+                results.append(_result(step, True))
+                continue
+            if step["type"] == "error":
+                results.append(_result(step, False, step["payload"]))
+                continue
+            if step["type"] == "cancel":
+                # Usually already done by process_intent; plans run directly still need it
+                self.procedures.cancel_all()
+                results.append(_result(step, True))
+                continue
+            if step["type"] == "procedure":
+                try:
+                    steps = self.profiles[step["aircraft"]].procedures[step["payload"]]
+                    pending.append(self.procedures.start(step["payload"], step["aircraft"], steps).future)
+                    results.append(_result(step, True))
+                except Exception as e:
+                    results.append(_result(step, False, str(e)))
+                continue
+
+            logging.info(f"Executing Keyboard Combo: {step['payload']} for {step['aircraft']}")
+            try:
+                future = self.keyboard.press_combo(step["payload"])
+                if TRACER.enabled:
+                    # Injection finishes on the scheduler thread; time it from submission
+                    trace_id, submitted = TRACER.current(), time.perf_counter()
+                    future.add_done_callback(
+                        lambda f, t=trace_id, s=submitted: TRACER.record("key_inject", time.perf_counter() - s, t)
+                    )
+                pending.append(future)
+                results.append(_result(step, True))
+            except Exception as e:
+                results.append(_result(step, False, str(e)))
+        flush_bios()
+
+        report = {
+            "ok": bool(results) and all(r["ok"] for r in results),
+            "steps": results,
+            "datagrams": datagrams,
+            "elapsed_ms": (time.perf_counter() - start) * 1000,
+            "pending": pending,
+        }
+        failed = [r for r in results if not r["ok"]]
+        if len(results) > 1 or failed:
+            logging.info(
+                f"Plan executed: {len(results) - len(failed)}/{len(results)} steps ok, "
+                f"{datagrams} datagram(s), {report['elapsed_ms']:.1f}ms"
+            )
+        return report
 
-        except json.JSONDecodeError:
-            logging.error("Failed to decode JSON intent")
+    def _dispatch_bios(self, commands):
+        """
+        Sends one batch in plan order, confirming the controls the export
+        stream carries. Returns (datagrams, ack futures).
+        """
+        confirmable = [c for c in commands if self._confirmable(c)]
+        if not confirmable:
+            with TRACER.span("udp_send"):
+                return self.sender.send_commands(commands), []
+        # Still one ordered datagram; confirmation and retries of the
+        # confirmable commands happen in the background
+        futures = self.sender.send_commands_acknowledged(commands, confirm=confirmable)
+        return 1, futures
+
+    def _send_procedure_bios(self, commands):
+        """BIOS step of a procedure: the ack futures to wait for before the next step."""
+        commands = [c for c in commands if not self._already_set(c)]
+        if not commands:
+            return []
+        return self._dispatch_bios(commands)[1]
+
+    def _confirmable(self, command):
+        """True if acknowledged sends are on and the export stream carries this control."""
+        if not self.ack_enabled:
             return False
-        except Exception as e:
-            logging.error(f"Error processing intent: {e}")
+        parts = command.split()
+        return len(parts) == 2 and parts[1].isdigit() and parts[0] in self.cockpit.controls
+
+    def _already_set(self, command):
+        """True if the export stream shows the control already at the commanded value."""
+        if not self.cockpit:
+            return False
+        parts = command.split()
+        if len(parts) != 2 or not parts[1].isdigit():
             return False
+        current = self.cockpit.get(parts[0])
+        return current is not None and current == int(parts[1])
 
     def close(self):
+        if self.export_listener:
+            self.export_listener.close()
+        self.procedures.close()
+        self.keyboard.close()
         self.sender.close()
+
+def _error_step(aircraft, action, message):
+    return {"aircraft": aircraft, "action": action, "type": "error", "payload": message}
+
+def _result(step, ok, error=None):
+    return {
+        "aircraft": step["aircraft"],
+        "action": step["action"],
+        "type": step["type"],
+        "command": step["payload"] if step["type"] != "error" else None,
+        "ok": ok,
+        "skipped": step["type"] == "skip",
+        "error": error,
+    }
@@ -1,7 +1,12 @@
 import speech_recognition as sr
 import logging
+import os
 import numpy as np
-from src.utils.config_loader import load_config
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.buffer_pool import AudioBuffer, AudioBufferPool
+from src.utils.config_loader import CONFIG, load_config
+from src.utils.startup import STARTUP
+from src.utils.tracing import TRACER
 
 class Ears:
     def __init__(self):
@@ -11,68 +16,203 @@ class Ears:
         
         logging.info(f"Initializing Ears with backend: {self.backend.upper()}")
 
+        # The model load/warmup and the microphone setup/calibration are
+        # independent and each take seconds; run them side by side
+        loader = None
         if self.backend == 'whisper':
+            loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper-load")
+            whisper_ready = loader.submit(self._load_whisper)
+
+        try:
+            self._open_microphone()
+        finally:
+            if loader:
+                loader.shutdown(wait=True)
+        if loader:
+            # Re-raises a load failure here, after the mic thread is done
+            whisper_ready.result()
+
+        # Decode profiles and endpointing can be retuned mid-session
+        CONFIG.subscribe(self._on_config, 'ears')
+
+    def _load_whisper(self):
+        try:
+            with STARTUP.phase("whisper load+warmup"):
+                from src.utils.whisper_models import WhisperModelManager
+                # Primary and fallback models are loaded and warmed up front,
+                # so a CUDA failure switches models instead of reloading one
+                self.whisper_model = WhisperModelManager.from_config(self.config['ears']['whisper'])
+                self.whisper_model.start()
+
+            # Bias decoding towards the commands the aircraft profile understands
+            from src.utils.command_vocabulary import CommandVocabulary
+            from src.utils.profile_registry import DEFAULT_AIRCRAFT, PROFILES
+            self.whisper_model.vocabulary = CommandVocabulary(PROFILES[DEFAULT_AIRCRAFT])
+            logging.info("Model loaded successfully.")
+        except ImportError:
+            logging.error("faster-whisper not installed. Please pip install faster-whisper.")
+            raise
+        except Exception as e:
+            logging.error(f"Failed to load Faster-Whisper: {e}")
+            raise e
+
+    def _open_microphone(self):
+        self.recognizer = sr.Recognizer()
+        self.stream = None
+        self.trigger = None
+        self.capture_mode = self.config['ears'].get('capture', 'recognizer')
+
+        if self.capture_mode == 'vad':
+            # Always-open stream with frame-level endpointing; the VAD noise
+            # floor adapts continuously, so no one-off calibration is needed.
+            from src.utils.audio_stream import MicrophoneSource, StreamingCapture
+            v_config = self.config['ears'].get('vad', {})
+            frame_ms = v_config.get('frame_ms', 30)
+            source = MicrophoneSource(16000 * frame_ms // 1000)
+            self.stream = StreamingCapture(source, **v_config)
+            logging.info("Streaming VAD capture ready.")
+        elif self.capture_mode == 'ptt':
+            # Same always-open stream, but a button gates the utterance and
+            # its release ends it immediately (no silence timeout)
+            from src.utils.audio_stream import MicrophoneSource, PushToTalkCapture
+            from src.utils.push_to_talk import create_trigger
+            p_config = self.config['ears']['ptt']
+            frame_ms = self.config['ears']['vad']['frame_ms']
+            source = MicrophoneSource(16000 * frame_ms // 1000)
+            self.stream = PushToTalkCapture(source, frame_ms, p_config['preroll_ms'], p_config['max_phrase_s'])
             try:
-                from faster_whisper import WhisperModel
-                w_config = self.config['ears']['whisper']
-                logging.info(f"Loading Faster-Whisper model ('{w_config['model_size']}' on {w_config['device']})...")
-                self.whisper_model = WhisperModel(
-                    w_config['model_size'], 
-                    device=w_config['device'], 
-                    compute_type=w_config['compute_type']
-                )
-                
-                # WARMUP: Force a dummy transcription to trigger any lazy-loading DLL errors immediately
-                logging.info("Warming up model to verify CUDA...")
-                dummy_audio = np.zeros(16000, dtype=np.float32) 
-                self.whisper_model.transcribe(dummy_audio, beam_size=1)
-                
-                logging.info("Model loaded successfully.")
-            except ImportError:
-                logging.error("faster-whisper not installed. Please pip install faster-whisper.")
+                self.trigger = create_trigger(p_config, self.stream)
+            except Exception:
+                self.stream.close()
                 raise
-            except Exception as e:
-                # Catch lazy loading errors here
-                if "cublas" in str(e).lower() or "library" in str(e).lower():
-                    logging.warning(f"CUDA Error detected during warmup: {e}")
-                    logging.warning("Falling back to CPU...")
-                    try:
-                        self.whisper_model = WhisperModel(
-                            w_config['model_size'], 
-                            device="cpu", 
-                            compute_type="int8" # often better for CPU
-                        )
-                        logging.info("Model loaded on CPU successfully.")
-                    except Exception as cpu_e:
-                        logging.error(f"Failed to load on CPU as well: {cpu_e}")
-                        raise cpu_e
-                else:
-                    logging.error(f"Failed to load Faster-Whisper: {e}")
-                    raise e
+            logging.info(f"Push-to-talk capture ready ({self.trigger.describe()}).")
 
-        self.recognizer = sr.Recognizer()
-        self.mic = sr.Microphone(sample_rate=16000) # Whisper likes 16kHz, Google is fine with it
-        
-        logging.info("Calibrating microphone for ambient noise...")
-        with self.mic as source:
-            self.recognizer.adjust_for_ambient_noise(source, duration=1)
-        logging.info("Calibration complete.")
+        # Captured phrases live in reused buffers until transcribed: one being
+        # recorded, one being decoded, and the pipeline's queue in between
+        capacity = self.stream.max_utterance if self.stream else 16000 * 11
+        self.buffers = AudioBufferPool(capacity, max_buffers=6)
+
+        # Partial transcripts while the pilot is still talking (whisper + vad only)
+        s_config = self.config['ears'].get('whisper', {}).get('streaming', {})
+        self.streaming = bool(self.stream) and self.backend == 'whisper' and s_config.get('enabled', False)
+        self.streamer = None
+        if self.streaming:
+            from src.utils.streaming_transcriber import StreamingTranscriber
+            self.streamer = StreamingTranscriber(
+                self._decode,
+                step_ms=s_config.get('step_ms', 500),
+                window_s=s_config.get('window_s', 10),
+                partial_profile=s_config.get('partial_profile', 'fast'),
+                final_profile=None
+            )
+
+        # Always-on listening: cheap keyword/voicing gate before any decode
+        self.spotter = None
+        k_config = self.config['ears']['kws']
+        if k_config['enabled'] and self.capture_mode != 'ptt':
+            from src.utils.keyword_spotter import KeywordSpotter
+            root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            self.spotter = KeywordSpotter.from_config(k_config, root=root)
+
+        if not self.stream:
+            self.mic = sr.Microphone(sample_rate=16000) # Whisper likes 16kHz, Google is fine with it
+            
+            logging.info("Calibrating microphone for ambient noise...")
+            with STARTUP.phase("mic calibration"), self.mic as source:
+                self.recognizer.adjust_for_ambient_noise(source, duration=1)
+            logging.info("Calibration complete.")
+
+    def _on_config(self, e_config, old):
+        """Applies config.json changes that need no model reload or device reopen."""
+        if (e_config['backend'], e_config['capture']) != (old['backend'], old['capture']):
+            logging.warning("ears.backend / ears.capture changes take effect after a restart.")
+        if self.whisper_model:
+            self.whisper_model.reconfigure(e_config['whisper'])
+        if self.spotter:
+            self.spotter.configure(e_config['kws'])
+        if self.streamer:
+            self.streamer.partial_profile = e_config['whisper']['streaming']['partial_profile']
+        if self.capture_mode == 'vad':
+            v_config = e_config['vad']
+            self.stream.retune(
+                start_ms=v_config['start_ms'],
+                end_silence_ms=v_config['end_silence_ms'],
+                margin_db=v_config['margin_db'],
+                floor_alpha=v_config['floor_alpha']
+            )
+        logging.info("Ears settings updated from config.json.")
 
     def listen(self, timeout=None):
         """
         Listens to the microphone and returns the transcribed text.
+        The user asked for this phrase, so the keyword gate is skipped.
         """
+        audio = self.capture(timeout=timeout, gate=False)
+        if audio is None:
+            return None
+        return self.transcribe(audio)
+
+    def capture(self, timeout=None, gate=True):
+        """
+        Records one phrase from the microphone and returns it: a pooled
+        AudioBuffer with stream capture, AudioData with the recognizer.
+        Split from transcription so the voice pipeline can record the next
+        phrase while the previous one is still being decoded; transcribe()
+        hands a buffer back to the pool, and whoever drops a phrase instead
+        calls release_audio(). With the keyword spotter on and `gate`,
+        phrases it rejects return None.
+        """
+        audio = self._capture_stream(timeout) if self.stream else self._capture_recognizer(timeout)
+        if audio is None or not gate or not self.spotter:
+            return audio
+        if not self._spot(self._pcm(audio)):
+            self.release_audio(audio)
+            return None
+        return audio
+
+    @staticmethod
+    def _pcm(audio):
+        """int16 samples of a captured phrase, without copying where possible."""
+        if isinstance(audio, AudioBuffer):
+            return audio.pcm
+        return np.frombuffer(audio.get_raw_data(convert_rate=16000, convert_width=2), np.int16)
+
+    @staticmethod
+    def release_audio(audio):
+        """Returns a captured phrase's buffer to the pool (no-op for AudioData)."""
+        if isinstance(audio, AudioBuffer):
+            audio.release()
+
+    def _spot(self, samples):
+        with TRACER.span("kws"):
+            passed, label = self.spotter.check(samples)
+        last = self.spotter.last
+        if passed:
+            logging.info(f"Keyword gate: passed ({label or 'voiced'}).")
+        else:
+            score = f", score {last['score']:.1f}" if last['score'] is not None else ""
+            logging.info(f"Keyword gate: dropped segment ({last['verdict']}{score}).")
+        return passed
+
+    def enroll(self, label, timeout=5):
+        """Records one phrase as a keyword template for `label`; returns the saved path or None."""
+        audio = self.capture(timeout=timeout, gate=False)
+        if audio is None:
+            return None
+        try:
+            return self.spotter.enroll(self._pcm(audio), label)
+        finally:
+            self.release_audio(audio)
+
+    def _capture_recognizer(self, timeout):
         try:
             with self.mic as source:
                 logging.info("Listening...")
                 # phrase_time_limit ensures we don't get stuck listening forever
-                audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=10)
+                with TRACER.span("capture"):
+                    audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=10)
                 logging.info("Audio captured. Processing...")
-            
-            if self.backend == 'whisper':
-                return self._transcribe_whisper(audio)
-            else:
-                return self._transcribe_google(audio)
+            return audio
 
         except sr.WaitTimeoutError:
             logging.info("Listening timed out.")
@@ -81,51 +221,129 @@ class Ears:
             logging.error(f"Error in Ears: {e}")
             return None
 
-    def _transcribe_whisper(self, audio):
-        # Convert AudioData to numpy array (16kHz, mono, float32)
-        audio_data = np.frombuffer(audio.get_raw_data(), np.int16).flatten().astype(np.float32) / 32768.0
-        
+    def listen_streaming(self, timeout=None, on_partial=None):
+        """
+        Captures one phrase while decoding it incrementally. on_partial(text)
+        receives stable partial hypotheses as soon as they are available;
+        returns the final transcript.
+        """
         try:
-            logging.info("Starting Whisper transcription (GPU)...")
-            segments, _ = self.whisper_model.transcribe(audio_data, beam_size=5)
-            logging.info("Transcription returned generator. Iterating...")
-            text = " ".join([segment.text for segment in segments]).strip()
-            logging.info(f"Heard (Whisper): '{text}'")
+            logging.info("Listening (streaming)...")
+            self.streamer.begin(on_partial)
+            feed = self._gated_feed() if self.spotter else self.streamer.feed
+            with TRACER.span("capture"):
+                buffer = self.stream.capture(timeout=timeout, on_audio=feed, into=self.buffers)
+            if buffer is None:
+                logging.info("Listening timed out.")
+                return None
+            with buffer:
+                if self.spotter:
+                    # Short phrases end before the gate had enough audio to decide
+                    verdict = feed.verdict or ("passed" if self._spot(buffer.pcm) else "rejected")
+                    if verdict == "rejected":
+                        return None
+
+                with TRACER.span("whisper"):
+                    text = self._strip_wake_word(self.streamer.finish(buffer))
+            stats = self.streamer.last_stats
+            if stats['ttft_ms'] is not None:
+                TRACER.record("whisper_ttft", stats['ttft_ms'] / 1000)
+            TRACER.record("whisper_final", stats['final_ms'] / 1000)
+            ttft = f"{stats['ttft_ms']:.0f}ms" if stats['ttft_ms'] is not None else "n/a"
+            logging.info(
+                f"Heard (Whisper-streaming): '{text}' "
+                f"(first partial {ttft}, final {stats['final_ms']:.0f}ms after capture)"
+            )
             return text
         except Exception as e:
-            if "cublas" in str(e).lower() or "library" in str(e).lower():
-                logging.warning(f"CUDA Error during transcription: {e}")
-                logging.warning("Attempting runtime fallback to CPU...")
-                try:
-                    w_config = self.config['ears']['whisper']
-                    self.whisper_model = None # Clear old model
-                    
-                    # Import here just in case, though already imported
-                    from faster_whisper import WhisperModel
-                    logging.info("Initializing Whisper on CPU...")
-                    self.whisper_model = WhisperModel(
-                        w_config['model_size'], 
-                        device="cpu", 
-                        compute_type="int8"
-                    )
-                    logging.info("Model re-loaded on CPU. Retrying transcription...")
-                    
-                    # Retry
-                    segments, _ = self.whisper_model.transcribe(audio_data, beam_size=5)
-                    text = " ".join([segment.text for segment in segments]).strip()
-                    logging.info(f"Heard (Whisper-CPU): '{text}'")
-                    return text
-                    
-                except Exception as cpu_e:
-                    logging.error(f"Runtime CPU fallback failed: {cpu_e}")
-                    return None
-            else:
-                logging.error(f"Whisper Transcription Error: {e}")
+            logging.error(f"Error in Ears: {e}")
+            return None
+
+    def _gated_feed(self):
+        """
+        streamer.feed that holds partial decoding until the head of the
+        utterance passed the keyword gate; rejected utterances are never
+        decoded at all.
+        """
+        head = int((self.spotter.search_s + 1.0) * 16000)
+
+        def feed(ring, start, end):
+            if feed.verdict is None and end - start >= head:
+                feed.verdict = "passed" if self._spot(ring.extract(start, end)) else "rejected"
+            if feed.verdict == "passed":
+                self.streamer.feed(ring, start, end)
+        feed.verdict = None
+        return feed
+
+    def _strip_wake_word(self, text):
+        return self.spotter.strip_wake_word(text) if self.spotter else text
+
+    def _decode(self, audio_data, profile=None):
+        """Runs Whisper on float32 16kHz audio with a named decode profile and returns the text."""
+        return self.whisper_model.transcribe(audio_data, profile)
+
+    def _capture_stream(self, timeout):
+        try:
+            logging.info("Listening (VAD)...")
+            with TRACER.span("capture"):
+                buffer = self.stream.capture(timeout=timeout, into=self.buffers)
+            if buffer is None:
+                logging.info("Listening timed out.")
                 return None
+            stats = self.stream.last_stats
+            logging.info(
+                f"Audio captured ({stats['duration_ms']:.0f}ms, cut {stats['endpoint_delay_ms']:.0f}ms "
+                f"after speech). Processing..."
+            )
+            return buffer
+        except Exception as e:
+            logging.error(f"Error in Ears: {e}")
+            return None
+
+    def transcribe(self, audio):
+        """
+        Transcribes a captured phrase (AudioBuffer or AudioData) with the
+        configured backend and returns its buffer to the pool.
+        """
+        buffer = audio if isinstance(audio, AudioBuffer) else None
+        try:
+            if self.backend == 'whisper':
+                if buffer is None:
+                    # Recognizer capture: one copy of its bytes into the pool
+                    samples = self._pcm(audio)
+                    buffer = self.buffers.acquire(len(samples)).load(samples)
+                text = self._transcribe_whisper(buffer)
+            else:
+                if buffer is not None:
+                    audio = sr.AudioData(buffer.pcm.tobytes(), 16000, 2)
+                text = self._transcribe_google(audio)
+            return self._strip_wake_word(text)
+        except Exception as e:
+            logging.error(f"Error in Ears: {e}")
+            return None
+        finally:
+            if buffer is not None:
+                buffer.release()
+
+    def _transcribe_whisper(self, buffer):
+        # float32 16kHz mono, converted in one pass into the buffer's pooled
+        # output; a CUDA->CPU retry in the model manager decodes the same array
+        audio_data = buffer.to_float()
+
+        try:
+            logging.info("Starting Whisper transcription...")
+            with TRACER.span("whisper"):
+                text = self._decode(audio_data)
+            logging.info(f"Heard (Whisper-{self.whisper_model.active.name}): '{text}'")
+            return text
+        except Exception as e:
+            logging.error(f"Whisper Transcription Error: {e}")
+            return None
 
     def _transcribe_google(self, audio):
         try:
-            text = self.recognizer.recognize_google(audio)
+            with TRACER.span("google_stt"):
+                text = self.recognizer.recognize_google(audio)
             logging.info(f"Heard (Google): '{text}'")
             return text
         except sr.UnknownValueError:
@@ -134,3 +352,13 @@ class Ears:
         except sr.RequestError as e:
             logging.error(f"Could not request results from Google Speech Recognition service; {e}")
             return None
+
+    def close(self):
+        CONFIG.unsubscribe(self._on_config)
+        if self.spotter:
+            self.spotter.log_stats()
+        self.buffers.log_stats()
+        if self.trigger:
+            self.trigger.close()
+        if self.stream:
+            self.stream.close()
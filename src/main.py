@@ -2,40 +2,73 @@ import sys
 import os
 import json
 import logging
+import time
 
 # Add the project root to the python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.bridge import Bridge
-from src.ears import Ears
-from src.brain import Brain
+# First, so the startup timeline begins as early as possible
+from src.utils.startup import STARTUP, BackgroundServices
+with STARTUP.phase("import core"):
+    from src.bridge import Bridge
+    from src.utils.intent_matcher import IntentMatcher
+    from src.utils.config_loader import CONFIG, load_config
+    from src.utils.intents import to_json
+    from src.utils.tracing import TRACER
+# Ears (speech_recognition, numpy, faster-whisper) and Brain (asyncio, LLM
+# backends) are imported on the startup threads that build them
+
+# Used when Brain failed to initialize at all
+FALLBACK_MATCHER = IntentMatcher()
+
+def _create_ears():
+    with STARTUP.phase("import ears"):
+        from src.ears import Ears
+    return Ears()
+
+def _create_brain():
+    with STARTUP.phase("import brain"):
+        from src.brain import Brain
+    return Brain()
+
+def _ears_ready(ears, at):
+    print(f"\nEars initialized (Backend: {ears.backend.upper()}) after {at:.0f}ms.")
+
+def _brain_ready(brain, at):
+    if brain.online():
+        print(f"\nBrain initialized (Model: {brain.model_name}) after {at:.0f}ms.")
+    else:
+        print("\nBrain initialized but API Key is missing/default. Config required.")
 
 def main():
     print("Initializing DCS-Handler...")
-    bridge = Bridge()
-    
-    ears = None
-    try:
-        ears = Ears()
-        print(f"Ears initialized (Backend: {ears.backend.upper()}).")
-    except Exception as e:
-        print(f"Could not initialize Ears: {e}")
+    config = load_config()
+    t_config = config['tracing']
+    TRACER.enabled = t_config['enabled']
+    CONFIG.subscribe(_on_tracing_config, 'tracing')
+    if config['hot_reload']['enabled']:
+        # config.json edits (DCS-BIOS target, decode profile, deadlines...) apply live
+        CONFIG.start_watching(config['hot_reload']['interval'])
 
-    brain = None
-    try:
-        brain = Brain()
-        if brain.api_key and "YOUR_API_KEY" not in brain.api_key:
-            print(f"Brain initialized (Model: {brain.model_name}).")
-        else:
-            print("Brain initialized but API Key is missing/default. Config required.")
-    except Exception as e:
-        print(f"Could not initialize Brain: {e}")
+    # Model load/warmup, mic calibration and LLM client setup run side by
+    # side in the background; typed commands work as soon as Bridge is up
+    # and use the local fast path until Brain is ready.
+    services = BackgroundServices()
+    services.start('ears', _create_ears, on_ready=_ears_ready)
+    services.start('brain', _create_brain, on_ready=_brain_ready)
+    with STARTUP.phase("bridge init"):
+        bridge = Bridge()
 
     print("\nModes:")
     print("1. Type a command (e.g. 'search left' or JSON)")
     print("2. Type 'listen' to record one phrase")
     print("3. Type 'loop' to continuously listen")
+    print("Type 'stats' for per-stage latency, 'trace' for recent traces ('trace on/off' to toggle).")
+    print("Type 'startup' for the startup timeline, 'aircraft' for the known aircraft profiles,")
+    print("'enroll <word>' to record a wake word/keyword template.")
     print("Type 'exit' to quit.")
+    at = STARTUP.mark("prompt ready")
+    print(f"\nReady for typed commands after {at:.0f}ms.")
 
     while True:
         try:
@@ -45,78 +78,176 @@ def main():
             
             intent_text = user_input
 
+            brain = services.get('brain')
+
+            # Latency instrumentation
+            if user_input.lower() == 'startup':
+                print(STARTUP.format())
+                continue
+            if user_input.lower() == 'aircraft':
+                print(bridge.profiles.format())
+                continue
+            if user_input.lower() == 'stats':
+                print(TRACER.format_summary() if TRACER.enabled else "Tracing is off. Type 'trace on'.")
+                continue
+            if user_input.lower() in ['trace', 'trace on', 'trace off']:
+                if user_input.lower() != 'trace':
+                    TRACER.enabled = user_input.lower() == 'trace on'
+                    print(f"Tracing {'enabled' if TRACER.enabled else 'disabled'}.")
+                else:
+                    print(TRACER.format_recent())
+                continue
+
+            if user_input.lower().startswith('enroll'):
+                enroll_keyword(_wait_for_ears(services), user_input[len('enroll'):].strip())
+                continue
+
+            trace_id = TRACER.begin()
+
             # Handle Voice Modes
             if user_input.lower() in ['listen', '2']:
+                ears = _wait_for_ears(services)
                 if ears:
-                    print("Listening... (Speak now)")
+                    if ears.capture_mode == 'ptt':
+                        print("Listening... (Hold push-to-talk and speak)")
+                    else:
+                        print("Listening... (Speak now)")
                     intent_text = ears.listen()
                     if not intent_text:
+                        TRACER.discard(trace_id)
                         continue
                 else:
                     print("Ears not available.")
                     continue
 
             elif user_input.lower() in ['loop', '3']:
+                # Each phrase in the loop gets its own trace
+                TRACER.discard(trace_id)
+                ears = _wait_for_ears(services)
                 if ears:
+                    # The loop keeps its Brain for its whole run
+                    brain = services.get('brain', wait=True)
                     print("Entering Voice Loop. Press Ctrl+C to stop.")
-                    try:
-                        while True:
-                            print("Listening...")
-                            intent_text = ears.listen()
-                            if intent_text:
-                                process_text(bridge, brain, intent_text)
-                    except KeyboardInterrupt:
-                        print("Exiting Voice Loop.")
-                        continue
+                    run_voice_loop(bridge, brain, ears)
+                    continue
                 else:
                     print("Ears not available.")
                     continue
 
             # Process the text (Typed or Spoken)
             process_text(bridge, brain, intent_text)
+            TRACER.finish(trace_id)
 
         except KeyboardInterrupt:
             break
         except Exception as e:
             print(f"Error: {e}")
 
+    CONFIG.close()
+    brain = services.get('brain', wait=True)
+    ears = services.get('ears', wait=True)
+    services.close()
+    if ears:
+        ears.close()
+    if TRACER.enabled:
+        print(TRACER.format_summary())
+        if CONFIG.section('tracing').get('dump_path'):
+            TRACER.dump(CONFIG.section('tracing')['dump_path'])
+    if brain:
+        brain.close()
+    else:
+        FALLBACK_MATCHER.log_stats()
     bridge.close()
     print("Exiting.")
 
+def _wait_for_ears(services):
+    if not services.ready('ears'):
+        print("Ears are still warming up...")
+    return services.get('ears', wait=True)
+
+def enroll_keyword(ears, label):
+    """Records one utterance of `label` as a keyword spotter template."""
+    if not ears or not ears.spotter:
+        print("Keyword spotter is off (ears.kws.enabled in config.json).")
+        return
+    label = label or ears.spotter.wake_word
+    print(f"Say '{label}' once...")
+    path = ears.enroll(label)
+    if not path:
+        print("Nothing heard (or ears.kws.templates is not set).")
+        return
+    count = len(ears.spotter.templates[label.lower()])
+    print(f"Template {count} for '{label}' saved to {path}." + (" Record a few more." if count < 3 else ""))
+
+def _on_tracing_config(t_config, old):
+    TRACER.enabled = t_config['enabled']
+    print(f"Tracing {'enabled' if TRACER.enabled else 'disabled'} (config.json).")
+
 def process_text(bridge, brain, text):
+    intent = resolve_intent(brain, text)
+    if intent:
+        bridge.process_intent(intent)
+        at = STARTUP.mark("first command")
+        if at is not None:
+            print(f"Time to first command: {at:.0f}ms after start.")
+
+def resolve_intent(brain, text):
+    """
+    Turns typed or spoken text into an intent (JSON string or dict).
+    Returns None when nothing could be resolved.
+    """
     if not text:
-        return
+        return None
 
     print(f"Processing: '{text}'")
     
     # 1. Try JSON (Direct passthrough)
     if text.strip().startswith("{"):
-        bridge.process_intent(text)
-        return
+        return text
 
-    # 2. Use Brain (Gemini)
-    if brain and brain.api_key and "YOUR_API_KEY" not in brain.api_key:
+    # 2. Use Brain (local fast path, then Gemini)
+    if brain:
+        if not brain.online():
+            print("Brain is offline (Missing API Key). Only local fast-path commands will work.")
         print("Thinking...")
-        intent = brain.think(text)
-        if intent:
-            # intent is already a dict
-            print(f"Intent: {json.dumps(intent, indent=2)}")
-            bridge.process_intent(intent)
-        else:
-            print("Brain returned nothing.")
-    else:
-        print("Brain is offline (Missing API Key). Using Mock Fallback for testing...")
-        # Fallback Mock Logic
-        mock_intent = None
-        text_lower = text.lower()
-        if "master arm on" in text_lower:
-            mock_intent = {"aircraft": "OH-58D", "action": "set_master_arm", "parameters": {"state": 1}}
-        
-        if mock_intent:
-            print(f"Mock Intent: {json.dumps(mock_intent)}")
-            bridge.process_intent(mock_intent)
-        else:
-            print("Mock Brain: No match.")
+        intents = brain.think(text)
+        if intents:
+            # Already validated Intents; Bridge will not parse them again
+            print(f"Intent: {json.dumps(to_json(intents), indent=2)}")
+            return intents
+        print("Brain returned nothing.")
+        return None
+
+    print("Brain not available (yet). Using local fast-path matcher only...")
+    intent = FALLBACK_MATCHER.match(text)
+    if intent:
+        print(f"Intent: {json.dumps(intent)}")
+        return intent
+    print("Fast path: No match.")
+    return None
+
+def run_voice_loop(bridge, brain, ears):
+    """
+    Pipelined voice mode. Capture, transcription, intent resolution and
+    execution run as separate stages so back-to-back phrases are not lost.
+    """
+    from src.pipeline import VoicePipeline
+
+    pipeline = VoicePipeline(
+        ears,
+        resolve=lambda text: resolve_intent(brain, text),
+        execute=bridge.process_intent,
+        on_partial=brain.prefetch if brain else None,
+    )
+    pipeline.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("Exiting Voice Loop.")
+    finally:
+        pipeline.stop()
+        print(pipeline.format_stats())
 
 if __name__ == "__main__":
     main()
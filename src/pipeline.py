@@ -0,0 +1,211 @@
+import logging
+import queue
+import threading
+import time
+
+from src.utils.tracing import TRACER
+
+# Sentinel pushed through the queues to shut the stages down in order
+_STOP = object()
+
+
+class Stage:
+    """
+    One step of the voice pipeline running on its own thread.
+    Pulls (trace_id, item) pairs from `inbox`, runs `func` on the item and
+    pushes non-empty results to `outbox` under the same trace ID. Keeps
+    simple latency/throughput counters.
+    """
+    def __init__(self, name, func, inbox, outbox=None):
+        self.name = name
+        self.func = func
+        self.inbox = inbox
+        self.outbox = outbox
+        self.thread = threading.Thread(target=self._run, name=f"pipeline-{name}", daemon=True)
+
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+
+    def start(self):
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            item = self.inbox.get()
+            if item is _STOP:
+                if self.outbox is not None:
+                    self.outbox.put(_STOP)
+                return
+
+            trace_id, payload = item
+            TRACER.activate(trace_id)
+            start = time.perf_counter()
+            try:
+                result = self.func(payload)
+            except Exception as e:
+                self.errors += 1
+                logging.error(f"Pipeline stage '{self.name}' failed: {e}")
+                TRACER.finish(trace_id)
+                continue
+            self._record(time.perf_counter() - start)
+
+            if self.outbox is None:
+                TRACER.finish(trace_id)
+                continue
+            if result is None:
+                # Nothing usable (silence, no intent match); stop this item here
+                self.dropped += 1
+                TRACER.finish(trace_id)
+                continue
+            self.outbox.put((trace_id, result))
+
+    def _record(self, latency):
+        self.processed += 1
+        self.last_latency = latency
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def stats(self):
+        avg = self.total_latency / self.processed if self.processed else 0.0
+        return {
+            "stage": self.name,
+            "queue_depth": self.inbox.qsize(),
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "last_ms": self.last_latency * 1000,
+            "avg_ms": avg * 1000,
+            "max_ms": self.max_latency * 1000,
+        }
+
+
+class VoicePipeline:
+    """
+    Streaming voice mode: capture -> transcribe -> intent -> execute.
+
+    Each stage runs on its own thread and they are connected by bounded
+    queues, so the microphone is recording the next phrase while the
+    previous one is still being transcribed, resolved or executed.
+
+    With streaming Ears, capture and transcription are fused (partials are
+    decoded while recording) and `on_partial` receives stable partial
+    transcripts, e.g. to prefetch the LLM call.
+    """
+    def __init__(self, ears, resolve, execute, maxsize=4, listen_timeout=1, on_partial=None):
+        self.ears = ears
+        self.listen_timeout = listen_timeout
+        self.streaming = getattr(ears, 'streaming', False)
+        self.on_partial = on_partial
+        self.running = threading.Event()
+
+        self.audio_q = queue.Queue(maxsize=maxsize)
+        self.text_q = queue.Queue(maxsize=maxsize)
+        self.intent_q = queue.Queue(maxsize=maxsize)
+
+        self.stages = [
+            Stage("intent", resolve, self.text_q, self.intent_q),
+            Stage("execute", execute, self.intent_q),
+        ]
+        if not self.streaming:
+            self.stages.insert(0, Stage("transcribe", ears.transcribe, self.audio_q, self.text_q))
+        # Where capture hands off: raw audio, or text when streaming
+        self.first_q = self.text_q if self.streaming else self.audio_q
+
+        # Capture is the source: it has no inbox, only the latency of each recording
+        self.capture_thread = threading.Thread(target=self._capture_loop, name="pipeline-capture", daemon=True)
+        self.captured = 0
+        self.capture_dropped = 0
+        self.capture_latency = 0.0
+        self.capture_total = 0.0
+
+    def start(self):
+        self.running.set()
+        for stage in self.stages:
+            stage.start()
+        self.capture_thread.start()
+        logging.info("Voice pipeline started.")
+
+    def _capture_loop(self):
+        while self.running.is_set():
+            start = time.perf_counter()
+            trace_id = TRACER.begin()
+            # Short timeout so stop() is noticed even when the cockpit is quiet
+            if self.streaming:
+                audio = self.ears.listen_streaming(timeout=self.listen_timeout, on_partial=self.on_partial)
+            else:
+                audio = self.ears.capture(timeout=self.listen_timeout)
+            if audio is None:
+                # Silence is not an utterance; drop the trace without recording it
+                TRACER.discard(trace_id)
+                continue
+            self.captured += 1
+            self.capture_latency = time.perf_counter() - start
+            self.capture_total += self.capture_latency
+
+            try:
+                self.first_q.put((trace_id, audio), timeout=self.listen_timeout)
+            except queue.Full:
+                TRACER.finish(trace_id)
+                # Downstream is saturated; losing the oldest context is worse than
+                # losing this phrase, so drop it and keep the mic hot.
+                self.capture_dropped += 1
+                if not self.streaming:
+                    self.ears.release_audio(audio)
+                logging.warning("Voice pipeline backed up. Dropping captured phrase.")
+
+    def stop(self, timeout=5):
+        """Stops capture and drains in-flight phrases through the remaining stages."""
+        if not self.running.is_set():
+            return
+        self.running.clear()
+        self.capture_thread.join(timeout=timeout + self.listen_timeout)
+        self._put_stop(timeout)
+        for stage in self.stages:
+            stage.thread.join(timeout=timeout)
+        logging.info("Voice pipeline stopped.")
+
+    def _put_stop(self, timeout):
+        # A wedged first stage must not hang shutdown: after waiting, drop the
+        # oldest queued phrase to make room for the sentinel, as capture does.
+        while True:
+            try:
+                self.first_q.put(_STOP, timeout=timeout)
+                return
+            except queue.Full:
+                pass
+            try:
+                trace_id, audio = self.first_q.get_nowait()
+            except queue.Empty:
+                continue
+            TRACER.finish(trace_id)
+            self.capture_dropped += 1
+            if not self.streaming:
+                self.ears.release_audio(audio)
+            logging.warning("Voice pipeline backed up on stop. Dropping queued phrase.")
+
+    def stats(self):
+        avg = self.capture_total / self.captured if self.captured else 0.0
+        capture = {
+            "stage": "capture",
+            "queue_depth": 0,
+            "processed": self.captured,
+            "dropped": self.capture_dropped,
+            "errors": 0,
+            "last_ms": self.capture_latency * 1000,
+            "avg_ms": avg * 1000,
+            "max_ms": None,
+        }
+        return [capture] + [stage.stats() for stage in self.stages]
+
+    def format_stats(self):
+        lines = []
+        for s in self.stats():
+            lines.append(
+                f"{s['stage']:<10} depth={s['queue_depth']} done={s['processed']} "
+                f"dropped={s['dropped']} errors={s['errors']} last={s['last_ms']:.1f}ms avg={s['avg_ms']:.1f}ms"
+            )
+        return "\n".join(lines)
@@ -1,5 +1,10 @@
-
 # OH-58D Kiowa Warrior Profile
+from src.utils.keybind_index import KEYBINDS, flight_commands
+
+AIRCRAFT = "OH-58D"
+
+# KEYBINDS: keybinds.json (in src/) compiled into sorted per-axis tables on first
+# use (or primed from the profile registry's cache); reloaded only when the file changes
 
 # Mapping of high-level actions to DCS-BIOS identifiers
 # For simple switches, the value is the DCS-BIOS ID.
@@ -30,10 +35,102 @@ COMMANDS = {
     "laser_arm": "PLT_LASER_ARM",
 }
 
+# Accepted (min, max) for flight parameters; intents outside are rejected
+# before dispatch (service ceiling / never-exceed speed, with margin)
+PARAMETER_LIMITS = {
+    "altitude": (0, 15000),
+    "speed": (0, 130),
+}
+
+# Spoken phrases for the local fast-path matcher (src/utils/intent_matcher.py).
+# Regexes run against normalized text (lowercase, numbers as digits).
+# Named groups become intent parameters; "state" words are mapped to 1/0.
+# Flight parameters (heading/altitude/speed) are generic and live in the matcher.
+PHRASES = {
+    "set_master_arm": [
+        r"master arm (?P<state>on|off|hot|safe|cold)",
+        r"(?P<state>arm|safe) (?:the )?master(?: arm)?",
+    ],
+    "search_sector": [
+        r"(?:search|scan)(?: the)?(?: sector)?(?: to the)?(?: (?P<direction>left|right|ahead|front|forward|behind|rear))?",
+    ],
+    "weapon_hellfire": [
+        r"(?:select )?(?:hellfires?|missiles?)",
+    ],
+    "weapon_rockets": [
+        r"(?:select )?(?:rockets?|hydras?)",
+    ],
+    "weapon_gun": [
+        r"(?:select )?(?:the )?(?:guns?|cannon|50 cal)",
+    ],
+    "laser_arm": [
+        r"laser (?:arm|on)",
+        r"arm (?:the )?laser",
+    ],
+    "weapons_setup": [
+        r"(?:set ?up|configure|prep(?:are)?) (?:the )?weapons",
+    ],
+    "takeoff_config": [
+        r"(?:takeoff|take off) (?:config(?:uration)?|checks?|setup)",
+        r"configure for (?:takeoff|take off)",
+    ],
+    # "cancel" is a matcher reject word ("cancel master arm"), so it goes to the LLM
+    "cancel_procedure": [
+        r"(?:abort|stop)(?: the)?(?: procedure| sequence| that)?",
+    ],
+}
+
+# Named multi-step sequences, run by Bridge's procedure engine (src/utils/procedures.py)
+# without blocking. Each step is one of:
+#   {"action": ..., "parameters": {...}}  an action of this profile (BIOS or keys)
+#   {"bios": "CONTROL value"}             a raw DCS-BIOS command
+#   {"keys": [...]} / {"bind": "name"}    a key combo, literal or from keybinds.json
+#   {"wait": seconds}                     a pause
+#   {"wait_for": "CONTROL value", "timeout": seconds}  until the export stream shows it
+# Optional on any step: "delay" (seconds after the previous step finished) and
+# "if": "CONTROL value" (skip the step unless the cockpit shows that value).
+# A new voice command cancels a running procedure.
+PROCEDURES = {
+    "weapons_setup": [
+        {"action": "laser_arm"},
+        {"action": "weapon_hellfire"},
+        {"action": "set_master_arm", "parameters": {"state": 1}},
+    ],
+    "takeoff_config": [
+        {"action": "set_master_arm", "parameters": {"state": 0}},
+        {"bind": "Take Off"},
+        {"action": "set_flight_parameters", "parameters": {"altitude": 500, "speed": 60}, "delay": 0.5},
+    ],
+}
+
+def get_flight_commands(parameters):
+    """
+    Returns one keyboard command per flight axis present in `parameters`,
+    in speed, altitude, heading order.
+    """
+    return flight_commands(KEYBINDS, AIRCRAFT, parameters)
+
+def get_commands(action, parameters):
+    """
+    Returns every command needed for an action, in execution order.
+    Unlike get_command, a set_flight_parameters with speed, altitude and
+    heading expands to all three key combos.
+    """
+    if action == "set_flight_parameters":
+        return get_flight_commands(parameters)
+    command = get_command(action, parameters)
+    return [command] if command else []
+
 def get_command(action, parameters):
     """
     Returns the DCS-BIOS command string for a given action and parameters.
+    Flight parameters resolve to a keyboard command dict instead.
     """
+    # Keyboard-driven autopilot presets; not a DCS-BIOS control so not in COMMANDS
+    if action == "set_flight_parameters":
+        commands = get_flight_commands(parameters)
+        return commands[0] if commands else None
+
     cmd_id = COMMANDS.get(action)
     if not cmd_id:
         return None
@@ -54,106 +151,4 @@ def get_command(action, parameters):
         # For simplicity in V1, we just return the ID with Value 1
         return f"{cmd_id} 1"
 
-    if action == "set_flight_parameters":
-        # Load Keybinds
-        # TODO: Ideally cache this at module level or pass in, but for V1 load here ok
-        import json
-        import os
-        
-        keybinds = {}
-        try:
-            # Assume keybinds.json is in src/
-            path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "keybinds.json")
-            with open(path, 'r') as f:
-                full_binds = json.load(f)
-                keybinds = full_binds.get("OH-58D", {})
-        except Exception as e:
-            logging.error(f"Failed to load keybinds: {e}")
-
-        # Helper to find nearest key in a dict
-        def get_nearest(value, mapping):
-            return min(mapping.keys(), key=lambda k: abs(k-value))
-
-        # 1. SPEED (Knots)
-        # We look for keys starting with "Set " and ending " knt" to build the map dynamically
-        speed = parameters.get("speed")
-        if speed:
-            # Parse available speeds from keybinds
-            # Format: "Set 80 knt"
-            available_speeds = []
-            for k in keybinds.keys():
-                if k.startswith("Set ") and k.endswith(" knt"):
-                    try:
-                        val = int(k.split(" ")[1])
-                        available_speeds.append(val)
-                    except: pass
-            
-            if available_speeds:
-                target = min(available_speeds, key=lambda x: abs(x - speed))
-                action_name = f"Set {target} knt"
-                keys = keybinds.get(action_name)
-                
-                logging.info(f"Target Speed: {speed} -> Quantized: {target} ({action_name})")
-                if keys:
-                    return {"type": "keyboard", "keys": keys}
-                else: 
-                     return {"type": "keyboard", "keys": [], "log": f"Missing keybind for {action_name}"}
-
-        # 2. ALTITUDE (Feet)
-        # Format: "Set 5000 ft"
-        alt = parameters.get("altitude")
-        if alt:
-            available_alts = []
-            for k in keybinds.keys():
-                if k.startswith("Set ") and k.endswith(" ft"):
-                    try:
-                        val = int(k.split(" ")[1])
-                        available_alts.append(val)
-                    except: pass
-
-            if available_alts:
-                target = min(available_alts, key=lambda x: abs(x - alt))
-                action_name = f"Set {target} ft"
-                keys = keybinds.get(action_name)
-                
-                logging.info(f"Target Altitude: {alt} -> Quantized: {target} ({action_name})")
-                if keys:
-                     return {"type": "keyboard", "keys": keys}
-                else:
-                     return {"type": "keyboard", "keys": [], "log": f"Missing keybind for {action_name}"}
-
-        # 3. HEADING
-        # Format "Head to 200"
-        heading = parameters.get("heading")
-        if heading is not None:
-             # Parse available headings
-            available_heads = []
-            for k in keybinds.keys():
-                if k.startswith("Head to "):
-                    try:
-                        val = int(k.split(" to ")[1])
-                        available_heads.append(val)
-                    except: pass
-            
-            if available_heads:
-                target = min(available_heads, key=lambda x: abs(x - heading))
-                # 360 wrap logic check? User screenshots show 0 and 350. 
-                # Diff between 355 and 0 is 5. Simple subtraction says 355.
-                # Use modular distance for heading?
-                # Formula: diff = 180 - abs(abs(a1 - a2) - 180)
-                # For now simple linear closest is mostly fine if density is high (every 10 deg)
-                
-                action_name = f"Head to {target}"
-                keys = keybinds.get(action_name)
-                
-                logging.info(f"Target Heading: {heading} -> Quantized: {target} ({action_name})")
-                if keys:
-                    return {"type": "keyboard", "keys": keys}
-                else:
-                    return {"type": "keyboard", "keys": [], "log": f"Missing keybind for {action_name}"}
-
-        return None
-
-    return f"{cmd_id} 1"
-
     return f"{cmd_id} 1"
@@ -0,0 +1,401 @@
+import logging
+import math
+import threading
+import time
+import wave
+from collections import deque
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+INT16_SCALE = 1.0 / 32768.0
+
+
+class WavFileSource:
+    """
+    Frame source backed by a 16kHz mono 16-bit WAV file, for offline
+    endpointing benchmarks. With realtime=True frames are paced like a mic.
+    read() returns None at end of file.
+    """
+    def __init__(self, path, frame_samples, realtime=False):
+        self.wav = wave.open(path, 'rb')
+        if (self.wav.getframerate() != SAMPLE_RATE or self.wav.getnchannels() != 1
+                or self.wav.getsampwidth() != 2):
+            raise ValueError(f"{path}: expected 16kHz mono 16-bit PCM")
+        self.frame_samples = frame_samples
+        self.realtime = realtime
+        self.next_due = None
+
+    def read(self):
+        raw = self.wav.readframes(self.frame_samples)
+        if len(raw) < self.frame_samples * 2:
+            return None
+        if self.realtime:
+            now = time.monotonic()
+            self.next_due = (self.next_due or now) + self.frame_samples / SAMPLE_RATE
+            if self.next_due > now:
+                time.sleep(self.next_due - now)
+        return np.frombuffer(raw, dtype=np.int16)
+
+    def close(self):
+        self.wav.close()
+
+
+class MicrophoneSource:
+    """
+    Always-open 16kHz mono PyAudio input stream read one frame at a time.
+    Kept open between phrases so there is no device open/close per command.
+    """
+    def __init__(self, frame_samples, device_index=None):
+        import pyaudio
+        self.frame_samples = frame_samples
+        self.pa = pyaudio.PyAudio()
+        self.stream = self.pa.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=SAMPLE_RATE,
+            input=True,
+            input_device_index=device_index,
+            frames_per_buffer=frame_samples,
+        )
+
+    def read(self):
+        raw = self.stream.read(self.frame_samples, exception_on_overflow=False)
+        return np.frombuffer(raw, dtype=np.int16)
+
+    def close(self):
+        self.stream.stop_stream()
+        self.stream.close()
+        self.pa.terminate()
+
+
+class RingBuffer:
+    """Preallocated int16 ring buffer addressed by absolute sample index."""
+    def __init__(self, capacity):
+        self.data = np.zeros(capacity, dtype=np.int16)
+        self.capacity = capacity
+        self.written = 0  # absolute index of the next sample
+
+    def write(self, frame):
+        n = len(frame)
+        pos = self.written % self.capacity
+        first = min(n, self.capacity - pos)
+        self.data[pos:pos + first] = frame[:first]
+        if first < n:
+            self.data[:n - first] = frame[first:]
+        self.written += n
+
+    def extract(self, start, end, out=None):
+        """
+        Copies absolute samples [start, end) into `out` (or a new array).
+        Samples older than the buffer capacity are no longer available.
+        """
+        start = max(start, self.written - self.capacity, 0)
+        n = end - start
+        if out is None:
+            out = np.empty(n, dtype=np.int16)
+        pos = start % self.capacity
+        first = min(n, self.capacity - pos)
+        out[:first] = self.data[pos:pos + first]
+        if first < n:
+            out[first:n] = self.data[:n - first]
+        return out[:n]
+
+
+class EnergyVad:
+    """
+    Frame-level energy VAD with an adaptive noise floor.
+
+    A frame is speech when its level is `margin_db` above the running noise
+    floor. The floor tracks non-speech frames with `floor_alpha`, falls
+    quickly when the cabin gets quieter and creeps up slowly during speech,
+    so a sustained change in rotor/engine noise is absorbed within seconds.
+    """
+    def __init__(self, frame_samples, margin_db=10.0, floor_alpha=0.05, min_floor_db=-70.0):
+        self.margin_db = margin_db
+        self.floor_alpha = floor_alpha
+        self.min_floor_db = min_floor_db
+        self.floor_db = None
+        self.scratch = np.empty(frame_samples, dtype=np.float32)
+        self.last_db = None
+
+    def level_db(self, frame):
+        np.multiply(frame, INT16_SCALE, out=self.scratch)
+        power = float(np.dot(self.scratch, self.scratch)) / len(self.scratch)
+        return 10.0 * math.log10(power + 1e-12)
+
+    def is_speech(self, frame):
+        db = self.level_db(frame)
+        self.last_db = db
+        if self.floor_db is None:
+            self.floor_db = max(db, self.min_floor_db)
+            return False
+
+        speech = db > self.floor_db + self.margin_db
+        if db < self.floor_db:
+            alpha = 0.5
+        elif speech:
+            alpha = self.floor_alpha / 20
+        else:
+            alpha = self.floor_alpha
+        self.floor_db = max(self.min_floor_db, self.floor_db + alpha * (db - self.floor_db))
+        return speech
+
+
+class StreamingCapture:
+    """
+    Streaming capture with frame-by-frame endpointing.
+
+    Frames from `source` go into a preallocated ring buffer while the VAD
+    runs on each one. An utterance starts after `start_ms` of speech
+    (including `preroll_ms` of audio before it) and is cut as soon as
+    `end_silence_ms` of non-speech follows, instead of waiting for a fixed
+    phrase time limit.
+    """
+    def __init__(self, source, frame_ms=30, start_ms=90, end_silence_ms=300,
+                 preroll_ms=300, max_phrase_s=10, margin_db=10.0, floor_alpha=0.05):
+        self.source = source
+        self.frame_samples = SAMPLE_RATE * frame_ms // 1000
+        self.frame_ms = frame_ms
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.end_frames = max(1, end_silence_ms // frame_ms)
+        self.preroll = SAMPLE_RATE * preroll_ms // 1000
+        self.max_samples = int(SAMPLE_RATE * max_phrase_s)
+        # Longest utterance capture() can return (the cut lands on a frame edge)
+        self.max_utterance = self.max_samples + self.frame_samples
+        self.ring = RingBuffer(self.max_samples + self.preroll + self.frame_samples * 4)
+        self.vad = EnergyVad(self.frame_samples, margin_db=margin_db, floor_alpha=floor_alpha)
+
+        # Timing of the last utterance, for benchmarks
+        self.last_stats = None
+
+    def retune(self, start_ms=None, end_silence_ms=None, margin_db=None, floor_alpha=None):
+        """Changes endpointing thresholds on the fly; buffers are unaffected."""
+        if start_ms is not None:
+            self.start_frames = max(1, start_ms // self.frame_ms)
+        if end_silence_ms is not None:
+            self.end_frames = max(1, end_silence_ms // self.frame_ms)
+        if margin_db is not None:
+            self.vad.margin_db = margin_db
+        if floor_alpha is not None:
+            self.vad.floor_alpha = floor_alpha
+
+    def capture(self, timeout=None, on_audio=None, into=None):
+        """
+        Blocks until one utterance has been captured and returns it as an
+        int16 numpy array, or None on timeout / end of source. With an
+        AudioBufferPool as `into`, the samples are copied straight from the
+        ring into a pooled AudioBuffer, which is returned instead.
+        While an utterance is in progress, on_audio(ring, start, end) is called
+        after every frame so consumers can work on the audio early.
+        """
+        started = time.monotonic()
+        speech_run = 0
+        silence_run = 0
+        utterance_start = None
+        last_speech_end = None
+        vad_time = 0.0
+        frames = 0
+
+        while True:
+            frame = self.source.read()
+            if frame is None:
+                break
+            self.ring.write(frame)
+            frames += 1
+
+            t = time.perf_counter()
+            speech = self.vad.is_speech(frame)
+            vad_time += time.perf_counter() - t
+
+            if utterance_start is None:
+                speech_run = speech_run + 1 if speech else 0
+                if speech_run >= self.start_frames:
+                    first_speech = self.ring.written - speech_run * self.frame_samples
+                    utterance_start = max(0, first_speech - self.preroll)
+                    last_speech_end = self.ring.written
+                elif timeout is not None and time.monotonic() - started > timeout:
+                    return None
+                continue
+
+            if speech:
+                silence_run = 0
+                last_speech_end = self.ring.written
+            else:
+                silence_run += 1
+
+            if on_audio is not None:
+                on_audio(self.ring, utterance_start, self.ring.written)
+
+            too_long = self.ring.written - utterance_start >= self.max_samples
+            if silence_run >= self.end_frames or too_long:
+                if too_long:
+                    logging.info("Phrase hit the maximum length; cutting.")
+                break
+
+        if utterance_start is None:
+            return None
+
+        end = self.ring.written
+        self.last_stats = {
+            "start_sample": utterance_start,
+            "speech_end_sample": last_speech_end,
+            "cut_sample": end,
+            # Audio time between the last speech frame and the cut
+            "endpoint_delay_ms": (end - last_speech_end) * 1000 / SAMPLE_RATE,
+            "duration_ms": (end - utterance_start) * 1000 / SAMPLE_RATE,
+            "vad_us_per_frame": vad_time * 1e6 / max(1, frames),
+            "noise_floor_db": self.vad.floor_db,
+        }
+        if into is not None:
+            return into.extract(self.ring, utterance_start, end)
+        return self.ring.extract(utterance_start, end)
+
+    def close(self):
+        self.source.close()
+
+
+class PushToTalkCapture:
+    """
+    Push-to-talk capture on an always-open stream.
+
+    A reader thread keeps pulling frames from `source` into the ring buffer
+    whether or not the button is held, so press() can start the utterance
+    `preroll_ms` in the past and the first syllable is never clipped.
+    release() ends it at the current frame and capture() returns at once,
+    with no silence timeout. Presses are queued, so a quick tap made just
+    before capture() is called is not lost. Presses nobody captured are
+    not replayed later: at most `max_pending` are kept, and capture()
+    drops those released more than `stale_s` ago (e.g. keyed for the radio
+    while idle) or whose audio the ring has already overwritten. Same
+    capture() interface as StreamingCapture; the VAD thresholds do not
+    apply.
+    """
+    def __init__(self, source, frame_ms=30, preroll_ms=300, max_phrase_s=10, max_pending=2, stale_s=1.0):
+        self.source = source
+        self.frame_samples = SAMPLE_RATE * frame_ms // 1000
+        self.preroll = SAMPLE_RATE * preroll_ms // 1000
+        self.max_samples = int(SAMPLE_RATE * max_phrase_s)
+        self.max_utterance = self.max_samples + self.frame_samples
+        self.ring = RingBuffer(self.max_samples + self.preroll + self.frame_samples * 8)
+        self.cond = threading.Condition()
+        self.pending = deque()  # utterances: {"start", "end", "pressed_at", "released_at"}
+        self.max_pending = max_pending
+        self.stale_s = stale_s
+        self.active = None  # the utterance capture() is working on
+        self.running = True
+        self.last_stats = None
+        self.reader = threading.Thread(target=self._read_loop, name="ptt-audio", daemon=True)
+        self.reader.start()
+
+    def _read_loop(self):
+        while self.running:
+            frame = self.source.read()
+            if frame is None:
+                break
+            with self.cond:
+                self.ring.write(frame)
+                held = self.pending[-1] if self.pending and self.pending[-1]["end"] is None else None
+                if held and self.ring.written - held["start"] >= self.max_samples:
+                    logging.info("Phrase hit the maximum length; cutting.")
+                    self._end(held)
+                self.cond.notify_all()
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+
+    @property
+    def pressed(self):
+        return bool(self.pending) and self.pending[-1]["end"] is None
+
+    def press(self):
+        with self.cond:
+            if self.pressed:
+                return
+            if len(self.pending) >= self.max_pending:
+                # Nobody is capturing them; keep the newest
+                for utterance in self.pending:
+                    if utterance is not self.active:
+                        self.pending.remove(utterance)
+                        logging.info("Dropped an uncaptured push-to-talk phrase.")
+                        break
+            self.pending.append({"start": max(0, self.ring.written - self.preroll), "end": None,
+                                 "pressed_at": time.perf_counter(), "released_at": None})
+            self.cond.notify_all()
+
+    def release(self):
+        with self.cond:
+            if self.pressed:
+                self._end(self.pending[-1])
+                self.cond.notify_all()
+
+    def _end(self, utterance):
+        utterance["end"] = self.ring.written
+        utterance["released_at"] = time.perf_counter()
+
+    def _drop_stale(self):
+        """Drops queued phrases released too long ago or already overwritten in the ring."""
+        oldest = self.ring.written - self.ring.capacity
+        now = time.perf_counter()
+        stale = [u for u in self.pending if u["start"] < oldest
+                 or (u["released_at"] is not None and now - u["released_at"] > self.stale_s)]
+        for utterance in stale:
+            self.pending.remove(utterance)
+        if stale:
+            logging.info(f"Dropped {len(stale)} stale push-to-talk phrase(s) made while not listening.")
+
+    def capture(self, timeout=None, on_audio=None, into=None):
+        """
+        Blocks until the button has been pressed and released and returns
+        the utterance (with pre-roll) as an int16 numpy array (an AudioBuffer
+        from the `into` pool when given), or None if nothing was pressed
+        within `timeout` or the source ended.
+        on_audio(ring, start, end) is called as frames arrive while held.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.cond:
+            self._drop_stale()
+            while not self.pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if not self.running or (remaining is not None and remaining <= 0):
+                    return None
+                self.cond.wait(remaining)
+            utterance = self.active = self.pending[0]
+
+        seen = utterance["start"]
+        while True:
+            with self.cond:
+                while utterance["end"] is None and self.running and self.ring.written == seen:
+                    self.cond.wait()
+                written = self.ring.written
+                done = utterance["end"] is not None or not self.running
+            # Outside the lock so decoding partials never stalls the reader
+            if on_audio is not None and not done and written > seen:
+                on_audio(self.ring, utterance["start"], written)
+            seen = written
+            if done:
+                break
+
+        with self.cond:
+            self.pending.remove(utterance)
+            self.active = None
+            end = utterance["end"] if utterance["end"] is not None else self.ring.written
+            if into is not None:
+                samples = into.extract(self.ring, utterance["start"], end)
+            else:
+                samples = self.ring.extract(utterance["start"], end)
+        released_at = utterance["released_at"] or time.perf_counter()
+        self.last_stats = {
+            "start_sample": utterance["start"],
+            "cut_sample": end,
+            # Wall time from button release to the audio being handed over
+            "endpoint_delay_ms": (time.perf_counter() - released_at) * 1000,
+            "duration_ms": (end - utterance["start"]) * 1000 / SAMPLE_RATE,
+            "held_ms": (released_at - utterance["pressed_at"]) * 1000,
+        }
+        return samples
+
+    def close(self):
+        self.running = False
+        self.reader.join(timeout=1)
+        self.source.close()
@@ -0,0 +1,139 @@
+import logging
+import threading
+
+import numpy as np
+
+from src.utils.audio_stream import SAMPLE_RATE, INT16_SCALE
+
+_SCALE = np.float32(INT16_SCALE)
+
+
+class AudioBuffer:
+    """
+    One utterance in pooled storage: `pcm` (int16, as captured) and the
+    float32 copy Whisper needs, both views over arrays preallocated at the
+    pool's capacity. release() hands the storage back; the views must not
+    be used afterwards.
+    """
+    __slots__ = ("pool", "pcm_store", "float_store", "length", "pooled")
+
+    def __init__(self, pool, capacity, pooled=True):
+        self.pool = pool
+        self.pcm_store = np.empty(capacity, dtype=np.int16)
+        self.float_store = np.empty(capacity, dtype=np.float32)
+        self.length = 0
+        self.pooled = pooled
+
+    @property
+    def pcm(self):
+        return self.pcm_store[:self.length]
+
+    @property
+    def duration_ms(self):
+        return self.length * 1000 / SAMPLE_RATE
+
+    def load(self, samples):
+        """Copies int16 samples (e.g. a view over recognizer bytes) into the buffer."""
+        self.length = len(samples)
+        self.pcm_store[:self.length] = samples
+        return self
+
+    def to_float(self):
+        """int16 -> float32 in [-1, 1) into the pooled output; returns the view."""
+        out = self.float_store[:self.length]
+        # Cast-assign then scale in place: a mixed-dtype ufunc would
+        # allocate numpy's casting buffer on every call
+        np.copyto(out, self.pcm)
+        np.multiply(out, _SCALE, out=out)
+        return out
+
+    def release(self):
+        if self.pool is not None:
+            pool, self.pool = self.pool, None
+            pool._release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+
+class AudioBufferPool:
+    """
+    Bounded pool of utterance buffers for the capture -> Whisper path.
+
+    Up to `max_buffers` buffers of `capacity` samples are created on
+    demand and reused, so a long session stops allocating after the first
+    few phrases. When all are in use (downstream backed up), or a request
+    exceeds the capacity, a one-off buffer is allocated and dropped on
+    release instead of blocking capture; those are counted as overflows.
+    """
+    def __init__(self, capacity, max_buffers=6):
+        self.capacity = capacity
+        self.max_buffers = max_buffers
+        self.free = []
+        self.lock = threading.Lock()
+        self.created = 0
+        self.in_use = 0
+        self.high_water = 0
+        self.acquires = 0
+        self.overflows = 0
+
+    def acquire(self, length=0):
+        """Returns an AudioBuffer with room for `length` samples (its length is set to it)."""
+        with self.lock:
+            self.acquires += 1
+            self.in_use += 1
+            self.high_water = max(self.high_water, self.in_use)
+            if length <= self.capacity:
+                if self.free:
+                    buffer = self.free.pop()
+                    buffer.pool = self
+                    buffer.length = length
+                    return buffer
+                if self.created < self.max_buffers:
+                    self.created += 1
+                    buffer = AudioBuffer(self, self.capacity)
+                    buffer.length = length
+                    return buffer
+            self.overflows += 1
+        buffer = AudioBuffer(self, length, pooled=False)
+        buffer.length = length
+        return buffer
+
+    def extract(self, ring, start, end):
+        """Copies ring samples [start, end) straight into a pooled buffer and returns it."""
+        start = max(start, ring.written - ring.capacity, 0)
+        buffer = self.acquire(end - start)
+        ring.extract(start, end, out=buffer.pcm_store)
+        return buffer
+
+    def _release(self, buffer):
+        with self.lock:
+            self.in_use -= 1
+            if buffer.pooled:
+                self.free.append(buffer)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "capacity_s": self.capacity / SAMPLE_RATE,
+                "created": self.created,
+                "max_buffers": self.max_buffers,
+                "in_use": self.in_use,
+                "high_water": self.high_water,
+                "acquires": self.acquires,
+                "overflows": self.overflows,
+                # int16 + float32 per pooled buffer
+                "pooled_mb": self.created * self.capacity * 6 / 1e6,
+            }
+
+    def log_stats(self):
+        s = self.stats()
+        if s["acquires"]:
+            logging.info(
+                f"Audio buffers: {s['created']}/{s['max_buffers']} created ({s['pooled_mb']:.1f}MB), "
+                f"high water {s['high_water']}, {s['acquires']} acquires, {s['overflows']} overflow(s)"
+            )
@@ -0,0 +1,107 @@
+import difflib
+import re
+
+from src.utils.intent_grammar import profile_actions
+from src.utils.intent_matcher import COMPASS_WORDS
+from src.utils.text_normalizer import normalize_numbers
+
+# Flight terminology from the Brain's SYSTEM_PROMPT and the matcher grammar
+FLIGHT_TERMS = ["angels", "cherubs", "knots", "feet", "heading", "altitude", "speed"]
+
+# Generic words in action names that nobody says ("weapon_gun" -> "gun")
+ACTION_NOISE = {"set", "weapon", "placeholder"}
+
+# Whisper's prompt window is ~224 tokens; stay well inside it
+MAX_PROMPT_CHARS = 600
+
+_GROUP_NAME = re.compile(r"\?P<\w+>")
+_WORD = re.compile(r"[a-z]+")
+_WORD_OR_NUMBER = re.compile(r"[a-z]+|\d+(?:\.\d+)?")
+
+
+class CommandVocabulary:
+    """
+    The words an aircraft profile can be commanded with, built from its
+    COMMANDS action names, PHRASES grammar and keybind names plus the
+    shared flight terminology.
+
+    Used to bias Whisper towards the command domain: `prompt` is an
+    initial prompt of example commands, `hotwords` the bare word list,
+    and snap() corrects near-miss words in a transcript ("helfire",
+    "angles") to the closest vocabulary word.
+    """
+    def __init__(self, profile, aircraft=None, snap_cutoff=0.8):
+        self.aircraft = aircraft or getattr(profile, "AIRCRAFT", None)
+        self.snap_cutoff = snap_cutoff
+        self.phrases = self._collect_phrases(profile)
+        self.words = sorted({w for phrase in self.phrases for w in _WORD.findall(phrase)})
+        self.word_set = frozenset(self.words)
+        self.prompt = self._build_prompt()
+        self.hotwords = " ".join(self.words)
+
+    def _collect_phrases(self, profile):
+        phrases = []
+        for action in profile_actions(profile):
+            words = [w for w in action.split("_") if w not in ACTION_NOISE]
+            if words:
+                phrases.append(" ".join(words))
+
+        for patterns in getattr(profile, "PHRASES", {}).values():
+            for pattern in patterns:
+                # Literal words of the grammar; alternation and optional groups flattened
+                phrases.append(" ".join(w for w in _WORD.findall(_GROUP_NAME.sub("", pattern)) if len(w) > 1))
+
+        keybinds = getattr(profile, "KEYBINDS", None)
+        if keybinds is not None and self.aircraft:
+            for name in keybinds.binds_for(self.aircraft):
+                phrases.append(" ".join(_WORD.findall(name.lower())))
+
+        phrases.extend(FLIGHT_TERMS)
+        phrases.extend(COMPASS_WORDS.values())
+
+        # Keep order, drop duplicates and empties
+        seen = set()
+        return [p for p in phrases if p and not (p in seen or seen.add(p))]
+
+    def _build_prompt(self):
+        aircraft = f"{self.aircraft} " if self.aircraft else ""
+        examples = [
+            "Master arm on.", "Select Hellfire.", "Laser arm.",
+            "Angels 1.5, heading 270, 60 knots.",
+        ]
+        prompt = f"{aircraft}cockpit voice commands. " + " ".join(examples)
+        for phrase in self.phrases:
+            if len(prompt) + len(phrase) + 2 > MAX_PROMPT_CHARS:
+                break
+            prompt += f" {phrase.capitalize()}."
+        return prompt
+
+    def snap(self, text):
+        """
+        Replaces out-of-vocabulary words that are close to a vocabulary word.
+        Short words and numbers are left alone so ordinary speech and values
+        pass through unchanged.
+        """
+        def replace(m):
+            word = m.group(0)
+            lower = word.lower()
+            if len(lower) < 4 or lower in self.word_set:
+                return word
+            match = difflib.get_close_matches(lower, self.words, n=1, cutoff=self.snap_cutoff)
+            return match[0] if match else word
+
+        return re.sub(r"[A-Za-z]+", replace, text)
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level edit distance over normalized text, divided by the reference length."""
+    ref = _WORD_OR_NUMBER.findall(normalize_numbers(reference.lower()))
+    hyp = _WORD_OR_NUMBER.findall(normalize_numbers(hypothesis.lower()))
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (r != h))
+    return row[-1] / len(ref)
@@ -1,40 +1,322 @@
+import copy
 import json
 import os
 import logging
+import threading
 
 CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config.json')
 
-def load_config():
-    """
-    Loads configuration from config.json.
-    Returns a dictionary with defaults if file is missing or keys are missing.
-    """
-    defaults = {
-        "ears": {
-            "backend": "google",
-            "whisper": {
-                "model_size": "tiny.en",
-                "device": "cuda",
-                "compute_type": "float16"
+# Complete configuration; config.json only needs the keys it changes
+DEFAULTS = {
+    "ears": {
+        "backend": "google",
+        "capture": "recognizer",
+        "vad": {
+            "frame_ms": 30,
+            "start_ms": 90,
+            "end_silence_ms": 300,
+            "preroll_ms": 300,
+            "max_phrase_s": 10,
+            "margin_db": 10.0,
+            "floor_alpha": 0.05
+        },
+        "ptt": {
+            "trigger": "udp",
+            "port": 7780,
+            "key": None,
+            "joystick": 0,
+            "button": None,
+            "device": None,
+            "preroll_ms": 300,
+            "max_phrase_s": 30
+        },
+        "kws": {
+            "enabled": False,
+            "templates": "wake_words",
+            "wake_word": "handler",
+            "threshold": None,
+            "min_voiced": 0.25,
+            "min_ms": 250,
+            "search_s": 1.5
+        },
+        "whisper": {
+            "model_size": "tiny.en",
+            "device": "cuda",
+            "compute_type": "float16",
+            "profile": "accurate",
+            "profiles": {
+                "accurate": {"beam_size": 5, "vad_filter": False},
+                "fast": {"beam_size": 1, "vad_filter": False}
+            },
+            "fallback": None,
+            "streaming": {
+                "enabled": False,
+                "step_ms": 500,
+                "window_s": 10,
+                "partial_profile": "fast"
             }
+        }
+    },
+    "input": {
+        "backend": "auto"
+    },
+    "dcs_bios": {
+        "ip": "127.0.0.1",
+        "port": 7778,
+        "export": {
+            "enabled": False,
+            "group": "239.255.50.10",
+            "port": 5010,
+            "controls": None
+        },
+        "ack": {
+            "enabled": False,
+            "deadline": 0.3,
+            "retries": 3,
+            "backoff": 2.0
+        }
+    },
+    "brain": {
+        "api_key": None,
+        "backend": "gemini",
+        "model": "gemini-2.0-flash-exp",
+        "endpoint": None,
+        "deadline": 2.5,
+        "max_connections": 4,
+        "llama_cpp": {
+            "model_path": None,
+            "n_ctx": 2048,
+            "n_threads": None,
+            "max_tokens": 128
         },
-        "dcs_bios": {
-            "ip": "127.0.0.1",
-            "port": 7778
+        "hedge": {
+            "enabled": True,
+            "percentile": 90,
+            "min_delay": 0.3,
+            "initial_delay": 1.0,
+            "window": 100
+        },
+        "cache": {
+            "max_size": 256,
+            "ttl": None,
+            "path": "intent_cache.json"
         }
+    },
+    "tracing": {
+        "enabled": False,
+        "dump_path": None
+    },
+    "hot_reload": {
+        "enabled": True,
+        "interval": 1.0
     }
+}
+
+# Allowed values for enumerated settings (dotted path -> choices)
+CHOICES = {
+    "ears.backend": ("google", "whisper"),
+    "ears.capture": ("recognizer", "vad", "ptt"),
+    "ears.ptt.trigger": ("udp", "key", "joystick", "evdev"),
+    "input.backend": ("auto", "win32", "uinput", "recording"),
+    "brain.backend": ("gemini", "llama_cpp"),
+}
+
+# (min, max) for numeric settings
+RANGES = {
+    "dcs_bios.port": (1, 65535),
+    "dcs_bios.export.port": (1, 65535),
+    "dcs_bios.ack.deadline": (0.01, 10),
+    "dcs_bios.ack.retries": (0, 20),
+    "brain.deadline": (0.1, 60),
+    "brain.hedge.percentile": (1, 99),
+    "ears.vad.frame_ms": (10, 30),
+    "ears.ptt.port": (1, 65535),
+    "ears.ptt.preroll_ms": (0, 2000),
+    "ears.kws.min_voiced": (0, 1),
+    "ears.kws.search_s": (0.1, 10),
+}
 
-    if not os.path.exists(CONFIG_PATH):
-        logging.warning(f"Config file not found at {CONFIG_PATH}. Using defaults.")
-        return defaults
-
-    try:
-        with open(CONFIG_PATH, 'r') as f:
-            user_config = json.load(f)
-            # Simple recursive merge (mock) or just return user config + defaults logic
-            # For now, we trust the file or fallback completely, but better to merge.
-            # Here we just return user_config, assuming they have the full structure.
-            return user_config
-    except Exception as e:
-        logging.error(f"Error loading config: {e}. Using defaults.")
-        return defaults
+# Sections whose keys are user-defined names (no unknown-key warnings)
+FREE_FORM = {"ears.whisper.profiles", "ears.whisper.fallback", "brain.system_instruction"}
+
+
+def deep_merge(base, override):
+    """Returns a new dict: `override` merged into `base`, recursing into dicts."""
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def validate(config, defaults=DEFAULTS, path=""):
+    """
+    Checks `config` against the defaults' types, CHOICES and RANGES.
+    Invalid values are replaced by the default (in place) and reported;
+    returns the list of problems.
+    """
+    problems = []
+    for key, value in list(config.items()):
+        dotted = f"{path}{key}"
+        if key not in defaults:
+            if path.rstrip(".") not in FREE_FORM and dotted not in FREE_FORM:
+                problems.append(f"unknown setting '{dotted}' (ignored)")
+            continue
+        default = defaults[key]
+
+        if isinstance(default, dict):
+            if not isinstance(value, dict):
+                problems.append(f"'{dotted}' must be an object")
+                config[key] = copy.deepcopy(default)
+            elif dotted not in FREE_FORM:
+                problems += validate(value, default, dotted + ".")
+            continue
+
+        error = None
+        if default is not None and value is not None:
+            if isinstance(default, bool):
+                if not isinstance(value, bool):
+                    error = "must be true or false"
+            elif isinstance(default, (int, float)):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    error = "must be a number"
+            elif not isinstance(value, type(default)):
+                error = f"must be a {type(default).__name__}"
+        if error is None and dotted in CHOICES and value not in CHOICES[dotted]:
+            error = f"must be one of {', '.join(CHOICES[dotted])}"
+        if error is None and dotted in RANGES and isinstance(value, (int, float)):
+            low, high = RANGES[dotted]
+            if not low <= value <= high:
+                error = f"must be between {low} and {high}"
+        if error:
+            problems.append(f"'{dotted}' {error}, got {value!r}; using {default!r}")
+            config[key] = copy.deepcopy(default)
+    return problems
+
+
+class ConfigService:
+    """
+    The one place config.json is read.
+
+    get() returns the cached merged configuration (defaults deep-merged with
+    the file, validated). Snapshots are replaced, never mutated, so callers
+    may keep references but must not modify them. A watcher thread polls
+    the file's mtime (cheap, and portable where inotify is not) and on a
+    change reloads it and calls subscribers of each section that changed.
+    A file that fails to parse keeps the previous configuration.
+    """
+    def __init__(self, path=CONFIG_PATH):
+        self.path = path
+        self.config = None
+        self.mtime = None
+        self.lock = threading.Lock()
+        self.subscribers = []  # (section or None, callback)
+        self.watcher = None
+        self.stop_event = threading.Event()
+        self.reloads = 0
+
+    def get(self):
+        if self.config is None:
+            with self.lock:
+                if self.config is None:
+                    self.config = self._read() or copy.deepcopy(DEFAULTS)
+        return self.config
+
+    def section(self, name):
+        return self.get().get(name, {})
+
+    def _read(self):
+        """Returns the merged config, or None if the file is missing or broken."""
+        if not os.path.exists(self.path):
+            logging.warning(f"Config file not found at {self.path}. Using defaults.")
+            self.mtime = None
+            return None
+        try:
+            self.mtime = os.path.getmtime(self.path)
+            with open(self.path, 'r') as f:
+                user_config = json.load(f)
+            if not isinstance(user_config, dict):
+                raise ValueError("top level must be an object")
+        except Exception as e:
+            logging.error(f"Error loading config: {e}. Keeping the previous settings.")
+            return None
+
+        config = deep_merge(DEFAULTS, user_config)
+        for problem in validate(config):
+            logging.warning(f"config.json: {problem}")
+        return config
+
+    def subscribe(self, callback, section=None):
+        """
+        Calls callback(new, old) after a reload changed `section` (or, with
+        section=None, anything; then new/old are whole configs). Callbacks
+        run on the watcher thread.
+        """
+        self.subscribers.append((section, callback))
+
+    def unsubscribe(self, callback):
+        self.subscribers = [s for s in self.subscribers if s[1] is not callback]
+
+    def check(self):
+        """Reloads if the file changed on disk. Returns True if it did."""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        if mtime == self.mtime:
+            return False
+        self.reload()
+        return True
+
+    def reload(self):
+        old = self.get()
+        with self.lock:
+            new = self._read()
+            if new is None:
+                return
+            self.config = new
+            self.reloads += 1
+        logging.info("config.json changed on disk. Settings reloaded.")
+
+        for section, callback in list(self.subscribers):
+            before = old if section is None else old.get(section)
+            after = new if section is None else new.get(section)
+            if before == after:
+                continue
+            try:
+                callback(after, before)
+            except Exception as e:
+                logging.error(f"Config subscriber for '{section or '*'}' failed: {e}")
+
+    def start_watching(self, interval=None):
+        if self.watcher:
+            return
+        interval = interval or self.section('hot_reload').get('interval', 1.0)
+        self.get()
+
+        def run():
+            while not self.stop_event.wait(interval):
+                self.check()
+
+        self.watcher = threading.Thread(target=run, name="config-watch", daemon=True)
+        self.watcher.start()
+
+    def close(self):
+        self.stop_event.set()
+        if self.watcher:
+            self.watcher.join(timeout=2)
+
+
+# Process-wide configuration
+CONFIG = ConfigService()
+
+
+def load_config():
+    """
+    Returns the cached configuration: defaults deep-merged with config.json
+    and validated. The file is read once; later changes arrive through
+    CONFIG.subscribe() while the watcher runs.
+    """
+    return CONFIG.get()
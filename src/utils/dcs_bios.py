@@ -1,15 +1,47 @@
 import socket
 import logging
-from src.utils.config_loader import load_config
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from src.utils.config_loader import CONFIG
+from src.utils.scheduler import Scheduler
+
+# Stay under a typical MTU so batched commands are never IP-fragmented
+MAX_DATAGRAM = 1400
+
+# Round-trip samples kept per control for the latency percentiles
+ACK_SAMPLES = 1000
 
 class DcsBiosSender:
-    def __init__(self):
-        config = load_config()
-        self.ip = config['dcs_bios']['ip']
-        self.port = config['dcs_bios']['port']
+    def __init__(self, cockpit=None):
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # Acknowledged sends: confirm through the live cockpit state (export stream)
+        self.cockpit = cockpit
+        self._configure(CONFIG.section('dcs_bios'))
+        # Target and ack timing can be retuned in config.json mid-session
+        CONFIG.subscribe(self._on_config, 'dcs_bios')
+        self.scheduler = None
+        self.ack_lock = threading.Lock()
+        self.ack_latency = {}  # control -> deque of round-trip seconds
+        self.ack_counts = {}   # control -> {"confirmed", "retries", "failed"}
+
         logging.info(f"DCS-BIOS Sender initialized on {self.ip}:{self.port}")
 
+    def _configure(self, d_config):
+        a_config = d_config['ack']
+        self.ip = d_config['ip']
+        self.port = d_config['port']
+        # One tuple, swapped atomically, so a send never mixes old ip and new port
+        self.target = (self.ip, self.port)
+        self.ack_deadline = a_config['deadline']
+        self.ack_retries = a_config['retries']
+        self.ack_backoff = a_config['backoff']
+
+    def _on_config(self, d_config, old):
+        self._configure(d_config)
+        logging.info(f"DCS-BIOS Sender retargeted to {self.ip}:{self.port}")
+
     def send_command(self, command_string):
         """
         Sends a command string to DCS-BIOS.
@@ -19,10 +51,207 @@ class DcsBiosSender:
             command_string += '\n'
         
         try:
-            self.sock.sendto(command_string.encode('utf-8'), (self.ip, self.port))
+            self.sock.sendto(command_string.encode('utf-8'), self.target)
             logging.debug(f"Sent to DCS-BIOS: {command_string.strip()}")
         except Exception as e:
             logging.error(f"Error sending to DCS-BIOS: {e}")
 
+    def send_commands(self, command_strings):
+        """
+        Sends several commands as newline-separated lines in as few datagrams
+        as possible (DCS-BIOS processes each line of a packet in order).
+        Returns the number of datagrams sent.
+        """
+        lines = [c if c.endswith('\n') else c + '\n' for c in command_strings]
+        datagrams = []
+        current = ""
+        for line in lines:
+            if current and len(current) + len(line) > MAX_DATAGRAM:
+                datagrams.append(current)
+                current = ""
+            current += line
+        if current:
+            datagrams.append(current)
+
+        for payload in datagrams:
+            try:
+                self.sock.sendto(payload.encode('utf-8'), self.target)
+                logging.debug(f"Sent to DCS-BIOS: {payload.strip()!r}")
+            except Exception as e:
+                logging.error(f"Error sending to DCS-BIOS: {e}")
+                raise
+        return len(datagrams)
+
+    def send_acknowledged(self, command_string, deadline=None, retries=None):
+        """
+        Sends "<CONTROL> <value>" and watches the cockpit state for the
+        control to read back that value. Unconfirmed sends are retried with
+        exponential backoff on the deadline.
+
+        Returns a Future immediately; it resolves to True once confirmed or
+        False after the last retry times out.
+        """
+        ack = self._prepare_ack(command_string, deadline, retries)
+        self._attempt(ack)
+        return ack.future
+
+    def send_commands_acknowledged(self, command_strings, confirm=None):
+        """
+        Batched variant: the whole batch goes out in order via send_commands
+        (one datagram when it fits), and the commands in `confirm` (default:
+        all of them) are watched and retried individually. Returns one
+        Future per confirmed command.
+        """
+        confirm = command_strings if confirm is None else confirm
+        acks = []
+        try:
+            for c in confirm:
+                acks.append(self._prepare_ack(c, None, None))
+            self.send_commands(command_strings)
+        except Exception:
+            # Nothing will confirm these; never leave watchers or waiters behind
+            for ack in acks:
+                self._abandon(ack)
+            raise
+        for ack in acks:
+            self._attempt(ack, already_sent=True)
+        return [ack.future for ack in acks]
+
+    def _prepare_ack(self, command_string, deadline, retries):
+        if self.cockpit is None:
+            raise RuntimeError("Acknowledged send needs a cockpit state (enable dcs_bios.export)")
+        parts = command_string.split()
+        if len(parts) != 2 or not parts[1].lstrip('-').isdigit():
+            raise ValueError(f"Cannot confirm non-absolute command: {command_string!r}")
+        control, expected = parts[0], int(parts[1])
+        if control not in self.cockpit.controls:
+            raise ValueError(f"No export definition for {control}; cannot confirm")
+
+        if self.scheduler is None:
+            self.scheduler = Scheduler("dcs-bios-ack")
+
+        ack = _PendingAck(command_string, control, expected,
+                          self.ack_deadline if deadline is None else deadline,
+                          self.ack_retries if retries is None else retries)
+
+        def on_change(name, value):
+            if value == expected:
+                self._confirm(ack)
+
+        ack.watcher = on_change
+        # Start the clock before watching so an early change still has a latency
+        ack.started = time.monotonic()
+        self.cockpit.watch(control, on_change)
+        return ack
+
+    def _attempt(self, ack, already_sent=False):
+        with ack.lock:
+            if ack.future.done():
+                return
+            ack.attempts += 1
+            ack.sent_at = time.monotonic()
+            attempt = ack.attempts
+            deadline = ack.deadline * (self.ack_backoff ** (attempt - 1))
+
+        if not already_sent:
+            self.send_command(ack.command)
+        self.scheduler.schedule(time.monotonic() + deadline, lambda: self._on_deadline(ack, attempt))
+
+    def _on_deadline(self, ack, attempt):
+        with ack.lock:
+            if ack.future.done() or ack.attempts != attempt:
+                return
+            # Value may have been right already (no change to observe); a fresh
+            # frame since the send showing the target value counts as confirmation.
+            frame_time = self.cockpit.last_frame_time
+            confirmed = (
+                self.cockpit.get(ack.control) == ack.expected
+                and frame_time is not None and frame_time > ack.sent_at
+            )
+            exhausted = ack.attempts > ack.retries
+        if confirmed:
+            self._confirm(ack)
+        elif exhausted:
+            self._fail(ack)
+        else:
+            logging.warning(f"No ack for '{ack.command}' (attempt {attempt}). Retrying...")
+            self._count(ack.control, "retries")
+            self._attempt(ack)
+
+    def _confirm(self, ack):
+        with ack.lock:
+            if ack.future.done():
+                return
+            latency = time.monotonic() - ack.started
+            ack.future.set_result(True)
+        self.cockpit.unwatch(ack.control, ack.watcher)
+        with self.ack_lock:
+            self.ack_latency.setdefault(ack.control, deque(maxlen=ACK_SAMPLES)).append(latency)
+        self._count(ack.control, "confirmed")
+        logging.debug(f"Ack '{ack.command}' in {latency * 1000:.1f}ms ({ack.attempts} attempt(s))")
+
+    def _fail(self, ack):
+        if self._abandon(ack):
+            self._count(ack.control, "failed")
+            logging.error(f"'{ack.command}' not confirmed after {ack.attempts} attempt(s)")
+
+    def _abandon(self, ack):
+        """Resolves an unconfirmed ack to False and stops watching; False if it was already done."""
+        with ack.lock:
+            if ack.future.done():
+                return False
+            ack.future.set_result(False)
+        self.cockpit.unwatch(ack.control, ack.watcher)
+        return True
+
+    def _count(self, control, key):
+        with self.ack_lock:
+            counts = self.ack_counts.setdefault(control, {"confirmed": 0, "retries": 0, "failed": 0})
+            counts[key] += 1
+
+    def ack_stats(self):
+        """
+        Per-control confirmation counts and round-trip percentiles (ms),
+        plus an "all" entry across controls.
+        """
+        with self.ack_lock:
+            samples = {c: list(d) for c, d in self.ack_latency.items()}
+            counts = {c: dict(v) for c, v in self.ack_counts.items()}
+
+        stats = {}
+        everything = []
+        for control, c in counts.items():
+            values = sorted(samples.get(control, []))
+            everything += values
+            stats[control] = dict(c, **_percentiles(values))
+        total = {k: sum(c[k] for c in counts.values()) for k in ("confirmed", "retries", "failed")}
+        stats["all"] = dict(total, **_percentiles(sorted(everything)))
+        return stats
+
     def close(self):
+        CONFIG.unsubscribe(self._on_config)
+        if self.scheduler:
+            self.scheduler.close()
         self.sock.close()
+
+
+class _PendingAck:
+    def __init__(self, command, control, expected, deadline, retries):
+        self.command = command
+        self.control = control
+        self.expected = expected
+        self.deadline = deadline
+        self.retries = retries
+        self.attempts = 0
+        self.started = None
+        self.sent_at = None
+        self.watcher = None
+        self.future = Future()
+        self.lock = threading.Lock()
+
+def _percentiles(sorted_values):
+    if not sorted_values:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    def pick(p):
+        return sorted_values[min(len(sorted_values) - 1, int(p * len(sorted_values)))] * 1000
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99)}
@@ -0,0 +1,257 @@
+import json
+import logging
+import socket
+import struct
+import sys
+import threading
+import time
+from array import array
+
+# DCS-BIOS export protocol: every frame starts with four 0x55 bytes, followed
+# by blocks of <address:u16 LE> <count:u16 LE> <count bytes of data>.
+# Data is a 64KB memory map of little-endian 16-bit words; a write to
+# END_OF_UPDATE marks the end of one simulation frame.
+SYNC = b"\x55\x55\x55\x55"
+END_OF_UPDATE = 0xFFFE
+MEMORY_WORDS = 0x10000 // 2
+
+DEFAULT_GROUP = "239.255.50.10"
+DEFAULT_PORT = 5010
+
+_BIG_ENDIAN_HOST = sys.byteorder == "big"
+
+
+def load_control_definitions(path):
+    """
+    Reads a DCS-BIOS aircraft JSON (doc/json/<aircraft>.json) and returns
+    {control_name: (address, mask, shift)} for every integer output.
+    """
+    with open(path, 'r') as f:
+        doc = json.load(f)
+
+    controls = {}
+    for category in doc.values():
+        for name, control in category.items():
+            for output in control.get("outputs", []):
+                if output.get("type") == "integer":
+                    controls[name] = (output["address"], output["mask"], output["shift_by"])
+                    break
+    return controls
+
+
+class CockpitState:
+    """
+    Live copy of the DCS-BIOS memory map, fed incrementally with raw
+    export bytes via feed().
+
+    The map is an array of 32768 unsigned 16-bit words. Watchers registered
+    on a control are called with (name, value) once per frame, only when
+    that control's value changed.
+    """
+    def __init__(self, controls=None):
+        self.controls = dict(controls or {})
+        self.words = array('H', bytes(0x10000))
+        self.seen = bytearray(MEMORY_WORDS)
+        self.watchers = {}  # word index -> [[name, callback, last_value]]
+        self.dirty = set()
+        # Re-entrant so watchers may query or (un)register from their callback
+        self.lock = threading.RLock()
+
+        self.buf = bytearray()
+        self.synced = False
+        self.frames = 0
+        self.last_frame_time = None
+
+    # --- Decoding -------------------------------------------------------
+
+    def feed(self, data):
+        """Consumes export stream bytes; partial blocks are kept for the next call."""
+        buf = self.buf
+        buf += data
+        pos = 0
+        end = len(buf)
+
+        with self.lock:
+            while True:
+                if not self.synced:
+                    idx = buf.find(SYNC, pos)
+                    if idx < 0:
+                        # Keep a possible partial sync sequence
+                        pos = max(pos, end - 3)
+                        break
+                    pos = idx + 4
+                    self.synced = True
+                    continue
+
+                if end - pos < 4:
+                    break
+                address, count = struct.unpack_from('<HH', buf, pos)
+                if address == 0x5555 and count == 0x5555:
+                    # Sync bytes of the next frame
+                    pos += 4
+                    continue
+                if count & 1 or address & 1:
+                    # Corrupt block; resynchronize on the next frame
+                    self.synced = False
+                    pos += 1
+                    continue
+                if end - pos - 4 < count:
+                    break
+
+                self._write(address, buf, pos + 4, count)
+                pos += 4 + count
+
+                if address == END_OF_UPDATE:
+                    self._end_frame()
+
+        del buf[:pos]
+
+    def _write(self, address, buf, start, count):
+        first = address // 2
+        new = array('H', bytes(buf[start:start + count]))
+        if _BIG_ENDIAN_HOST:
+            new.byteswap()
+        n = len(new)
+        old = self.words[first:first + n]
+        if old != new:
+            for i in range(n):
+                if old[i] != new[i]:
+                    self.dirty.add(first + i)
+            self.words[first:first + n] = new
+        self.seen[first:first + n] = b"\x01" * n
+
+    def _end_frame(self):
+        self.frames += 1
+        self.last_frame_time = time.monotonic()
+        if not self.dirty:
+            return
+        calls = []
+        for index in self.dirty:
+            for watcher in self.watchers.get(index, ()):
+                name, callback, last = watcher
+                address, mask, shift = self.controls[name]
+                value = (self.words[index] & mask) >> shift
+                if value != last:
+                    watcher[2] = value
+                    calls.append((callback, name, value))
+        self.dirty.clear()
+
+        # Still under the lock, so callbacks observe a consistent frame
+        for callback, name, value in calls:
+            try:
+                callback(name, value)
+            except Exception as e:
+                logging.error(f"Cockpit watcher for {name} failed: {e}")
+
+    # --- Queries --------------------------------------------------------
+
+    def define(self, name, address, mask=0xFFFF, shift=0):
+        self.controls[name] = (address, mask, shift)
+
+    def known(self, name):
+        """True once the control's word has been received at least once."""
+        control = self.controls.get(name)
+        return bool(control) and bool(self.seen[control[0] // 2])
+
+    def get(self, name, default=None):
+        control = self.controls.get(name)
+        if not control or not self.seen[control[0] // 2]:
+            return default
+        address, mask, shift = control
+        return (self.words[address // 2] & mask) >> shift
+
+    def watch(self, name, callback):
+        """Calls callback(name, value) whenever the control changes."""
+        if name not in self.controls:
+            raise KeyError(f"Unknown DCS-BIOS control: {name}")
+        address = self.controls[name][0]
+        with self.lock:
+            self.watchers.setdefault(address // 2, []).append([name, callback, self.get(name)])
+
+    def unwatch(self, name, callback):
+        address = self.controls[name][0]
+        with self.lock:
+            watchers = self.watchers.get(address // 2, [])
+            watchers[:] = [w for w in watchers if not (w[0] == name and w[1] is callback)]
+
+
+class ExportListener:
+    """
+    Background thread that joins the DCS-BIOS export stream and feeds a
+    CockpitState. With group=None it just binds the UDP port, which is what
+    the local ExportReplayer targets.
+    """
+    def __init__(self, state, group=DEFAULT_GROUP, port=DEFAULT_PORT):
+        self.state = state
+        self.group = group
+        self.port = port
+        self.running = threading.Event()
+        self.thread = None
+        self.sock = None
+        self.packets = 0
+
+    def start(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("", self.port))
+        if self.group:
+            mreq = struct.pack("4s4s", socket.inet_aton(self.group), socket.inet_aton("0.0.0.0"))
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+        self.sock.settimeout(0.5)
+
+        self.running.set()
+        self.thread = threading.Thread(target=self._run, name="dcs-bios-export", daemon=True)
+        self.thread.start()
+        logging.info(f"DCS-BIOS export listener on {self.group or '*'}:{self.port}")
+
+    def _run(self):
+        while self.running.is_set():
+            try:
+                data, _ = self.sock.recvfrom(65535)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self.packets += 1
+            self.state.feed(data)
+
+    def close(self):
+        self.running.clear()
+        if self.thread:
+            self.thread.join(timeout=2)
+        if self.sock:
+            self.sock.close()
+
+
+def encode_frame(writes):
+    """
+    Builds one export frame from {address: value} word writes, ending with
+    an END_OF_UPDATE write like DCS-BIOS does.
+    """
+    out = bytearray(SYNC)
+    for address, value in sorted(writes.items()):
+        out += struct.pack('<HHH', address, 2, value & 0xFFFF)
+    out += struct.pack('<HHH', END_OF_UPDATE, 2, 0)
+    return bytes(out)
+
+
+class ExportReplayer:
+    """
+    Stands in for DCS: sends export frames to a local port so
+    ExportListener/CockpitState can be exercised offline.
+    """
+    def __init__(self, ip="127.0.0.1", port=DEFAULT_PORT):
+        self.target = (ip, port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send_frame(self, writes):
+        self.sock.sendto(encode_frame(writes), self.target)
+
+    def replay(self, frames, interval=1 / 30):
+        """Sends raw recorded frames (bytes) at roughly the DCS export rate."""
+        for frame in frames:
+            self.sock.sendto(frame, self.target)
+            time.sleep(interval)
+
+    def close(self):
+        self.sock.close()
@@ -0,0 +1,238 @@
+import ctypes
+import logging
+import sys
+import threading
+import time
+from collections import deque
+
+# Windows input structures
+PUL = ctypes.POINTER(ctypes.c_ulong)
+class KeyBdInput(ctypes.Structure):
+    _fields_ = [("wVk", ctypes.c_ushort),
+                ("wScan", ctypes.c_ushort),
+                ("dwFlags", ctypes.c_ulong),
+                ("time", ctypes.c_ulong),
+                ("dwExtraInfo", PUL)]
+
+class HardwareInput(ctypes.Structure):
+    _fields_ = [("uMsg", ctypes.c_ulong),
+                ("wParamL", ctypes.c_short),
+                ("wParamH", ctypes.c_short)]
+
+class MouseInput(ctypes.Structure):
+    _fields_ = [("dx", ctypes.c_long),
+                ("dy", ctypes.c_long),
+                ("mouseData", ctypes.c_ulong),
+                ("dwFlags", ctypes.c_ulong),
+                ("time", ctypes.c_ulong),
+                ("dwExtraInfo", PUL)]
+
+class Input_I(ctypes.Union):
+    _fields_ = [("ki", KeyBdInput),
+                ("mi", MouseInput),
+                ("hi", HardwareInput)]
+
+class Input(ctypes.Structure):
+    _fields_ = [("type", ctypes.c_ulong),
+                ("ii", Input_I)]
+
+# Scancodes for DirectX/DCS
+# incomplete list, added as needed
+# https://www.win.tue.nl/~aeb/linux/kbd/scancodes-1.html
+# Scancodes for DirectX/DCS
+# Format: 'key': (scancode, is_extended)
+# https://www.win.tue.nl/~aeb/linux/kbd/scancodes-1.html
+SCANCODES = {
+    'esc': (0x01, False), '1': (0x02, False), '2': (0x03, False), '3': (0x04, False), '4': (0x05, False), 
+    '5': (0x06, False), '6': (0x07, False), '7': (0x08, False), '8': (0x09, False), '9': (0x0A, False), 
+    '0': (0x0B, False), '-': (0x0C, False), '=': (0x0D, False), 'backspace': (0x0E, False), 
+    'tab': (0x0F, False), 'q': (0x10, False), 'w': (0x11, False), 'e': (0x12, False), 'r': (0x13, False), 
+    't': (0x14, False), 'y': (0x15, False), 'u': (0x16, False), 'i': (0x17, False), 'o': (0x18, False), 
+    'p': (0x19, False), '[': (0x1A, False), ']': (0x1B, False), 'enter': (0x1C, False), 
+    'lctrl': (0x1D, False), 'a': (0x1E, False), 's': (0x1F, False), 'd': (0x20, False), 'f': (0x21, False), 
+    'g': (0x22, False), 'h': (0x23, False), 'j': (0x24, False), 'k': (0x25, False), 'l': (0x26, False), 
+    ';': (0x27, False), "'": (0x28, False), '`': (0x29, False), 'lshift': (0x2A, False), 
+    '\\': (0x2B, False), 'z': (0x2C, False), 'x': (0x2D, False), 'c': (0x2E, False), 'v': (0x2F, False), 
+    'b': (0x30, False), 'n': (0x31, False), 'm': (0x32, False), ',': (0x33, False), '.': (0x34, False), 
+    '/': (0x35, False), 'rshift': (0x36, False), 'kp_*': (0x37, False), 'lalt': (0x38, False), 
+    'space': (0x39, False), 'capslock': (0x3A, False), 
+    'f1': (0x3B, False), 'f2': (0x3C, False), 'f3': (0x3D, False), 'f4': (0x3E, False), 'f5': (0x3F, False),
+    'f6': (0x40, False), 'f7': (0x41, False), 'f8': (0x42, False), 'f9': (0x43, False), 'f10': (0x44, False),
+    'up': (0xC8, True), 'left': (0xCB, True), 'right': (0xCD, True), 'down': (0xD0, True),
+    
+    # Missing Modifiers
+    'ralt': (0x38, True),
+    'rctrl': (0x1D, True),
+    'lwin': (0xDB, True), # 0xDB is typically just Left Windows key? Actually 0xE0 0x5B usually. 
+                          # Wait, standard set 1 scancode for LWin is E0 5B.
+                          # But DirectX/User32 uses standard codes. 
+                          # MapVirtualKey(VK_LWIN, MAPVK_VK_TO_VSC) -> ?
+                          # Using 0xDB might be wrong. 0x5B is VKEY. 
+                          # Correct Scancode for LWin is usually 0xE0 5B. So (0x5B, True).
+                          # Let's try (0x5B, True).
+    'lwin': (0x5B, True), 
+}
+
+KEYEVENTF_EXTENDEDKEY = 0x0001
+KEYEVENTF_KEYUP = 0x0002
+KEYEVENTF_SCANCODE = 0x0008
+INPUT_KEYBOARD = 1
+
+# Shared dwExtraInfo target; SendInput only copies the pointer value
+_EXTRA = ctypes.c_ulong(0)
+
+def _make_input(code, press, extended):
+    flags = KEYEVENTF_SCANCODE
+    if not press:
+        flags |= KEYEVENTF_KEYUP
+    if extended:
+        flags |= KEYEVENTF_EXTENDEDKEY
+    ii_ = Input_I()
+    ii_.ki = KeyBdInput(0, code, flags, 0, ctypes.pointer(_EXTRA))
+    return Input(ctypes.c_ulong(INPUT_KEYBOARD), ii_)
+
+# Linux input-event-codes names for the same key names as SCANCODES
+UINPUT_KEYS = {
+    'esc': 'KEY_ESC', '1': 'KEY_1', '2': 'KEY_2', '3': 'KEY_3', '4': 'KEY_4',
+    '5': 'KEY_5', '6': 'KEY_6', '7': 'KEY_7', '8': 'KEY_8', '9': 'KEY_9',
+    '0': 'KEY_0', '-': 'KEY_MINUS', '=': 'KEY_EQUAL', 'backspace': 'KEY_BACKSPACE',
+    'tab': 'KEY_TAB', '[': 'KEY_LEFTBRACE', ']': 'KEY_RIGHTBRACE', 'enter': 'KEY_ENTER',
+    'lctrl': 'KEY_LEFTCTRL', ';': 'KEY_SEMICOLON', "'": 'KEY_APOSTROPHE', '`': 'KEY_GRAVE',
+    'lshift': 'KEY_LEFTSHIFT', '\\': 'KEY_BACKSLASH', ',': 'KEY_COMMA', '.': 'KEY_DOT',
+    '/': 'KEY_SLASH', 'rshift': 'KEY_RIGHTSHIFT', 'kp_*': 'KEY_KPASTERISK', 'lalt': 'KEY_LEFTALT',
+    'space': 'KEY_SPACE', 'capslock': 'KEY_CAPSLOCK',
+    'up': 'KEY_UP', 'left': 'KEY_LEFT', 'right': 'KEY_RIGHT', 'down': 'KEY_DOWN',
+    'ralt': 'KEY_RIGHTALT', 'rctrl': 'KEY_RIGHTCTRL', 'lwin': 'KEY_LEFTMETA',
+}
+UINPUT_KEYS.update({c: f'KEY_{c.upper()}' for c in 'abcdefghijklmnopqrstuvwxyz'})
+UINPUT_KEYS.update({f'f{i}': f'KEY_F{i}' for i in range(1, 11)})
+
+
+class InputBackend:
+    """
+    Where synthesized key events go.
+
+    `events` maps each key name to a precomputed (down, up) pair in the
+    backend's native format; send() injects a batch of them at once.
+    """
+    name = "base"
+
+    def __init__(self):
+        self.events = {}
+
+    def send(self, events):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class Win32Backend(InputBackend):
+    """DirectX scancodes injected with user32.SendInput (Windows only)."""
+    name = "win32"
+
+    def __init__(self):
+        super().__init__()
+        # Bound here rather than at import so the module loads on any OS
+        self.SendInput = ctypes.windll.user32.SendInput
+        self.events = {
+            name: (_make_input(code, True, ext), _make_input(code, False, ext))
+            for name, (code, ext) in SCANCODES.items()
+        }
+
+    def send(self, events):
+        """Submits a sequence of Input structs with a single SendInput call."""
+        if not events:
+            return
+        arr = (Input * len(events))(*events)
+        sent = self.SendInput(len(events), arr, ctypes.sizeof(Input))
+        if sent != len(events):
+            logging.warning(f"SendInput injected {sent}/{len(events)} events")
+
+
+class UinputBackend(InputBackend):
+    """
+    Virtual keyboard through /dev/uinput (Linux, needs `evdev` and write
+    access to /dev/uinput). Each batch is followed by a single SYN_REPORT.
+    """
+    name = "uinput"
+
+    def __init__(self):
+        super().__init__()
+        try:
+            from evdev import UInput, ecodes
+        except ImportError:
+            logging.error("evdev not installed. Please pip install evdev.")
+            raise
+        self.ecodes = ecodes
+        codes = {name: getattr(ecodes, code) for name, code in UINPUT_KEYS.items()}
+        self.ui = UInput({ecodes.EV_KEY: sorted(set(codes.values()))}, name="dcs-handler")
+        self.events = {name: ((code, 1), (code, 0)) for name, code in codes.items()}
+
+    def send(self, events):
+        if not events:
+            return
+        for code, value in events:
+            self.ui.write(self.ecodes.EV_KEY, code, value)
+        self.ui.syn()
+
+    def close(self):
+        self.ui.close()
+
+
+class RecordingBackend(InputBackend):
+    """
+    In-memory stand-in that injects nothing and records every event as
+    (perf_counter timestamp, key name, "down"/"up"). Used to measure
+    combo latency, ordering and throughput without a desktop session.
+    Only the last `max_events` events are kept, so a long session on the
+    auto fallback does not grow without bound.
+    """
+    name = "recording"
+
+    def __init__(self, max_events=100000):
+        super().__init__()
+        self.events = {name: ((name, "down"), (name, "up")) for name in SCANCODES}
+        self.log = deque(maxlen=max_events)
+        self.batches = 0
+        self.lock = threading.Lock()
+
+    def send(self, events):
+        if not events:
+            return
+        now = time.perf_counter()
+        with self.lock:
+            self.batches += 1
+            self.log.extend((now, name, kind) for name, kind in events)
+
+    def clear(self):
+        with self.lock:
+            self.log.clear()
+            self.batches = 0
+
+
+BACKENDS = {
+    "win32": Win32Backend,
+    "uinput": UinputBackend,
+    "recording": RecordingBackend,
+}
+
+def create_backend(name="auto"):
+    """
+    Builds an input backend by name. "auto" picks win32 on Windows and
+    uinput elsewhere, falling back to recording (nothing reaches the sim)
+    if uinput is unavailable.
+    """
+    if name != "auto":
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown input backend: {name}")
+        return BACKENDS[name]()
+
+    if sys.platform == "win32":
+        return Win32Backend()
+    try:
+        return UinputBackend()
+    except Exception as e:
+        logging.warning(f"uinput backend unavailable ({e}). Falling back to the recording backend: "
+                        "key presses will NOT reach DCS. Check /dev/uinput access or set input.backend in config.json.")
+        return RecordingBackend()
@@ -0,0 +1,131 @@
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from src.utils.text_normalizer import normalize_utterance
+
+
+class IntentCache:
+    """
+    LRU (+ optional TTL) cache of LLM intents keyed on normalized transcripts.
+
+    Each entry remembers how long the original model call took, so every hit
+    adds that amount to `latency_saved`. With a `path` the cache is loaded
+    at startup and written back by save(), so a warm cache survives restarts.
+    """
+    def __init__(self, max_size=256, ttl=None, path=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = path
+        self.entries = OrderedDict()  # key -> (intent, stored_at, latency)
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.latency_saved = 0.0
+
+        if self.path:
+            self.load()
+
+    def get(self, text, allow_stale=False):
+        """
+        Returns a copy of the cached intent for `text`, or None.
+        With allow_stale an expired entry is still returned (and kept), for
+        when the alternative is no answer at all.
+        """
+        key = normalize_utterance(text)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            intent, stored_at, latency = entry
+            if self.ttl is not None and time.time() - stored_at > self.ttl and not allow_stale:
+                del self.entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            self.latency_saved += latency
+        # Callers may mutate the intent; never hand out the cached object
+        return copy.deepcopy(intent)
+
+    def peek(self, text):
+        """True if `text` has a fresh entry; touches neither the counters nor the LRU order."""
+        key = normalize_utterance(text)
+        with self.lock:
+            entry = self.entries.get(key)
+        return entry is not None and (self.ttl is None or time.time() - entry[1] <= self.ttl)
+
+    def put(self, text, intent, latency=0.0):
+        key = normalize_utterance(text)
+        if not key or not intent:
+            return
+        with self.lock:
+            self.entries[key] = (copy.deepcopy(intent), time.time(), latency)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            now = time.time()
+            for key, intent, stored_at, latency in data.get("entries", []):
+                if self.ttl is not None and now - stored_at > self.ttl:
+                    continue
+                self.entries[key] = (intent, stored_at, latency)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+            logging.info(f"Intent cache loaded {len(self.entries)} entries from {self.path}")
+        except Exception as e:
+            logging.error(f"Failed to load intent cache: {e}")
+
+    def save(self):
+        if not self.path:
+            return
+        with self.lock:
+            data = {"entries": [[k, i, s, l] for k, (i, s, l) in self.entries.items()]}
+        try:
+            # Write to a temp file first so a crash never leaves a truncated cache
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+            logging.info(f"Intent cache saved ({len(data['entries'])} entries)")
+        except Exception as e:
+            logging.error(f"Failed to save intent cache: {e}")
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+            "latency_saved_s": self.latency_saved,
+        }
+
+    def log_stats(self):
+        s = self.stats()
+        logging.info(
+            f"Intent cache: {s['hits']} hits / {s['misses']} misses ({s['hit_rate']:.0%}), "
+            f"{s['size']} entries, saved {s['latency_saved_s']:.1f}s of LLM latency"
+        )
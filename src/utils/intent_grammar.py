@@ -0,0 +1,85 @@
+import re
+
+# Parameters every profile understands through set_flight_parameters
+FLIGHT_PARAMETERS = ("heading", "altitude", "speed")
+
+# Stops a running procedure; accepted by every profile that has PROCEDURES
+CANCEL_ACTION = "cancel_procedure"
+
+_NAMED_GROUP = re.compile(r"\(\?P<(\w+)>([^()]*)\)")
+_WORD_ALTERNATION = re.compile(r"^[\w ]+(?:\|[\w ]+)*$")
+
+
+def parameter_choices(patterns):
+    """
+    Returns {parameter: [allowed string values] or None} from the named
+    groups of PHRASES regexes. "state" is always 0/1 and is left out; None
+    means any string.
+    """
+    choices = {}
+    for pattern in patterns:
+        for name, body in _NAMED_GROUP.findall(pattern):
+            if name == "state":
+                continue
+            if _WORD_ALTERNATION.match(body):
+                values = choices.setdefault(name, [])
+                if values is not None:
+                    values.extend(v for v in body.split("|") if v not in values)
+            else:
+                choices[name] = None
+    return choices
+
+
+def profile_actions(profile):
+    """
+    A profile's actions besides set_flight_parameters: its COMMANDS, then
+    its PROCEDURES and cancel_procedure when it has any.
+    """
+    actions = list(getattr(profile, "COMMANDS", {}))
+    procedures = list(getattr(profile, "PROCEDURES", {}))
+    if procedures:
+        actions += procedures + [CANCEL_ACTION]
+    return actions
+
+
+def _literal(value):
+    return '"\\"' + value.replace('"', '') + '\\""'
+
+
+def build_intent_grammar(profile, aircraft=None):
+    """
+    GBNF grammar (llama.cpp) for the Brain's JSON intent schema, generated
+    from the profile: the aircraft literal, its actions (profile_actions)
+    plus set_flight_parameters, 0/1 states, the spoken choices of each named
+    PHRASES parameter and numeric flight parameters. A single intent or a
+    list of them for compound commands.
+    """
+    aircraft = aircraft or profile.AIRCRAFT
+    actions = profile_actions(profile) + ["set_flight_parameters"]
+    choices = parameter_choices(p for patterns in getattr(profile, "PHRASES", {}).values() for p in patterns)
+
+    param_rules = ['"\\"state\\"" ws ":" ws ("0" | "1")']
+    extra = []
+    for name, values in sorted(choices.items()):
+        rule = f"{name}-value"
+        param_rules.append(f'"\\"{name}\\"" ws ":" ws {rule}')
+        if values:
+            extra.append(f"{rule} ::= " + " | ".join(_literal(v) for v in values))
+        else:
+            extra.append(f'{rule} ::= "\\"" [a-z0-9 ]* "\\""')
+    numeric = " | ".join(f'"\\"{p}\\""' for p in FLIGHT_PARAMETERS)
+    param_rules.append(f"({numeric}) ws \":\" ws number")
+
+    lines = [
+        'root ::= intent | "[" ws intent (ws "," ws intent)* ws "]"',
+        'intent ::= "{" ws "\\"aircraft\\"" ws ":" ws ' + _literal(aircraft)
+        + ' ws "," ws "\\"action\\"" ws ":" ws action ws "," ws "\\"parameters\\"" ws ":" ws params ws "}"',
+        "action ::= " + " | ".join(_literal(a) for a in actions),
+        'params ::= "{" ws "}" | "{" ws param (ws "," ws param)* ws "}"',
+        "param ::= " + " | ".join(param_rules),
+        *extra,
+        'number ::= "-"? [0-9]+ ("." [0-9]+)?',
+        # Bounded whitespace so a small model cannot ramble inside the JSON
+        'ws ::= " "?',
+    ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,203 @@
+import logging
+import re
+import time
+
+from src.utils.profile_registry import DEFAULT_AIRCRAFT, PROFILES
+from src.utils.text_normalizer import normalize_numbers
+
+NUM = r"(?P<v>\d+(?:\.\d+)?)"
+
+# Compass points (same convention as the SYSTEM_PROMPT: N=0, NNE=22.5, E=90...)
+COMPASS_POINTS = [
+    "N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE",
+    "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW",
+]
+COMPASS_WORDS = {"N": "north", "E": "east", "S": "south", "W": "west"}
+
+# Words that can be ignored when checking that a match covers the whole utterance
+FILLER_WORDS = {
+    "a", "the", "to", "and", "then", "please", "now", "us", "me", "our", "it",
+    "handler", "kiowa", "hey", "ok", "okay", "roger", "copy", "go", "set",
+    "select", "take", "up", "down", "head", "turn", "fly", "climb", "descend",
+    "bring", "make", "give", "get", "at", "on", "onto", "with", "of", "for",
+}
+
+# Words that make a phrase unsafe to resolve locally (negations, questions)
+REJECT_WORDS = {
+    "not", "don", "dont", "never", "cancel", "negative", "belay", "disregard",
+    "is", "are", "what", "why", "how", "did", "does",
+}
+
+STATE_WORDS = {"on": 1, "hot": 1, "arm": 1, "off": 0, "safe": 0, "cold": 0}
+
+
+def _compass_table():
+    """Returns {regex_fragment: degrees} for every compass point."""
+    table = {}
+    for i, point in enumerate(COMPASS_POINTS):
+        degrees = i * 22.5
+        words = [COMPASS_WORDS[c] for c in point]
+        table[r"[\s-]*".join(words)] = degrees
+        if len(point) > 1:
+            table[point.lower()] = degrees
+    return table
+
+
+class IntentMatcher:
+    """
+    Local deterministic fast path in front of the LLM.
+
+    Matches normalized text against a grammar compiled once from the
+    profile's PHRASES table plus generic flight terminology (Angels,
+    Cherubs, compass points, knots). Returns an intent dict when one action
+    matches, or a list of intents in spoken order for compound phrases
+    ("master arm on, rockets"). Returns None unless the matches cover the
+    utterance, so the caller can fall through to the LLM.
+    """
+    def __init__(self, profile=None, aircraft=DEFAULT_AIRCRAFT, max_leftover=1):
+        if profile is None:
+            profile = PROFILES[aircraft]
+        self.aircraft = aircraft
+        self.max_leftover = max_leftover
+
+        self.action_patterns = []
+        for action, patterns in getattr(profile, "PHRASES", {}).items():
+            for pattern in patterns:
+                self.action_patterns.append((action, re.compile(rf"\b{pattern}\b")))
+
+        self.compass = _compass_table()
+        compass_alt = "|".join(sorted(self.compass, key=len, reverse=True))
+        compass_re = rf"(?P<c>{compass_alt})"
+        self.compass_lookup = [(re.compile(rf"^{k}$"), v) for k, v in self.compass.items()]
+
+        # (parameter, regex, scale)
+        flight = [
+            ("altitude", rf"angels {NUM}", 1000),
+            ("altitude", rf"cherubs {NUM}", 100),
+            ("altitude", rf"{NUM} (?:feet|foot|ft)", 1),
+            ("altitude", rf"(?:altitude|alt) (?:of |to )?{NUM}", 1),
+            ("speed", rf"{NUM} (?:knots?|kts?|knt)", 1),
+            ("speed", rf"(?:speed|airspeed) (?:of |to )?{NUM}", 1),
+            ("heading", rf"(?:heading|head|turn|steer|fly|come)(?: to| towards?| for)?(?: the)? (?:{NUM}|{compass_re})", 1),
+            ("heading", rf"{NUM} degrees", 1),
+        ]
+        self.flight_patterns = [(param, re.compile(rf"\b{p}\b"), scale) for param, p, scale in flight]
+
+        self.hits = 0
+        self.misses = 0
+        self.action_hits = {}
+        self.total_time = 0.0
+
+    def match(self, text):
+        """
+        Returns an intent dict (or list of intents) for `text`, or None when
+        there is no confident match.
+        """
+        start = time.perf_counter()
+        intent = self._match(normalize_numbers(text)) if text else None
+        self.total_time += time.perf_counter() - start
+
+        if intent:
+            self.hits += 1
+            for i in (intent if isinstance(intent, list) else [intent]):
+                action = i["action"]
+                self.action_hits[action] = self.action_hits.get(action, 0) + 1
+        else:
+            self.misses += 1
+        return intent
+
+    def peek(self, text):
+        """Like match(), without counting towards the hit/miss statistics."""
+        return self._match(normalize_numbers(text)) if text else None
+
+    def _match(self, norm):
+        tokens = norm.split()
+        if REJECT_WORDS.intersection(tokens):
+            return None
+
+        found = {}
+        position = {}
+        spans = []
+        owners = []
+
+        for action, regex in self.action_patterns:
+            m = regex.search(norm)
+            if not m:
+                continue
+            # The same words claimed by two different actions is ambiguous
+            for (begin, end), owner in zip(spans, owners):
+                if owner != action and m.start() < end and begin < m.end():
+                    return None
+            spans.append(m.span())
+            owners.append(action)
+            position[action] = min(position.get(action, m.start()), m.start())
+            params = found.setdefault(action, {})
+            for key, value in m.groupdict().items():
+                if value is None:
+                    continue
+                params[key] = STATE_WORDS[value] if key == "state" else value
+
+        flight = {}
+        for param, regex, scale in self.flight_patterns:
+            m = regex.search(norm)
+            if not m:
+                continue
+            spans.append(m.span())
+            position["set_flight_parameters"] = min(position.get("set_flight_parameters", m.start()), m.start())
+            if param in flight:
+                continue
+            flight[param] = self._value(m, scale)
+        if flight:
+            found["set_flight_parameters"] = flight
+
+        if not found:
+            return None
+        if self._leftover(norm, spans) > self.max_leftover:
+            return None
+
+        intents = [
+            {"aircraft": self.aircraft, "action": action, "parameters": found[action]}
+            for action in sorted(found, key=position.get)
+        ]
+        # More than one action is a compound command, executed by Bridge as one batch
+        return intents[0] if len(intents) == 1 else intents
+
+    def _value(self, m, scale):
+        groups = m.groupdict()
+        if groups.get("c"):
+            for regex, degrees in self.compass_lookup:
+                if regex.match(groups["c"]):
+                    return _number(degrees)
+        return _number(float(groups["v"]) * scale)
+
+    def _leftover(self, norm, spans):
+        """Counts meaningful words that no pattern accounted for."""
+        chars = list(norm)
+        for begin, end in spans:
+            chars[begin:end] = " " * (end - begin)
+        leftover = [
+            w for w in "".join(chars).split()
+            if w.isalnum() and w not in FILLER_WORDS
+        ]
+        return len(leftover)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "avg_us": (self.total_time / total) * 1e6 if total else 0.0,
+            "by_action": dict(self.action_hits),
+        }
+
+    def log_stats(self):
+        s = self.stats()
+        logging.info(
+            f"Fast-path matcher: {s['hits']} hits / {s['misses']} misses "
+            f"({s['hit_rate']:.0%}), avg {s['avg_us']:.1f}us per phrase"
+        )
+
+
+def _number(value):
+    return int(value) if value == int(value) else value
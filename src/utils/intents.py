@@ -0,0 +1,181 @@
+import json
+import math
+import re
+from collections import namedtuple
+
+from src.utils.intent_grammar import FLIGHT_PARAMETERS, parameter_choices, profile_actions
+
+# One validated command. `parameters` is a plain dict the profiles read with
+# .get(); it is built by the validator and never mutated afterwards.
+Intent = namedtuple("Intent", ["aircraft", "action", "parameters"])
+
+# Default (min, max) for numeric flight parameters; a profile may override
+# them with PARAMETER_LIMITS
+FLIGHT_LIMITS = {"heading": (0, 360), "altitude": (0, 20000), "speed": (0, 200)}
+
+_FENCE = re.compile(r"^```(?:json)?\s*(.*?)\s*```$", re.DOTALL)
+
+
+class IntentError(ValueError):
+    """An intent failed validation; nothing of its batch was dispatched."""
+
+
+def _state(value):
+    if value is True or value is False:
+        return int(value)
+    if value in (0, 1) and not isinstance(value, float):
+        return int(value)
+    if value in ("0", "1"):
+        return int(value)
+    raise IntentError(f"state must be 0 or 1, got {value!r}")
+
+
+def _number(name, low, high):
+    def convert(value):
+        if isinstance(value, bool):
+            raise IntentError(f"{name} must be a number, got {value!r}")
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise IntentError(f"{name} must be a number, got {value!r}")
+        if math.isnan(number) or not low <= number <= high:
+            raise IntentError(f"{name} {number:g} is outside {low}..{high}")
+        return int(number) if number.is_integer() else number
+    return convert
+
+
+def _string(name):
+    def convert(value):
+        if not isinstance(value, str):
+            raise IntentError(f"{name} must be a string, got {value!r}")
+        return value.strip().lower()
+    return convert
+
+
+def _compile_action(action, converters):
+    """Returns a function validating one action's parameter dict."""
+    def validate(parameters):
+        if not parameters:
+            if action == "set_flight_parameters":
+                raise IntentError("set_flight_parameters needs heading, altitude or speed")
+            return {}
+        if not isinstance(parameters, dict):
+            raise IntentError(f"parameters of {action} must be an object")
+        out = {}
+        for name, value in parameters.items():
+            if value is None:
+                continue
+            convert = converters.get(name)
+            if convert is None:
+                raise IntentError(f"{action} has no parameter '{name}'")
+            out[name] = convert(value)
+        return out
+    return validate
+
+
+def profile_spec(profile):
+    """
+    The plain-data (JSON-able) description of a profile's intents:
+    {"actions": {action: {parameter: [choices] or None}}, "limits": {...}}.
+    Its COMMANDS and PROCEDURES actions take the parameters named in that
+    action's PHRASES; set_flight_parameters is implied. The choices are the
+    spoken words the matcher knows, not a closed set: the model may answer
+    with others ("north" for a direction), so they are only type checked.
+    """
+    phrases = getattr(profile, "PHRASES", {})
+    return {
+        "actions": {action: parameter_choices(phrases.get(action, [])) for action in profile_actions(profile)},
+        "limits": dict(FLIGHT_LIMITS, **getattr(profile, "PARAMETER_LIMITS", {})),
+    }
+
+
+def compile_spec(spec):
+    """Builds {action: validator} from a profile_spec()."""
+    validators = {}
+    for action, choices in spec["actions"].items():
+        converters = {"state": _state}
+        for name in choices:
+            converters[name] = _string(name)
+        validators[action] = _compile_action(action, converters)
+
+    flight = {name: _number(name, *spec["limits"][name]) for name in FLIGHT_PARAMETERS}
+    validators["set_flight_parameters"] = _compile_action("set_flight_parameters", flight)
+    return validators
+
+
+def compile_profile(profile):
+    """Compiles {action: validator} for a profile module."""
+    return compile_spec(profile_spec(profile))
+
+
+class IntentValidator:
+    """
+    Parses and validates intents exactly once, at the boundary where they
+    enter the system (LLM text, typed JSON, matcher or cache dicts).
+
+    Validators are compiled per aircraft and action from `profiles` (a dict
+    or the lazy ProfileRegistry) the first time an aircraft is seen;
+    precompiled `validators` of a registry profile are used as is. parse() returns a tuple of Intent namedtuples, or raises
+    IntentError for unknown aircraft/actions/parameters or out-of-range
+    values, so a bad batch is rejected before any of it is dispatched.
+    Intent objects are passed through untouched.
+    """
+    def __init__(self, profiles):
+        self.profiles = profiles
+        self.validators = {}
+
+    def _actions(self, aircraft):
+        actions = self.validators.get(aircraft)
+        if actions is None and aircraft in self.profiles:
+            profile = self.profiles[aircraft]
+            actions = getattr(profile, "validators", None) or compile_profile(profile)
+            self.validators[aircraft] = actions
+        return actions
+
+    def parse(self, data):
+        if isinstance(data, Intent):
+            return (data,)
+        if isinstance(data, (str, bytes)):
+            data = self.loads(data)
+        if isinstance(data, dict):
+            return (self._one(data),)
+        if isinstance(data, (list, tuple)):
+            if not data:
+                raise IntentError("empty list of intents")
+            return tuple(d if isinstance(d, Intent) else self._one(d) for d in data)
+        raise IntentError(f"expected an intent object or list, got {type(data).__name__}")
+
+    @staticmethod
+    def loads(text):
+        """json.loads for model output, tolerating a markdown code fence."""
+        if isinstance(text, bytes):
+            text = text.decode("utf-8")
+        text = text.strip()
+        m = _FENCE.match(text)
+        if m:
+            text = m.group(1)
+        try:
+            return json.loads(text)
+        except ValueError as e:
+            raise IntentError(f"not valid JSON: {e}")
+
+    def _one(self, data):
+        if not isinstance(data, dict):
+            raise IntentError(f"expected an intent object, got {type(data).__name__}")
+        aircraft = data.get("aircraft")
+        action = data.get("action")
+        if not aircraft or not action:
+            raise IntentError("missing aircraft or action")
+        actions = self._actions(aircraft) if isinstance(aircraft, str) else None
+        if actions is None:
+            raise IntentError(f"unknown aircraft {aircraft!r}")
+        validate = actions.get(action)
+        if validate is None:
+            raise IntentError(f"unknown action {action!r} for {aircraft}")
+        return Intent(aircraft, action, validate(data.get("parameters")))
+
+
+def to_json(intents):
+    """JSON-ready form: one dict for a single intent, a list for several."""
+    dicts = [{"aircraft": i.aircraft, "action": i.action, "parameters": dict(i.parameters)} for i in intents]
+    return dicts[0] if len(dicts) == 1 else dicts
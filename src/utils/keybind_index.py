@@ -0,0 +1,202 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import namedtuple
+
+KEYBINDS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "keybinds.json")
+
+# Keybind names that encode a quantized flight value, per axis.
+# e.g. "Set 80 knt", "Set 5000 ft", "Head to 200"
+AXIS_PATTERNS = {
+    "speed": re.compile(r"^Set (\d+) knt$"),
+    "altitude": re.compile(r"^Set (\d+) ft$"),
+    "heading": re.compile(r"^Head to (\d+)$"),
+}
+
+# Axes whose values wrap around (355 is 5 away from 0, not 355)
+CIRCULAR_AXES = {"heading": 360}
+
+# Sorted values for one axis with the key sequence (and bind name) of each value
+AxisTable = namedtuple("AxisTable", ["values", "keys", "names"])
+
+
+def build_tables(binds):
+    """Compiles one aircraft's keybinds into {axis: AxisTable}."""
+    collected = {axis: [] for axis in AXIS_PATTERNS}
+    for name, keys in binds.items():
+        for axis, pattern in AXIS_PATTERNS.items():
+            m = pattern.match(name)
+            if m:
+                collected[axis].append((int(m.group(1)), tuple(keys), name))
+                break
+
+    tables = {}
+    for axis, entries in collected.items():
+        entries.sort()
+        tables[axis] = AxisTable(
+            values=tuple(e[0] for e in entries),
+            keys=tuple(e[1] for e in entries),
+            names=tuple(e[2] for e in entries),
+        )
+    return tables
+
+
+def _nearest_linear(values, target):
+    i = bisect_left(values, target)
+    if i == 0:
+        return 0
+    if i == len(values):
+        return i - 1
+    # Ties go to the lower value, like min() over an ascending list
+    return i - 1 if target - values[i - 1] <= values[i] - target else i
+
+
+def _nearest_circular(values, target, period):
+    target = target % period
+    i = bisect_left(values, target)
+    below = (i - 1) % len(values)
+    above = i % len(values)
+
+    def dist(v):
+        d = abs(v - target) % period
+        return min(d, period - d)
+
+    return below if dist(values[below]) <= dist(values[above]) else above
+
+
+class KeybindIndex:
+    """
+    keybinds.json compiled once into per-aircraft, per-axis lookup tables.
+
+    nearest() is a bisect over a sorted tuple (O(log n), no file I/O).
+    The file's mtime is checked at most every `check_interval` seconds and
+    the tables are rebuilt only when it changed; readers always see either
+    the old or the new immutable snapshot.
+
+    With lazy=True nothing is read until the first lookup, and prime() can
+    install an aircraft's precompiled tables (from the profile registry's
+    cache) so the file is only parsed for aircraft that were not primed.
+    """
+    def __init__(self, path, check_interval=1.0, lazy=False):
+        self.path = path
+        self.check_interval = check_interval
+        self.tables = {}
+        self.binds = {}
+        self.mtime = None
+        self.complete = False
+        self.last_check = 0.0
+        self.lock = threading.Lock()
+        if not lazy:
+            self._reload()
+
+    def _reload(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, 'r') as f:
+                full_binds = json.load(f)
+        except Exception as e:
+            logging.error(f"Failed to load keybinds: {e}")
+            return
+
+        binds = {aircraft: dict(b) for aircraft, b in full_binds.items()}
+        tables = {aircraft: build_tables(b) for aircraft, b in binds.items()}
+        # Swap whole snapshots so lookups never see a half-built index
+        self.binds, self.tables, self.mtime = binds, tables, mtime
+        self.complete = True
+        logging.info(f"Keybind index compiled for: {', '.join(tables) or 'none'}")
+
+    def prime(self, aircraft, binds, tables, mtime):
+        """Installs one aircraft's precompiled binds and tables without reading the file."""
+        with self.lock:
+            if self.complete or aircraft in self.tables:
+                return
+            self.binds = dict(self.binds, **{aircraft: binds})
+            self.tables = dict(self.tables, **{aircraft: tables})
+            self.mtime = mtime
+            self.last_check = time.monotonic()
+
+    def _ensure(self, aircraft):
+        if self.complete or aircraft in self.tables:
+            return
+        with self.lock:
+            if not self.complete and aircraft not in self.tables:
+                self._reload()
+                self.last_check = time.monotonic()
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self.last_check < self.check_interval:
+            return
+        with self.lock:
+            if now - self.last_check < self.check_interval:
+                return
+            self.last_check = now
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                return
+            if mtime != self.mtime:
+                logging.info("keybinds.json changed on disk. Recompiling index...")
+                self._reload()
+
+    def get(self, aircraft, name):
+        """Returns the key list for a named bind, or None."""
+        self._ensure(aircraft)
+        self._maybe_reload()
+        return self.binds.get(aircraft, {}).get(name)
+
+    def nearest(self, aircraft, axis, value):
+        """
+        Returns (quantized_value, keys, bind_name) for the closest available
+        setting on `axis`, or None if the aircraft has no binds for it.
+        """
+        self._ensure(aircraft)
+        self._maybe_reload()
+        table = self.tables.get(aircraft, {}).get(axis)
+        if not table or not table.values:
+            return None
+
+        period = CIRCULAR_AXES.get(axis)
+        if period:
+            i = _nearest_circular(table.values, value, period)
+        else:
+            i = _nearest_linear(table.values, value)
+        return table.values[i], list(table.keys[i]), table.names[i]
+
+    def binds_for(self, aircraft):
+        """Returns {bind name: keys} for an aircraft ({} if it has none)."""
+        self._ensure(aircraft)
+        self._maybe_reload()
+        return self.binds.get(aircraft, {})
+
+
+# src/keybinds.json, shared by every profile and parsed on first use
+KEYBINDS = KeybindIndex(KEYBINDS_PATH, lazy=True)
+
+
+def flight_commands(index, aircraft, parameters):
+    """
+    Returns one keyboard command per flight axis present in `parameters`,
+    in speed, altitude, heading order, from the aircraft's keybinds.
+    """
+    commands = []
+    for axis in ("speed", "altitude", "heading"):
+        value = parameters.get(axis)
+        if value is None or (axis != "heading" and not value):
+            continue
+
+        found = index.nearest(aircraft, axis, value)
+        if not found:
+            continue
+
+        target, keys, action_name = found
+        logging.info(f"Target {axis.capitalize()}: {value} -> Quantized: {target} ({action_name})")
+        if keys:
+            commands.append({"type": "keyboard", "keys": keys})
+        else:
+            commands.append({"type": "keyboard", "keys": [], "log": f"Missing keybind for {action_name}"})
+    return commands
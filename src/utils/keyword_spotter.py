@@ -0,0 +1,288 @@
+import glob
+import logging
+import os
+import re
+import time
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+WIN = 400          # 25ms analysis window
+HOP = 160          # 10ms hop
+N_FFT = 512
+N_MELS = 26
+N_CEPS = 13
+PITCH_RANGE = (70, 400)  # Hz, voiced speech
+_TRAILING_INDEX = re.compile(r"[_-]?\d+$")
+
+
+def _mel_filterbank(n_mels=N_MELS, n_fft=N_FFT, rate=SAMPLE_RATE, low=60.0, high=7600.0):
+    def to_mel(f):
+        return 2595.0 * np.log10(1.0 + f / 700.0)
+
+    def to_hz(m):
+        return 700.0 * (10 ** (m / 2595.0) - 1.0)
+
+    edges = to_hz(np.linspace(to_mel(low), to_mel(high), n_mels + 2))
+    bins = np.floor((n_fft + 1) * edges / rate).astype(int)
+    bank = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for i in range(n_mels):
+        left, center, right = bins[i], bins[i + 1], bins[i + 2]
+        if center > left:
+            bank[i, left:center] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            bank[i, center:right] = (right - np.arange(center, right)) / (right - center)
+    return bank
+
+
+def _dct_matrix(n_in=N_MELS, n_out=N_CEPS):
+    n = np.arange(n_in)
+    return np.cos(np.pi / n_in * (n + 0.5)[None, :] * np.arange(n_out)[:, None]).astype(np.float32)
+
+
+_WINDOW = np.hanning(WIN).astype(np.float32)
+_MEL = _mel_filterbank()
+# c0 (overall loudness) is dropped so matching ignores the speaking level
+_DCT = _dct_matrix()[1:]
+
+
+def _frames(samples, win, hop):
+    samples = np.asarray(samples, dtype=np.float32)
+    if len(samples) < win:
+        return np.empty((0, win), dtype=np.float32)
+    count = 1 + (len(samples) - win) // hop
+    return np.lib.stride_tricks.as_strided(
+        samples, shape=(count, win), strides=(samples.strides[0] * hop, samples.strides[0])
+    )
+
+
+def cepstra(samples):
+    """
+    MFCCs (c1..c12) of int16 or float audio, one row per 10ms. No mean
+    normalization: templates come from the same microphone, and a mean
+    over a whole segment would be skewed by the words after the keyword.
+    """
+    frames = _frames(samples, WIN, HOP) * _WINDOW
+    if not len(frames):
+        return np.empty((0, len(_DCT)), dtype=np.float32)
+    power = np.abs(np.fft.rfft(frames, N_FFT)) ** 2
+    logmel = np.log(power @ _MEL.T + 1e-3)
+    ceps = logmel @ _DCT.T
+    return ceps
+
+
+def voiced_ratio(samples, frame=480, threshold=0.45):
+    """
+    Fraction of 30ms frames with a clear pitch period (normalized
+    autocorrelation peak in the speech pitch range). Broadband rotor
+    noise, wind and clicks score near 0, speech well above.
+    """
+    frames = _frames(samples, frame, frame)
+    if not len(frames):
+        return 0.0
+    frames = frames - frames.mean(axis=1, keepdims=True)
+    spectrum = np.fft.rfft(frames, 2 * frame)
+    ac = np.fft.irfft(spectrum.real ** 2 + spectrum.imag ** 2)[:, :frame]
+    energy = ac[:, 0] + 1e-9
+    low, high = SAMPLE_RATE // PITCH_RANGE[1], SAMPLE_RATE // PITCH_RANGE[0]
+    peaks = ac[:, low:high].max(axis=1) / energy
+    return float(np.mean(peaks > threshold))
+
+
+def match(template, features):
+    """
+    Subsequence DTW: the best alignment of the whole `template` with any
+    stretch of `features`, with local slopes between 1/2 and 2 (steps
+    (1,1), (1,2) and (2,1)) so a template cannot collapse onto a frame.
+    Returns (mean frame distance, end frame). Each template frame is one
+    vectorized row update.
+    """
+    m, n = len(template), len(features)
+    if not m or n < m // 2:
+        return np.inf, 0
+    cost = np.sqrt(((template[:, None, :] - features[None, :, :]) ** 2).sum(axis=2))
+    prev2, prev = None, cost[0]
+    for i in range(1, m):
+        best = np.full(n, np.inf)
+        best[1:] = prev[:-1]
+        best[2:] = np.minimum(best[2:], prev[:-2])
+        # (2,1): template frames i-1 and i both on feature frame j
+        if prev2 is None:
+            pair = cost[i - 1].copy()
+        else:
+            pair = np.full(n, np.inf)
+            pair[1:] = prev2[:-1] + cost[i - 1, 1:]
+        acc = cost[i] + np.minimum(best, pair)
+        prev2, prev = prev, acc
+    end = int(np.argmin(prev))
+    return float(prev[end] / m), end
+
+
+class KeywordSpotter:
+    """
+    Cheap gate in front of Whisper for always-on listening.
+
+    A captured segment must (1) last at least `min_ms`, (2) be voiced for
+    at least `min_voiced` of its frames (drops rotor noise, clicks and
+    other energy bursts), and (3) when templates are enrolled, start with
+    one of them within its first `search_s`: a wake word like "handler" or
+    command verbs, recorded by the pilot in the cockpit (same microphone
+    and background noise as in flight; see 'enroll'). Templates are matched with
+    subsequence DTW on MFCCs, a few milliseconds per segment instead of a
+    full decode. `threshold` None derives one from the spread between
+    recordings of the same word.
+    """
+    def __init__(self, templates=None, threshold=None, min_voiced=0.25, min_ms=250, search_s=1.5,
+                 wake_word=None, folder=None):
+        self.templates = {}  # label -> [cepstra]
+        self.threshold = threshold
+        self.min_voiced = min_voiced
+        self.min_ms = min_ms
+        self.search_s = search_s
+        self.wake_word = wake_word
+        self.folder = folder
+        self.counts = {"segments": 0, "passed": 0, "too_short": 0, "unvoiced": 0, "no_keyword": 0}
+        self.audio_s = 0.0
+        self.cpu_s = 0.0
+        self.last = None
+        for label, samples in (templates or {}).items():
+            for s in samples:
+                self.templates.setdefault(label, []).append(cepstra(self._trim(np.asarray(s))))
+        self.auto_threshold = self._derive_threshold()
+
+    @classmethod
+    def from_config(cls, k_config, root=None):
+        folder = k_config.get('templates')
+        if folder and not os.path.isabs(folder) and root:
+            folder = os.path.join(root, folder)
+        spotter = cls(
+            threshold=k_config.get('threshold'),
+            min_voiced=k_config.get('min_voiced', 0.25),
+            min_ms=k_config.get('min_ms', 250),
+            search_s=k_config.get('search_s', 1.5),
+            wake_word=k_config.get('wake_word'),
+            folder=folder,
+        )
+        if folder and os.path.isdir(folder):
+            spotter.load(folder)
+        if not spotter.templates:
+            logging.warning("Keyword spotter has no templates; gating on voicing only. Use 'enroll <word>'.")
+        return spotter
+
+    def configure(self, k_config):
+        self.threshold = k_config.get('threshold')
+        self.min_voiced = k_config.get('min_voiced', self.min_voiced)
+        self.min_ms = k_config.get('min_ms', self.min_ms)
+        self.search_s = k_config.get('search_s', self.search_s)
+
+    def load(self, folder):
+        """Loads every 16kHz mono WAV in `folder`; "handler_2.wav" is a template for "handler"."""
+        for path in sorted(glob.glob(os.path.join(folder, "*.wav"))):
+            label = _TRAILING_INDEX.sub("", os.path.splitext(os.path.basename(path))[0]).lower()
+            try:
+                with wave.open(path, 'rb') as w:
+                    samples = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+                self.templates.setdefault(label, []).append(cepstra(self._trim(samples)))
+            except Exception as e:
+                logging.error(f"Could not load keyword template {path}: {e}")
+        self.auto_threshold = self._derive_threshold()
+        logging.info(f"Keyword spotter: {sum(len(t) for t in self.templates.values())} template(s) "
+                     f"for {', '.join(sorted(self.templates)) or 'nothing'}")
+
+    def enroll(self, samples, label, save=True):
+        """Adds a recording of `label` (int16 16kHz); saved to the templates folder when set."""
+        samples = self._trim(np.asarray(samples, dtype=np.int16))
+        label = label.lower()
+        self.templates.setdefault(label, []).append(cepstra(samples))
+        self.auto_threshold = self._derive_threshold()
+        if save and self.folder:
+            os.makedirs(self.folder, exist_ok=True)
+            path = os.path.join(self.folder, f"{label}_{len(self.templates[label])}.wav")
+            with wave.open(path, 'wb') as w:
+                w.setnchannels(1)
+                w.setsampwidth(2)
+                w.setframerate(SAMPLE_RATE)
+                w.writeframes(samples.tobytes())
+            return path
+        return None
+
+    @staticmethod
+    def _trim(samples, frame=160, margin_db=15.0):
+        """Cuts leading/trailing near-silence so templates are just the word."""
+        frames = _frames(samples, frame, frame).astype(np.float32)
+        if not len(frames):
+            return samples
+        db = 10 * np.log10((frames ** 2).mean(axis=1) + 1e-3)
+        loud = np.nonzero(db > db.max() - margin_db)[0]
+        return samples[loud[0] * frame:(loud[-1] + 1) * frame]
+
+    def _derive_threshold(self):
+        """Midway above the typical distance between recordings of the same word."""
+        spreads = []
+        for feats in self.templates.values():
+            for i, a in enumerate(feats):
+                for b in feats[i + 1:]:
+                    spreads.append(match(a, b)[0])
+        return float(np.median(spreads)) * 1.5 if spreads else None
+
+    def check(self, samples):
+        """
+        Returns (passed, label): label is the matched template, None when
+        the segment passed on voicing alone. Updates the counters.
+        """
+        start_cpu = time.thread_time()
+        self.counts["segments"] += 1
+        self.audio_s += len(samples) / SAMPLE_RATE
+        verdict, label, score = self._check(samples)
+        self.counts[verdict] += 1
+        self.cpu_s += time.thread_time() - start_cpu
+        self.last = {"verdict": verdict, "label": label, "score": score}
+        return verdict == "passed", label
+
+    def _check(self, samples):
+        if len(samples) * 1000 < self.min_ms * SAMPLE_RATE:
+            return "too_short", None, None
+        head = samples[:int(self.search_s * SAMPLE_RATE) + SAMPLE_RATE]
+        if voiced_ratio(head) < self.min_voiced:
+            return "unvoiced", None, None
+        if not self.templates:
+            return "passed", None, None
+
+        threshold = self.threshold or self.auto_threshold or 12.0
+        feats = cepstra(head)
+        best_label, best = None, np.inf
+        for label, templates in self.templates.items():
+            for template in templates:
+                # The keyword must start within search_s; matching stops there
+                window = feats[:int(self.search_s * 100) + len(template)]
+                score, _ = match(template, window)
+                if score < best:
+                    best_label, best = label, score
+        if best <= threshold:
+            return "passed", best_label, best
+        return "no_keyword", best_label, best
+
+    def strip_wake_word(self, text):
+        """Drops a leading wake word ("Handler, master arm on") from a transcript."""
+        if not text or not self.wake_word:
+            return text
+        return re.sub(rf"^\W*{re.escape(self.wake_word)}\b\W*", "", text, flags=re.IGNORECASE) or text
+
+    def stats(self):
+        return dict(
+            self.counts,
+            audio_s=self.audio_s,
+            cpu_ms_per_segment=self.cpu_s * 1000 / max(1, self.counts["segments"]),
+            # Share of one core spent spotting per second of gated audio
+            cpu_load=self.cpu_s / self.audio_s if self.audio_s else 0.0,
+        )
+
+    def log_stats(self):
+        s = self.stats()
+        if s["segments"]:
+            logging.info(
+                f"Keyword spotter: {s['passed']}/{s['segments']} segment(s) passed "
+                f"({s['unvoiced']} unvoiced, {s['no_keyword']} without keyword, {s['too_short']} too short), "
+                f"{s['cpu_ms_per_segment']:.1f}ms CPU per segment"
+            )
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils.intent_grammar import build_intent_grammar
+from src.utils.llm_client import GeminiClient
+
+
+class LlamaCppBackend:
+    """
+    Local CPU inference with a quantized GGUF model through llama-cpp-python.
+
+    The model is loaded once by warm() (in a worker thread) and kept
+    resident. Output is constrained by a GBNF grammar generated from the
+    aircraft profile, so every answer parses as an intent of the Brain's
+    JSON schema. The system prompt is the same for every request, so
+    llama.cpp reuses its evaluated prefix and only the utterance has to be
+    processed per command.
+
+    Generation runs on one dedicated thread (a llama context is not
+    thread-safe); a cancelled request stops waiting but the running
+    completion finishes in the background. Duplicated (hedged) requests
+    would only queue behind each other, so `hedgeable` is False.
+    """
+    name = "llama_cpp"
+    hedgeable = False
+
+    def __init__(self, model_path, system_instruction, profile, n_ctx=2048, n_threads=None,
+                 max_tokens=128):
+        self.model_path = model_path
+        self.system_instruction = system_instruction
+        self.grammar_text = build_intent_grammar(profile)
+        self.n_ctx = n_ctx
+        self.n_threads = n_threads or max(1, (os.cpu_count() or 2) // 2)
+        self.max_tokens = max_tokens
+        self.model = None
+        self.grammar = None
+        self.load_ms = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llama-cpp")
+
+    def _load(self):
+        if self.model is not None:
+            return
+        from llama_cpp import Llama, LlamaGrammar
+        start = time.perf_counter()
+        logging.info(f"Loading local LLM {self.model_path} ({self.n_threads} threads)...")
+        self.model = Llama(
+            model_path=self.model_path,
+            n_ctx=self.n_ctx,
+            n_threads=self.n_threads,
+            verbose=False,
+        )
+        self.grammar = LlamaGrammar.from_string(self.grammar_text, verbose=False)
+        # Evaluates the system prompt once so the first command reuses it
+        self._complete("master arm on")
+        self.load_ms = (time.perf_counter() - start) * 1000
+        logging.info(f"Local LLM warm ({self.load_ms:.0f}ms).")
+
+    def _complete(self, text):
+        response = self.model.create_chat_completion(
+            messages=[
+                {"role": "system", "content": self.system_instruction},
+                {"role": "user", "content": text},
+            ],
+            grammar=self.grammar,
+            temperature=0.0,
+            max_tokens=self.max_tokens,
+        )
+        return response["choices"][0]["message"]["content"]
+
+    async def warm(self):
+        await asyncio.get_running_loop().run_in_executor(self.executor, self._load)
+
+    async def generate(self, text):
+        """Returns the model's JSON answer for `text`."""
+        loop = asyncio.get_running_loop()
+        if self.model is None:
+            await loop.run_in_executor(self.executor, self._load)
+        return await loop.run_in_executor(self.executor, self._complete, text)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+def create_backend(b_config, system_instruction, profile, api_key=None):
+    """
+    Builds the LLM backend named by brain.backend ("gemini" or "llama_cpp").
+    Returns None when the backend is not usable (no API key, no model file).
+    """
+    name = b_config.get('backend', 'gemini')
+
+    if name == 'llama_cpp':
+        l_config = b_config.get('llama_cpp', {})
+        model_path = l_config.get('model_path')
+        if not model_path or not os.path.exists(model_path):
+            logging.error(f"Local LLM model not found: {model_path}. Set brain.llama_cpp.model_path.")
+            return None
+        try:
+            import llama_cpp  # noqa: F401
+        except ImportError:
+            logging.error("llama-cpp-python not installed. Please pip install llama-cpp-python.")
+            return None
+        return LlamaCppBackend(
+            model_path,
+            system_instruction,
+            profile,
+            n_ctx=l_config.get('n_ctx', 2048),
+            n_threads=l_config.get('n_threads'),
+            max_tokens=l_config.get('max_tokens', 128),
+        )
+
+    if name == 'gemini':
+        endpoint = b_config.get('endpoint')
+        if not endpoint and (not api_key or "YOUR_API_KEY" in api_key):
+            logging.error("No valid Gemini API Key found in env GEMINI_API_KEY or config.json")
+            return None
+        return GeminiClient(
+            api_key or "stub",
+            b_config.get('model', 'gemini-2.0-flash-exp'),
+            system_instruction,
+            endpoint=endpoint,
+            max_connections=b_config.get('max_connections', 4),
+        )
+
+    logging.error(f"Unknown brain backend: {name}")
+    return None
@@ -0,0 +1,68 @@
+import httpx
+
+GEMINI_ENDPOINT = "https://generativelanguage.googleapis.com"
+
+
+class LlmError(Exception):
+    """The model endpoint answered with an error or an unusable response."""
+
+
+class GeminiClient:
+    """
+    Gemini generateContent over the REST API, on an httpx client whose
+    keep-alive connections are reused so steady-state requests skip the
+    TCP/TLS handshake. At most `max_connections` requests are in flight at
+    once; a cancelled request (lost hedge, superseded prefetch) drops its
+    connection.
+
+    `endpoint` defaults to Google's API; point it at a StubLlmServer
+    (src/utils/llm_stub.py) to run and benchmark offline.
+    """
+    name = "gemini"
+    hedgeable = True
+
+    def __init__(self, api_key, model, system_instruction, endpoint=None, max_connections=4,
+                 connect_timeout=3.0):
+        self.api_key = api_key
+        self.model = model
+        self.system_instruction = system_instruction
+        # Deadlines are enforced by the Brain; only connecting gets its own limit
+        self.client = httpx.AsyncClient(
+            base_url=endpoint or GEMINI_ENDPOINT,
+            headers={"x-goog-api-key": api_key},
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(None, connect=connect_timeout),
+            follow_redirects=True,
+        )
+
+    async def warm(self):
+        """Opens a pooled connection (model metadata lookup) so the first request skips the handshake."""
+        await self.client.get(f"/v1beta/models/{self.model}")
+
+    async def generate(self, text):
+        """Returns the model's text answer for `text`."""
+        payload = {
+            "systemInstruction": {"parts": [{"text": self.system_instruction}]},
+            "contents": [{"role": "user", "parts": [{"text": text}]}],
+            "generationConfig": {"responseMimeType": "application/json"},
+        }
+        try:
+            response = await self.client.post(f"/v1beta/models/{self.model}:generateContent", json=payload)
+        except httpx.HTTPError as e:
+            raise LlmError(f"Model endpoint unreachable: {e}") from e
+        status = response.status_code
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        if status != 200:
+            message = (body or {}).get("error", {}).get("message", "") if isinstance(body, dict) else ""
+            raise LlmError(f"HTTP {status} from model endpoint {message}".strip())
+        try:
+            parts = body["candidates"][0]["content"]["parts"]
+            return "".join(part.get("text", "") for part in parts)
+        except (KeyError, IndexError, TypeError):
+            raise LlmError("Model response had no candidates")
+
+    async def close(self):
+        await self.client.aclose()
@@ -0,0 +1,113 @@
+import json
+import logging
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.utils.intent_matcher import IntentMatcher
+
+
+class StubLlmServer:
+    """
+    Local stand-in for the Gemini generateContent endpoint, for running and
+    benchmarking the Brain offline.
+
+    Answers every POST with a Gemini-shaped response whose text is the
+    intent the local matcher (with a generous leftover allowance) finds for
+    the prompt, or {} when it finds none. Latency is `latency` seconds plus
+    exponential jitter with mean `jitter`; with probability `slow_rate` a
+    request takes `slow_latency` instead, to produce the long tail that
+    deadlines and hedging are for.
+    """
+    def __init__(self, port=0, latency=0.3, jitter=0.05, slow_rate=0.0, slow_latency=5.0,
+                 error_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.matcher = IntentMatcher(max_leftover=4)
+        self.requests = 0
+        self.slow = 0
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+            def setup(self):
+                super().setup()
+                # Headers and body go out in separate writes; don't let Nagle hold the body
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                status, body = stub._answer(request)
+                data = json.dumps(body).encode("utf-8")
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client cancelled (lost hedge or superseded utterance)
+                    self.close_connection = True
+
+            def do_GET(self):
+                # Model metadata, which GeminiClient.warm() asks for
+                data = json.dumps({"name": self.path.rsplit("/", 1)[-1]}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, name="llm-stub", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        logging.info(f"Stub LLM endpoint at {self.url}")
+        return self
+
+    def _answer(self, request):
+        with self.random_lock:
+            self.requests += 1
+            slow = self.random.random() < self.slow_rate
+            error = self.random.random() < self.error_rate
+            if slow:
+                delay = self.slow_latency
+            else:
+                delay = self.latency + (self.random.expovariate(1 / self.jitter) if self.jitter else 0.0)
+            self.slow += slow
+        time.sleep(delay)
+        if error:
+            return 503, {"error": {"code": 503, "message": "The model is overloaded."}}
+
+        try:
+            text = request["contents"][-1]["parts"][0]["text"]
+        except (KeyError, IndexError, TypeError):
+            return 400, {"error": {"code": 400, "message": "Missing contents."}}
+        intent = self.matcher.match(text) or {}
+        return 200, {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": json.dumps(intent)}]},
+                "finishReason": "STOP",
+            }]
+        }
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,258 @@
+import logging
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+
+from src.utils.scheduler import Scheduler
+
+# One compiled step. kind: "bios" (payload: tuple of commands sent as one
+# batch), "keys" (tuple of key names), "wait" or "wait_for" ((control, value)).
+# delay: seconds after the previous step finished; condition: (control, value)
+# the cockpit must show for the step to run; timeout: for wait_for.
+Step = namedtuple("Step", ["kind", "payload", "delay", "condition", "timeout"])
+
+POLL_INTERVAL = 0.01  # wait_for checks the export stream state every 10ms
+
+
+def _control_value(text):
+    parts = str(text).split()
+    if len(parts) != 2 or not parts[1].isdigit():
+        raise ValueError(f"expected 'CONTROL value', got {text!r}")
+    return parts[0], int(parts[1])
+
+
+def compile_procedure(profile, steps):
+    """
+    Compiles a PROCEDURES entry of a profile into a tuple of Steps: actions
+    are expanded through the profile's get_commands, "bind" names resolved
+    through its keybinds, and back-to-back BIOS commands merged into one
+    batch (one datagram). Raises ValueError for a step it cannot resolve.
+    """
+    compiled = []
+    for spec in steps:
+        delay = float(spec.get("delay", 0.0))
+        condition = _control_value(spec["if"]) if "if" in spec else None
+        if "action" in spec:
+            commands = profile.get_commands(spec["action"], spec.get("parameters", {}))
+            if not commands:
+                raise ValueError(f"action {spec['action']!r} maps to no command")
+            for i, command in enumerate(commands):
+                first_delay = delay if i == 0 else 0.0
+                if isinstance(command, str):
+                    compiled.append(Step("bios", (command,), first_delay, condition, None))
+                elif isinstance(command, dict) and command.get("keys"):
+                    compiled.append(Step("keys", tuple(command["keys"]), first_delay, condition, None))
+                else:
+                    raise ValueError(f"action {spec['action']!r}: {command.get('log', command)!r}")
+        elif "bios" in spec:
+            _control_value(spec["bios"])
+            compiled.append(Step("bios", (spec["bios"],), delay, condition, None))
+        elif "keys" in spec:
+            compiled.append(Step("keys", tuple(spec["keys"]), delay, condition, None))
+        elif "bind" in spec:
+            keys = profile.KEYBINDS.get(profile.AIRCRAFT, spec["bind"])
+            if not keys:
+                raise ValueError(f"no keybind {spec['bind']!r}")
+            compiled.append(Step("keys", tuple(keys), delay, condition, None))
+        elif "wait" in spec:
+            compiled.append(Step("wait", None, delay + float(spec["wait"]), condition, None))
+        elif "wait_for" in spec:
+            compiled.append(Step("wait_for", _control_value(spec["wait_for"]), delay, condition,
+                                 float(spec.get("timeout", 2.0))))
+        else:
+            raise ValueError(f"unknown step {spec!r}")
+
+    merged = []
+    for step in compiled:
+        prev = merged[-1] if merged else None
+        if (prev and prev.kind == step.kind == "bios" and not step.delay
+                and step.condition == prev.condition):
+            merged[-1] = prev._replace(payload=prev.payload + step.payload)
+        else:
+            merged.append(step)
+    return tuple(merged)
+
+
+def compile_procedures(profile):
+    """{name: steps} for every PROCEDURES entry; broken ones are logged and left out."""
+    procedures = {}
+    for name, steps in getattr(profile, "PROCEDURES", {}).items():
+        try:
+            procedures[name] = compile_procedure(profile, steps)
+        except (ValueError, KeyError, TypeError) as e:
+            logging.error(f"Procedure {name} of {profile.AIRCRAFT} not compiled: {e}")
+    return procedures
+
+
+def _combo_outcome(future):
+    if future.exception() is not None:
+        return False, str(future.exception())
+    return (True, None) if future.result() else (False, "combo not sent")
+
+
+class ProcedureRun:
+    """One running procedure. `future` resolves to its report once it ends."""
+    def __init__(self, name, aircraft, steps):
+        self.name = name
+        self.aircraft = aircraft
+        self.steps = steps
+        self.future = Future()
+        self.timings = []
+        self.started = time.monotonic()
+        self.cancelled = False
+        self.finished = False
+
+    def report(self, error=None):
+        done = [t for t in self.timings if t["ok"]]
+        return {
+            "procedure": self.name,
+            "aircraft": self.aircraft,
+            "ok": error is None and not self.cancelled and len(self.timings) == len(self.steps),
+            "cancelled": self.cancelled,
+            "error": error,
+            "steps": list(self.timings),
+            "completed": len(done),
+            "elapsed_ms": (time.monotonic() - self.started) * 1000,
+            # How late steps started against their due time (scheduler overhead)
+            "max_lateness_ms": max((t["lateness_ms"] for t in self.timings), default=0.0),
+        }
+
+
+class ProcedureRunner:
+    """
+    Runs compiled procedures on a scheduler thread, so Bridge returns at
+    once and steps interleave with other commands.
+
+    A step starts `delay` seconds after the previous one finished: a BIOS
+    batch when it is sent (or, for acknowledged sends, confirmed by the
+    export stream), a key combo when its keys are released, a wait_for
+    when the cockpit shows the value. Nothing sleeps for a fixed time, so a
+    procedure runs as fast as DCS accepts it. cancel_all() stops every
+    running procedure before its next step; a combo being held is still
+    released. Each step's lateness and duration go into the run's report.
+
+    `send_bios(commands)` returns the ack futures to wait for (possibly
+    none); `press(keys)` returns the combo's Future.
+    """
+    def __init__(self, send_bios, press, cockpit=None):
+        self.send_bios = send_bios
+        self.press = press
+        self.cockpit = cockpit
+        self.scheduler = Scheduler("procedure-scheduler")
+        self.active = set()
+        self.lock = threading.Lock()
+
+    def start(self, name, aircraft, steps):
+        run = ProcedureRun(name, aircraft, steps)
+        with self.lock:
+            self.active.add(run)
+        logging.info(f"Procedure {name}: starting ({len(steps)} steps)")
+        self._next(run, 0, time.monotonic())
+        return run
+
+    def cancel_all(self):
+        """Cancels every running procedure; returns how many were running."""
+        with self.lock:
+            runs = list(self.active)
+        for run in runs:
+            run.cancelled = True
+            self._finish(run)
+        return len(runs)
+
+    def _next(self, run, index, after):
+        if run.finished:
+            return
+        if index == len(run.steps):
+            self._finish(run)
+            return
+        due = after + run.steps[index].delay
+        self.scheduler.schedule(due, lambda: self._run_step(run, index, due))
+
+    def _run_step(self, run, index, due):
+        if run.finished:
+            return
+        step = run.steps[index]
+        started = time.monotonic()
+        timing = {"step": index, "kind": step.kind, "payload": step.payload,
+                  "lateness_ms": (started - due) * 1000}
+
+        def done(ok=True, error=None, skipped=False):
+            timing.update(ok=ok, error=error, skipped=skipped, ms=(time.monotonic() - started) * 1000)
+            run.timings.append(timing)
+            if ok:
+                self._next(run, index + 1, time.monotonic())
+            else:
+                self._finish(run, f"step {index + 1} ({step.kind}): {error}")
+
+        try:
+            if step.condition and self.cockpit and self.cockpit.get(step.condition[0]) != step.condition[1]:
+                done(skipped=True)
+            elif step.kind == "wait":
+                done()
+            elif step.kind == "bios":
+                futures = self.send_bios(list(step.payload))
+                self._when_all(futures, lambda ok: done(ok, None if ok else "not confirmed by the cockpit"))
+            elif step.kind == "keys":
+                future = self.press(list(step.payload))
+                future.add_done_callback(lambda f: done(*_combo_outcome(f)))
+            elif step.kind == "wait_for":
+                self._wait_for(run, step, started + step.timeout, done)
+        except Exception as e:
+            done(False, str(e))
+
+    def _when_all(self, futures, callback):
+        if not futures:
+            callback(True)
+            return
+        remaining = [len(futures)]
+        results = []
+        lock = threading.Lock()
+
+        def one_done(f):
+            with lock:
+                results.append(bool(f.result()))
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                callback(all(results))
+        for f in futures:
+            f.add_done_callback(one_done)
+
+    def _wait_for(self, run, step, deadline, done):
+        if self.cockpit is None:
+            # Nothing to check against; go on rather than stall the procedure
+            done(skipped=True)
+            return
+        control, value = step.payload
+
+        def poll():
+            if run.finished:
+                return
+            if self.cockpit.get(control) == value:
+                done()
+            elif time.monotonic() >= deadline:
+                done(False, f"{control} did not reach {value} within {step.timeout:g}s")
+            else:
+                self.scheduler.schedule(time.monotonic() + POLL_INTERVAL, poll)
+        poll()
+
+    def _finish(self, run, error=None):
+        with self.lock:
+            if run.finished:
+                return
+            run.finished = True
+            self.active.discard(run)
+        report = run.report(error)
+        if report["cancelled"]:
+            logging.info(f"Procedure {run.name}: cancelled after {report['completed']}/{len(run.steps)} steps")
+        elif error:
+            logging.error(f"Procedure {run.name}: failed at {error}")
+        else:
+            logging.info(f"Procedure {run.name}: {len(run.steps)} steps in {report['elapsed_ms']:.0f}ms "
+                         f"(max step lateness {report['max_lateness_ms']:.1f}ms)")
+        run.future.set_result(report)
+
+    def close(self):
+        self.cancel_all()
+        self.scheduler.close()
@@ -0,0 +1,259 @@
+import glob
+import hashlib
+import importlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from src.utils.intents import compile_spec, profile_spec
+from src.utils.keybind_index import KEYBINDS, AxisTable, build_tables, flight_commands
+from src.utils.procedures import compile_procedures
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILES_DIR = os.path.join(SRC_DIR, "profiles")
+CACHE_DIR = os.path.join(os.path.dirname(SRC_DIR), "profile_cache")
+
+DEFAULT_AIRCRAFT = "OH-58D"
+
+# Bump when the artifact layout or what gets compiled changes
+COMPILER_VERSION = 2
+
+# Code whose output the artifact bakes in (validator spec, flight limits,
+# parameter choices, keybind tables); editing any of it invalidates the cache
+_COMPILER_SOURCES = tuple(
+    os.path.join(SRC_DIR, "utils", name)
+    for name in ("intents.py", "intent_grammar.py", "keybind_index.py", "profile_registry.py")
+)
+
+# Read from the module source, so discovery never imports a profile
+_AIRCRAFT_LINE = re.compile(r"""^AIRCRAFT\s*=\s*["']([^"']+)["']""", re.MULTILINE)
+
+
+class CompiledProfile:
+    """
+    One aircraft, loaded on first use: its profile module (if it has one)
+    plus the dispatch tables compiled from it and from its keybinds.json
+    section. Exposes the profile module interface (AIRCRAFT, COMMANDS,
+    PHRASES, PARAMETER_LIMITS, PROCEDURES, KEYBINDS, get_commands,
+    get_command), so the matcher, vocabulary, grammar and Bridge use it
+    like the module, plus `validators` for IntentValidator and
+    `procedures` (compiled steps) for Bridge's procedure engine.
+
+    An aircraft with keybinds but no module is keyboard only: it accepts
+    set_flight_parameters, mapped through its keybinds.
+    """
+    def __init__(self, aircraft, module, spec, keybinds, source, load_ms):
+        self.AIRCRAFT = aircraft
+        self.module = module
+        self.COMMANDS = getattr(module, "COMMANDS", {})
+        self.PHRASES = getattr(module, "PHRASES", {})
+        self.PARAMETER_LIMITS = getattr(module, "PARAMETER_LIMITS", {})
+        self.PROCEDURES = getattr(module, "PROCEDURES", {})
+        self.KEYBINDS = getattr(module, "KEYBINDS", keybinds)
+        self.validators = compile_spec(spec)
+        # Expanded through get_commands and the keybinds primed just before
+        self.procedures = compile_procedures(self)
+        self.source = source  # "cache" or "compiled"
+        self.load_ms = load_ms
+
+    def get_commands(self, action, parameters):
+        if self.module is None:
+            if action == "set_flight_parameters":
+                return flight_commands(self.KEYBINDS, self.AIRCRAFT, parameters)
+            return []
+        if hasattr(self.module, "get_commands"):
+            return self.module.get_commands(action, parameters)
+        command = self.module.get_command(action, parameters)
+        return [command] if command else []
+
+    def get_command(self, action, parameters):
+        commands = self.get_commands(action, parameters)
+        return commands[0] if commands else None
+
+    def __repr__(self):
+        return f"<CompiledProfile {self.AIRCRAFT} ({self.source}, {self.load_ms:.1f}ms)>"
+
+
+class ProfileRegistry:
+    """
+    Aircraft profiles discovered from `profiles_dir` (modules defining
+    AIRCRAFT) and from the sections of keybinds.json, behaving like a
+    read-only {aircraft: profile} dict.
+
+    Discovery only reads module sources; a profile is imported and
+    compiled the first time it is looked up. Its compiled artifact
+    (validator spec and keybind tables) is kept in `cache_dir` as JSON,
+    keyed by a hash of the module source, keybinds.json and the compiler
+    code, so later sessions skip compiling and, when every looked-up
+    aircraft is cached, never parse keybinds.json. Editing any of them
+    invalidates the entry.
+    """
+    def __init__(self, profiles_dir=PROFILES_DIR, keybinds=KEYBINDS, cache_dir=CACHE_DIR,
+                 package="src.profiles"):
+        self.keybinds = keybinds
+        self.cache_dir = cache_dir
+        self.package = package
+        self.modules = {}  # aircraft -> module file
+        for path in sorted(glob.glob(os.path.join(profiles_dir, "*.py"))):
+            if os.path.basename(path).startswith("_"):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                m = _AIRCRAFT_LINE.search(f.read())
+            if m:
+                self.modules[m.group(1)] = path
+        self.loaded = {}
+        self.sections = None  # keybinds.json aircraft, read only when needed
+        self.lock = threading.RLock()
+        self.compiler_digest = None  # hash of _COMPILER_SOURCES, read on first load
+        self.hits = 0
+        self.misses = 0
+
+    def names(self):
+        """Every known aircraft (reads keybinds.json for keyboard-only ones)."""
+        return sorted(set(self.modules) | set(self._sections()))
+
+    def __contains__(self, aircraft):
+        # Loads it: a cached keyboard-only aircraft is found without reading keybinds.json
+        return self.get(aircraft) is not None
+
+    def __getitem__(self, aircraft):
+        profile = self.loaded.get(aircraft)
+        if profile is None:
+            with self.lock:
+                profile = self.loaded.get(aircraft)
+                if profile is None:
+                    profile = self._load(aircraft)
+                    self.loaded[aircraft] = profile
+        return profile
+
+    def get(self, aircraft, default=None):
+        try:
+            return self[aircraft]
+        except KeyError:
+            return default
+
+    def _sections(self):
+        if self.sections is None:
+            try:
+                with open(self.keybinds.path, "r") as f:
+                    self.sections = frozenset(json.load(f))
+            except Exception as e:
+                logging.error(f"Failed to read keybinds.json sections: {e}")
+                self.sections = frozenset()
+        return self.sections
+
+    def _artifact_path(self, aircraft):
+        if not self.cache_dir or not isinstance(aircraft, str):
+            return None
+        return os.path.join(self.cache_dir, re.sub(r"[^\w.-]", "_", aircraft) + ".json")
+
+    def _key(self, module_path):
+        if self.compiler_digest is None:
+            compiler = hashlib.sha256(str(COMPILER_VERSION).encode())
+            for path in _COMPILER_SOURCES:
+                with open(path, "rb") as f:
+                    compiler.update(f.read())
+            self.compiler_digest = compiler.digest()
+        digest = hashlib.sha256(self.compiler_digest)
+        for path in (module_path, self.keybinds.path):
+            if path and os.path.exists(path):
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _load(self, aircraft):
+        start = time.perf_counter()
+        module_path = self.modules.get(aircraft)
+        if not module_path and self.sections is not None and aircraft not in self.sections:
+            raise KeyError(aircraft)
+        module = None
+        if module_path:
+            name = os.path.splitext(os.path.basename(module_path))[0]
+            module = importlib.import_module(f"{self.package}.{name}")
+
+        key = self._key(module_path)
+        mtime = os.path.getmtime(self.keybinds.path) if os.path.exists(self.keybinds.path) else None
+        artifact = self._read_artifact(aircraft, key)
+        if artifact is not None:
+            self.hits += 1
+            source = "cache"
+        else:
+            if module is None and aircraft not in self._sections():
+                raise KeyError(aircraft)
+            self.misses += 1
+            source = "compiled"
+            artifact = self._compile(aircraft, module, key)
+            self._write_artifact(aircraft, artifact)
+
+        tables = {axis: AxisTable(tuple(v), tuple(tuple(k) for k in keys), tuple(n))
+                  for axis, (v, keys, n) in artifact["tables"].items()}
+        self.keybinds.prime(aircraft, artifact["binds"], tables, mtime)
+        profile = CompiledProfile(aircraft, module, artifact["spec"], self.keybinds, source,
+                                  (time.perf_counter() - start) * 1000)
+        logging.info(f"Profile {aircraft} ready ({source}, {profile.load_ms:.1f}ms)")
+        return profile
+
+    def _compile(self, aircraft, module, key):
+        binds = {}
+        if os.path.exists(self.keybinds.path):
+            with open(self.keybinds.path, "r") as f:
+                binds = json.load(f).get(aircraft, {})
+        tables = build_tables(binds)
+        return {
+            "key": key,
+            "aircraft": aircraft,
+            "spec": profile_spec(module),
+            "binds": binds,
+            "tables": {axis: [t.values, t.keys, t.names] for axis, t in tables.items()},
+        }
+
+    def _read_artifact(self, aircraft, key):
+        path = self._artifact_path(aircraft)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                artifact = json.load(f)
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable profile cache {path}: {e}")
+            return None
+        return artifact if artifact.get("key") == key else None
+
+    def _write_artifact(self, aircraft, artifact):
+        path = self._artifact_path(aircraft)
+        if not path:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temp file first so a crash never leaves a truncated artifact
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(artifact, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logging.error(f"Failed to save profile cache for {aircraft}: {e}")
+
+    def stats(self):
+        return {
+            "known": len(self.modules),
+            "loaded": {a: (p.source, round(p.load_ms, 2)) for a, p in self.loaded.items()},
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def format(self):
+        lines = []
+        for aircraft in self.names():
+            kind = "module" if aircraft in self.modules else "keybinds only"
+            profile = self.loaded.get(aircraft)
+            state = f"loaded ({profile.source}, {profile.load_ms:.1f}ms)" if profile else "not loaded"
+            lines.append(f"{aircraft:<12}{kind:<16}{state}")
+        return "\n".join(lines)
+
+
+# Shared by Bridge, Brain and Ears
+PROFILES = ProfileRegistry()
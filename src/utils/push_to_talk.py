@@ -0,0 +1,228 @@
+import ctypes
+import logging
+import socket
+import sys
+import threading
+import time
+
+from src.utils.input_backends import UINPUT_KEYS
+
+# Windows virtual-key codes for push-to-talk keys (GetAsyncKeyState)
+VIRTUAL_KEYS = {
+    'space': 0x20, 'tab': 0x09, 'capslock': 0x14, '`': 0xC0,
+    'lshift': 0xA0, 'rshift': 0xA1, 'lctrl': 0xA2, 'rctrl': 0xA3, 'lalt': 0xA4, 'ralt': 0xA5,
+    # Mouse side buttons are a common push-to-talk choice
+    'mouse4': 0x05, 'mouse5': 0x06,
+}
+VIRTUAL_KEYS.update({c: ord(c.upper()) for c in 'abcdefghijklmnopqrstuvwxyz0123456789'})
+VIRTUAL_KEYS.update({f'f{i}': 0x6F + i for i in range(1, 25)})
+
+# Datagrams understood by UdpTrigger
+PRESS_WORDS = {"press", "down", "1"}
+RELEASE_WORDS = {"release", "up", "0"}
+
+
+class PttTrigger:
+    """
+    Source of push-to-talk edges: calls capture.press() when the button
+    goes down and capture.release() when it comes up, from its own thread.
+    """
+    name = "base"
+
+    def __init__(self, capture):
+        self.capture = capture
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=f"ptt-{self.name}", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _set(self, down):
+        if down:
+            self.capture.press()
+        else:
+            self.capture.release()
+
+    def _run(self):
+        raise NotImplementedError
+
+    def describe(self):
+        return self.name
+
+    def close(self):
+        self.running = False
+        self.thread.join(timeout=1)
+
+
+class UdpTrigger(PttTrigger):
+    """
+    "press"/"release" datagrams on a local port, so any tool that can send
+    UDP on a HOTAS button (DCS Lua export, VoiceAttack, SRS, a script) can
+    drive push-to-talk. Also "down"/"up" and "1"/"0".
+    """
+    name = "udp"
+
+    def __init__(self, capture, port=7780, host="127.0.0.1"):
+        super().__init__(capture)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.settimeout(0.2)
+        self.address = self.sock.getsockname()
+
+    def _run(self):
+        while self.running:
+            try:
+                data, _ = self.sock.recvfrom(64)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            word = data.decode("utf-8", "ignore").strip().lower()
+            if word in PRESS_WORDS:
+                self._set(True)
+            elif word in RELEASE_WORDS:
+                self._set(False)
+            else:
+                logging.warning(f"Push-to-talk: ignoring datagram {word!r}")
+
+    def describe(self):
+        return f"udp {self.address[0]}:{self.address[1]}"
+
+    def close(self):
+        super().close()
+        self.sock.close()
+
+
+class _PollingTrigger(PttTrigger):
+    """Polls a button state every `poll_ms` and reports the edges."""
+    def __init__(self, capture, poll_ms=5):
+        super().__init__(capture)
+        self.poll = poll_ms / 1000
+        self.down = False
+
+    def is_down(self):
+        raise NotImplementedError
+
+    def _run(self):
+        while self.running:
+            down = self.is_down()
+            if down != self.down:
+                self.down = down
+                self._set(down)
+            time.sleep(self.poll)
+
+
+class Win32KeyTrigger(_PollingTrigger):
+    """Keyboard key or mouse button via user32.GetAsyncKeyState (Windows only)."""
+    name = "key"
+
+    def __init__(self, capture, key, poll_ms=5):
+        super().__init__(capture, poll_ms)
+        if key not in VIRTUAL_KEYS:
+            raise ValueError(f"Unknown push-to-talk key: {key}")
+        self.key = key
+        self.vk = VIRTUAL_KEYS[key]
+        # Bound here rather than at import so the module loads on any OS
+        self.GetAsyncKeyState = ctypes.windll.user32.GetAsyncKeyState
+
+    def is_down(self):
+        return bool(self.GetAsyncKeyState(self.vk) & 0x8000)
+
+    def describe(self):
+        return f"key {self.key}"
+
+
+class JOYINFOEX(ctypes.Structure):
+    _fields_ = [(name, ctypes.c_ulong) for name in (
+        "dwSize", "dwFlags", "dwXpos", "dwYpos", "dwZpos", "dwRpos", "dwUpos", "dwVpos",
+        "dwButtons", "dwButtonNumber", "dwPOV", "dwReserved1", "dwReserved2")]
+
+JOY_RETURNBUTTONS = 0x80
+
+
+class Win32JoystickTrigger(_PollingTrigger):
+    """HOTAS/joystick button through winmm.joyGetPosEx (Windows only, buttons 1-32)."""
+    name = "joystick"
+
+    def __init__(self, capture, joystick=0, button=1, poll_ms=5):
+        super().__init__(capture, poll_ms)
+        if not 1 <= button <= 32:
+            raise ValueError(f"Joystick button must be 1-32, got {button}")
+        self.joystick = joystick
+        self.button = button
+        self.mask = 1 << (button - 1)
+        self.joyGetPosEx = ctypes.windll.winmm.joyGetPosEx
+        self.info = JOYINFOEX(dwSize=ctypes.sizeof(JOYINFOEX), dwFlags=JOY_RETURNBUTTONS)
+        if self.joyGetPosEx(joystick, ctypes.byref(self.info)) != 0:
+            raise RuntimeError(f"Joystick {joystick} not found")
+
+    def is_down(self):
+        if self.joyGetPosEx(self.joystick, ctypes.byref(self.info)) != 0:
+            return False
+        return bool(self.info.dwButtons & self.mask)
+
+    def describe(self):
+        return f"joystick {self.joystick} button {self.button}"
+
+
+class EvdevTrigger(PttTrigger):
+    """
+    Key or HOTAS button of an input device (Linux, needs `evdev` and read
+    access to the /dev/input/event* node). `key` is a key name from
+    UINPUT_KEYS or an evdev code name such as BTN_TRIGGER.
+    """
+    name = "evdev"
+
+    def __init__(self, capture, device, key):
+        super().__init__(capture)
+        try:
+            from evdev import InputDevice, ecodes
+        except ImportError:
+            logging.error("evdev not installed. Please pip install evdev.")
+            raise
+        self.ecodes = ecodes
+        self.device = InputDevice(device)
+        self.key = key
+        self.code = getattr(ecodes, UINPUT_KEYS.get(key, key.upper()))
+
+    def _run(self):
+        ecodes = self.ecodes
+        while self.running:
+            try:
+                event = self.device.read_one()
+            except OSError:
+                break
+            if event is None:
+                time.sleep(0.002)
+                continue
+            # value 2 is autorepeat
+            if event.type == ecodes.EV_KEY and event.code == self.code and event.value in (0, 1):
+                self._set(event.value == 1)
+
+    def describe(self):
+        return f"{self.device.path} {self.key}"
+
+    def close(self):
+        super().close()
+        self.device.close()
+
+
+def create_trigger(p_config, capture):
+    """Builds and starts the trigger configured in ears.ptt."""
+    kind = p_config.get('trigger', 'udp')
+    if kind == 'udp':
+        trigger = UdpTrigger(capture, port=p_config.get('port', 7780))
+    elif kind == 'key':
+        if sys.platform != "win32":
+            raise ValueError("ears.ptt.trigger 'key' is Windows only; use 'evdev' or 'udp'")
+        trigger = Win32KeyTrigger(capture, p_config['key'])
+    elif kind == 'joystick':
+        if sys.platform != "win32":
+            raise ValueError("ears.ptt.trigger 'joystick' is Windows only; use 'evdev' or 'udp'")
+        trigger = Win32JoystickTrigger(capture, p_config.get('joystick', 0), p_config['button'])
+    elif kind == 'evdev':
+        trigger = EvdevTrigger(capture, p_config['device'], p_config['key'])
+    else:
+        raise ValueError(f"Unknown push-to-talk trigger: {kind}")
+    return trigger.start()
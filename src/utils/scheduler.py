@@ -0,0 +1,52 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+
+class Scheduler:
+    """
+    Timer queue with a dedicated worker thread.
+    Callbacks are run at (or as soon as possible after) their due time
+    (a time.monotonic() value), in due-time order, so callers never sleep
+    to honor key holds or confirmation deadlines.
+    """
+    def __init__(self, name="scheduler"):
+        self.queue = []  # heap of (due, seq, callback)
+        self.seq = itertools.count()
+        self.cond = threading.Condition()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def schedule(self, due, callback):
+        with self.cond:
+            heapq.heappush(self.queue, (due, next(self.seq), callback))
+            self.cond.notify()
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while True:
+                    if self.queue:
+                        wait = self.queue[0][0] - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self.cond.wait(wait)
+                    elif not self.running:
+                        return
+                    else:
+                        self.cond.wait()
+                _, _, callback = heapq.heappop(self.queue)
+            try:
+                callback()
+            except Exception as e:
+                logging.error(f"Scheduler callback failed: {e}")
+
+    def close(self, timeout=2):
+        """Runs what is already queued, then stops the worker."""
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        self.thread.join(timeout=timeout)
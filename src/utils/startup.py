@@ -0,0 +1,106 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class _Phase:
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer._add(self.name, self.start, time.perf_counter())
+        return False
+
+
+class StartupTimer:
+    """
+    Cold-start timeline: phase(name) times a block (import, model load, mic
+    calibration...) on whichever thread runs it, mark(name) records the
+    first time a milestone is reached. Everything is relative to `t0`, the
+    moment this module was first imported.
+
+    For a per-module breakdown of import cost use the interpreter's own
+    `python -X importtime src/main.py 2> importtime.log`.
+    """
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.phases = []  # (name, start, end, thread)
+        self.marks = {}
+        self.lock = threading.Lock()
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def _add(self, name, start, end):
+        with self.lock:
+            self.phases.append((name, start - self.t0, end - self.t0, threading.current_thread().name))
+
+    def mark(self, name):
+        """Records a milestone once; returns its time in ms (None if already recorded)."""
+        with self.lock:
+            if name in self.marks:
+                return None
+            self.marks[name] = time.perf_counter() - self.t0
+            return self.marks[name] * 1000
+
+    def format(self):
+        with self.lock:
+            phases = sorted(self.phases, key=lambda p: p[1])
+            marks = sorted(self.marks.items(), key=lambda m: m[1])
+        lines = [f"{'phase':<30}{'start':>9}{'end':>9}{'took':>9}  thread"]
+        for name, start, end, thread in phases:
+            lines.append(f"{name:<30}{start * 1000:>7.0f}ms{end * 1000:>7.0f}ms{(end - start) * 1000:>7.0f}ms  {thread}")
+        for name, at in marks:
+            lines.append(f"* {name} at {at * 1000:.0f}ms")
+        return "\n".join(lines)
+
+
+class BackgroundServices:
+    """
+    Builds slow components (Ears, Brain) concurrently on worker threads so
+    the prompt is usable immediately. get(name) never blocks unless asked
+    to; a component that failed to build is reported when it fails and is
+    None from then on.
+    """
+    def __init__(self, max_workers=4):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="startup")
+        self.futures = {}
+
+    def start(self, name, factory, on_ready=None):
+        def build():
+            try:
+                with STARTUP.phase(f"{name} init"):
+                    service = factory()
+            except Exception as e:
+                print(f"Could not initialize {name.capitalize()}: {e}")
+                raise
+            at = STARTUP.mark(f"{name} ready")
+            if on_ready:
+                on_ready(service, at)
+            return service
+        self.futures[name] = self.pool.submit(build)
+
+    def ready(self, name):
+        future = self.futures.get(name)
+        return future is not None and future.done()
+
+    def get(self, name, wait=False):
+        future = self.futures.get(name)
+        if future is None or (not wait and not future.done()):
+            return None
+        try:
+            return future.result()
+        except Exception:
+            return None
+
+    def close(self):
+        self.pool.shutdown(wait=False)
+
+
+# Process-wide startup timeline; import this module first for an accurate t0
+STARTUP = StartupTimer()
@@ -0,0 +1,134 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.utils.audio_stream import SAMPLE_RATE, INT16_SCALE
+from src.utils.buffer_pool import AudioBufferPool
+
+
+class StreamingTranscriber:
+    """
+    Partial transcription while the pilot is still talking.
+
+    Every `step_ms` of new audio, the utterance so far (capped to the last
+    `window_s` seconds) is decoded on a worker thread with a cheap decode
+    (`partial_profile`). A word prefix is "stable" once two consecutive
+    decodes agree on it (local agreement); each time the stable prefix
+    grows, on_partial(text) is called. finish() runs the full-quality
+    decode on the complete utterance and returns the final text.
+
+    `decode(audio_float32, profile)` is supplied by Ears so model
+    management stays in one place; profiles are the named Whisper decode
+    profiles from config.json (None = the active model's default).
+    """
+    def __init__(self, decode, step_ms=500, window_s=10, partial_profile="fast", final_profile=None):
+        self.decode = decode
+        self.step = SAMPLE_RATE * step_ms // 1000
+        self.window = int(SAMPLE_RATE * window_s)
+        self.partial_profile = partial_profile
+        self.final_profile = final_profile
+        self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper-partial")
+        # One partial decodes at a time; a second buffer covers the hand-over
+        self.buffers = AudioBufferPool(self.window, max_buffers=2)
+        self.last_stats = None
+        self._reset(None)
+
+    def _reset(self, on_partial):
+        self.on_partial = on_partial
+        self.in_flight = None
+        self.decoded_until = 0
+        self.previous_words = []
+        self.stable_words = []
+        self.started = None
+        self.speech_started = None
+        self.first_partial = None
+        self.partials = 0
+
+    def begin(self, on_partial=None):
+        """Starts a new utterance."""
+        self._reset(on_partial)
+        self.started = time.perf_counter()
+
+    def feed(self, ring, start, end):
+        """
+        Called by StreamingCapture for every frame of an utterance in progress.
+        Schedules a partial decode when enough new audio arrived and the
+        previous partial decode is done; never blocks the capture thread.
+        """
+        if self.speech_started is None:
+            self.speech_started = time.perf_counter()
+        if end - max(start, self.decoded_until) < self.step:
+            return
+        if self.in_flight is not None and not self.in_flight.done():
+            return
+        self.decoded_until = end
+        buffer = self.buffers.extract(ring, max(start, end - self.window), end)
+        self.in_flight = self.worker.submit(self._partial, buffer)
+
+    def _partial(self, buffer):
+        try:
+            words = self.decode(buffer.to_float(), self.partial_profile).split()
+        except Exception as e:
+            # Only this hypothesis is lost; the final decode still gets all the audio
+            logging.warning(f"Partial decode failed: {e}")
+            return
+        finally:
+            buffer.release()
+
+        # Local agreement: keep the prefix shared with the previous hypothesis
+        agreed = []
+        for a, b in zip(self.previous_words, words):
+            if _norm(a) != _norm(b):
+                break
+            agreed.append(b)
+        self.previous_words = words
+
+        if len(agreed) > len(self.stable_words):
+            self.stable_words = agreed
+            self.partials += 1
+            if self.first_partial is None:
+                self.first_partial = time.perf_counter()
+            text = " ".join(agreed)
+            logging.info(f"Partial (stable): '{text}'")
+            if self.on_partial:
+                try:
+                    self.on_partial(text)
+                except Exception as e:
+                    logging.error(f"Partial transcript consumer failed: {e}")
+
+    def finish(self, samples):
+        """
+        Final decode of the complete utterance (int16 array or pooled
+        AudioBuffer, which stays owned by the caller). Returns the text and
+        records time-to-first-partial and final latency in last_stats.
+        """
+        captured = time.perf_counter()
+        if self.in_flight is not None:
+            # One decoder at a time; the partial in flight is nearly done anyway.
+            # Waits without raising: a failed partial must not cost the utterance.
+            self.in_flight.exception()
+        if hasattr(samples, 'to_float'):
+            audio = samples.to_float()
+        else:
+            audio = samples.astype(np.float32) * INT16_SCALE
+        text = self.decode(audio, self.final_profile).strip()
+        done = time.perf_counter()
+
+        self.last_stats = {
+            # Both measured from the moment the VAD detected speech
+            "ttft_ms": (self.first_partial - self.speech_started) * 1000 if self.first_partial else None,
+            "final_ms": (done - captured) * 1000,
+            "total_ms": (done - (self.speech_started or self.started)) * 1000,
+            "partials": self.partials,
+            "stable_prefix": " ".join(self.stable_words),
+        }
+        return text
+
+    def close(self):
+        self.worker.shutdown(wait=True)
+
+
+def _norm(word):
+    return word.strip(".,!?;:").lower()
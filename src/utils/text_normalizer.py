@@ -0,0 +1,140 @@
+import re
+
+# Spoken number words -> values. Includes the ICAO radio pronunciations Whisper
+# sometimes transcribes literally ("niner", "tree", "fife").
+UNITS = {
+    "zero": 0, "oh": 0, "one": 1, "two": 2, "three": 3, "tree": 3, "four": 4,
+    "five": 5, "fife": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9, "niner": 9,
+    "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14,
+    "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19,
+}
+TENS = {
+    "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50,
+    "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+}
+SCALES = {"hundred": 100, "thousand": 1000}
+
+_NUMBER_WORDS = set(UNITS) | set(TENS) | set(SCALES)
+_TOKEN_RE = re.compile(r"[a-z]+|\d+(?:\.\d+)?|[^\sa-z\d]")
+_DIGIT_COMMA_RE = re.compile(r"(?<=\d),(?=\d{3}\b)")
+
+
+def _format_number(value):
+    if value == int(value):
+        return str(int(value))
+    return f"{value:g}"
+
+
+def _words_to_number(words):
+    """
+    Converts a run of number words into a numeric string.
+    "one hundred (and) twenty" -> "120", "one point five" -> "1.5",
+    "two seven zero" (digit-by-digit, radio style) -> "270",
+    "one eighty" -> "180", "one five hundred" -> "1500".
+    """
+    words = [w for w in words if w != "and"]
+    if "point" in words:
+        idx = words.index("point")
+        whole = _words_to_number(words[:idx]) if idx else "0"
+        decimals = "".join(str(UNITS[w]) for w in words[idx + 1:] if w in UNITS and UNITS[w] < 10)
+        return f"{whole}.{decimals}" if decimals else whole
+
+    # Radio style: each word is a single digit
+    if len(words) > 1 and all(w in UNITS and UNITS[w] < 10 for w in words):
+        return "".join(str(UNITS[w]) for w in words)
+
+    # Compositional, plus the radio habit of reading a number in digit
+    # groups: a single digit before a tens/teen word leads it ("one eighty"
+    # -> 180, "two seventy five" -> 275) and single digits before a scale
+    # form its multiplier ("one five hundred" -> 1500).
+    total, current, prev = 0, 0, None
+    for w in words:
+        if w in UNITS and UNITS[w] < 10:
+            value = UNITS[w]
+            if prev == "digit":
+                current = current * 10 + value
+            elif prev in ("tens", "hundred"):
+                current += value
+            else:
+                current = value
+            prev = "digit"
+        elif w in UNITS or w in TENS:
+            value = UNITS.get(w, TENS.get(w))
+            current = current * 100 + value if prev == "digit" else current + value
+            prev = "tens"
+        elif w == "hundred":
+            current = (current or 1) * 100
+            prev = "hundred"
+        elif w == "thousand":
+            total += (current or 1) * 1000
+            current, prev = 0, "thousand"
+    return _format_number(total + current)
+
+
+def normalize_numbers(text):
+    """
+    Lowercases `text` and replaces spelled-out numbers with digits.
+    Thousands separators are dropped ("5,000" -> "5000").
+    Returns a single-space-separated string.
+    """
+    text = _DIGIT_COMMA_RE.sub("", text.lower())
+    tokens = _TOKEN_RE.findall(text)
+
+    out = []
+    run = []
+    for i, tok in enumerate(tokens):
+        # "point" only counts as a number word inside a run ("one point five"),
+        # "and" only between a scale and more number words ("hundred and twenty")
+        joins = (tok == "point" and run) or (
+            tok == "and" and run and run[-1] in SCALES
+            and i + 1 < len(tokens) and tokens[i + 1] in _NUMBER_WORDS
+        )
+        if tok in _NUMBER_WORDS or joins:
+            # "oh" is only a zero when it follows another number word
+            if tok == "oh" and not run:
+                out.append(tok)
+                continue
+            run.append(tok)
+            continue
+        if run:
+            out.append(_flush(run))
+            run = []
+        out.append(tok)
+    if run:
+        out.append(_flush(run))
+    return " ".join(out)
+
+
+def _flush(run):
+    # A trailing "point" was not followed by digits; keep it as a word
+    if run[-1] == "point":
+        return f"{_words_to_number(run[:-1])} point"
+    return _words_to_number(run)
+
+
+# Words that never change the meaning of a command (hesitations, call signs, politeness)
+FILLER_WORDS = {
+    "um", "uh", "er", "erm", "ah", "hmm", "like", "just", "so", "please",
+    "handler", "hey", "ok", "okay", "roger", "copy", "the", "a", "an", "now",
+}
+
+
+def normalize_utterance(text):
+    """
+    Canonical form of a transcript for cache lookups: lowercase, numbers as
+    digits, punctuation and filler words removed.
+    "Handler, um, master arm ON please!" -> "master arm on"
+    """
+    words = normalize_numbers(text).split()
+    return " ".join(
+        w for w in words
+        if (w.isalnum() or _is_number(w)) and w not in FILLER_WORDS
+    )
+
+
+def _is_number(word):
+    try:
+        float(word)
+        return True
+    except ValueError:
+        return False
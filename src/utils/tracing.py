@@ -0,0 +1,228 @@
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+# Significant bits kept per value: 6 bits (32 sub-buckets per power of two)
+# gives ~3% worst-case value error
+SUB_BUCKET_BITS = 6
+
+
+class Histogram:
+    """
+    HDR-style log-linear histogram of durations in microseconds.
+
+    Values are bucketed by (power of two, top SUB_BUCKET_BITS of mantissa),
+    so memory stays tiny while percentiles keep ~3% precision from 1us to
+    hours.
+    """
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _bucket(value):
+        exponent = value.bit_length()
+        if exponent <= SUB_BUCKET_BITS:
+            return value
+        shift = exponent - SUB_BUCKET_BITS
+        return (value >> shift) << shift
+
+    def record(self, seconds):
+        value = max(1, int(seconds * 1e6))
+        bucket = self._bucket(value)
+        with self.lock:
+            self.counts[bucket] = self.counts.get(bucket, 0) + 1
+            self.count += 1
+            self.total += value
+            self.max = max(self.max, value)
+            self.min = value if self.min is None else min(self.min, value)
+
+    def percentile(self, p):
+        """Returns the value (us) at percentile p in [0, 100]."""
+        with self.lock:
+            if not self.count:
+                return None
+            target = max(1, int(round(p / 100 * self.count)))
+            seen = 0
+            for bucket in sorted(self.counts):
+                seen += self.counts[bucket]
+                if seen >= target:
+                    return min(bucket, self.max)
+            return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": (self.total / self.count) / 1000 if self.count else None,
+            "p50_ms": _ms(self.percentile(50)),
+            "p90_ms": _ms(self.percentile(90)),
+            "p99_ms": _ms(self.percentile(99)),
+            "max_ms": _ms(self.max) if self.count else None,
+        }
+
+
+class _NullSpan:
+    """Shared no-op context manager returned while tracing is off."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, tracer, stage):
+        self.tracer = tracer
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        self.tracer._add(self.stage, self.start, end, self.tracer.current())
+        return False
+
+
+class Tracer:
+    """
+    Per-utterance tracing across Ears -> Brain -> Bridge.
+
+    begin() opens a trace with a new ID and makes it current for the
+    calling thread; span(stage) records how long a block took into that
+    stage's histogram and stamps the current trace with monotonic
+    (perf_counter) start/end times. Threads that pick up work for an
+    existing trace call activate(trace_id). When disabled, every call
+    returns immediately and span() hands back a shared no-op object.
+    """
+    def __init__(self, enabled=False, keep=100):
+        self.enabled = enabled
+        self.histograms = {}
+        self.traces = {}
+        self.recent = deque(maxlen=keep)
+        self.ids = itertools.count(1)
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def begin(self):
+        if not self.enabled:
+            return None
+        trace_id = next(self.ids)
+        with self.lock:
+            self.traces[trace_id] = {"id": trace_id, "start": time.perf_counter(), "marks": []}
+        self.local.trace = trace_id
+        return trace_id
+
+    def activate(self, trace_id):
+        if self.enabled:
+            self.local.trace = trace_id
+
+    def current(self):
+        return getattr(self.local, "trace", None)
+
+    def span(self, stage):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage)
+
+    def record(self, stage, seconds, trace_id=None):
+        """Records a duration measured elsewhere (e.g. in a completion callback)."""
+        if not self.enabled:
+            return
+        end = time.perf_counter()
+        self._add(stage, end - seconds, end, trace_id)
+
+    def _add(self, stage, start, end, trace_id):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(stage, Histogram())
+        histogram.record(end - start)
+        if trace_id is not None:
+            trace = self.traces.get(trace_id)
+            if trace is not None:
+                trace["marks"].append((stage, start, end))
+
+    def discard(self, trace_id):
+        """Drops an open trace without recording it (e.g. a capture that heard nothing)."""
+        if not self.enabled or trace_id is None:
+            return
+        with self.lock:
+            self.traces.pop(trace_id, None)
+
+    def finish(self, trace_id=None):
+        """Closes a trace and records its end-to-end time as stage "total"."""
+        if not self.enabled:
+            return
+        trace_id = trace_id if trace_id is not None else self.current()
+        with self.lock:
+            trace = self.traces.pop(trace_id, None)
+        if trace is None:
+            return
+        trace["end"] = time.perf_counter()
+        self._add("total", trace["start"], trace["end"], None)
+        self.recent.append(trace)
+        if self.current() == trace_id:
+            self.local.trace = None
+
+    def summary(self):
+        with self.lock:
+            stages = list(self.histograms.items())
+        return {stage: h.summary() for stage, h in stages}
+
+    def format_summary(self):
+        rows = [f"{'stage':<12}{'count':>7}{'mean':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}  (ms)"]
+        for stage, s in self.summary().items():
+            rows.append(
+                f"{stage:<12}{s['count']:>7}{_fmt(s['mean_ms'])}{_fmt(s['p50_ms'])}"
+                f"{_fmt(s['p90_ms'])}{_fmt(s['p99_ms'])}{_fmt(s['max_ms'])}"
+            )
+        return "\n".join(rows)
+
+    def format_recent(self, n=5):
+        """Stage timeline of the last n finished traces, relative to trace start."""
+        lines = []
+        for trace in list(self.recent)[-n:]:
+            total = (trace["end"] - trace["start"]) * 1000
+            marks = ", ".join(
+                f"{stage} +{(s - trace['start']) * 1000:.0f}..{(e - trace['start']) * 1000:.0f}ms"
+                for stage, s, e in trace["marks"]
+            )
+            lines.append(f"#{trace['id']} {total:.0f}ms: {marks}")
+        return "\n".join(lines) or "No traces yet."
+
+    def dump(self, path):
+        """Writes per-stage summaries and raw histogram buckets as JSON."""
+        with self.lock:
+            stages = list(self.histograms.items())
+        data = {
+            stage: dict(h.summary(), buckets_us={str(k): v for k, v in sorted(h.counts.items())})
+            for stage, h in stages
+        }
+        try:
+            with open(path, 'w') as f:
+                json.dump(data, f, indent=2)
+            logging.info(f"Latency histograms written to {path}")
+        except Exception as e:
+            logging.error(f"Failed to write latency histograms: {e}")
+
+
+def _ms(us):
+    return us / 1000 if us is not None else None
+
+def _fmt(ms):
+    return f"{ms:>9.1f}" if ms is not None else f"{'-':>9}"
+
+
+# Process-wide tracer; main.py enables it from config["tracing"]
+TRACER = Tracer()
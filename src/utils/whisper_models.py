@@ -0,0 +1,261 @@
+import logging
+import threading
+import time
+
+import numpy as np
+
+# Decode settings used when config.json names no profiles
+DEFAULT_PROFILES = {
+    "accurate": {"beam_size": 5, "vad_filter": False},
+    "fast": {"beam_size": 1, "vad_filter": False},
+}
+
+# Keys of a profile that are passed to WhisperModel.transcribe(); the rest
+# (compute_type, cpu_threads) only matter when a model is loaded, and
+# vocabulary/hotwords/snap switch on command-vocabulary biasing
+DECODE_KEYS = (
+    "beam_size", "vad_filter", "best_of", "temperature", "without_timestamps",
+    "max_new_tokens", "condition_on_previous_text", "suppress_blank",
+)
+LOAD_KEYS = ("compute_type", "cpu_threads")
+
+
+def _is_cuda_error(e):
+    message = str(e).lower()
+    return any(word in message for word in ("cublas", "cudnn", "cuda", "library"))
+
+
+class _Slot:
+    """One model configuration (primary or fallback) and its load state."""
+    def __init__(self, name, settings):
+        self.name = name
+        self.settings = settings
+        self.model = None
+        self.error = None
+        self.ready = threading.Event()
+        self.loading = False
+        self.load_ms = None
+
+    def describe(self):
+        s = self.settings
+        return f"{self.name} ('{s['model_size']}' on {s['device']}, {s['compute_type']})"
+
+
+class WhisperModelManager:
+    """
+    Keeps the primary Whisper model and its fallback loaded and warm.
+
+    The primary is loaded and warmed up by start(); the fallback (by default
+    the same model on CPU with int8) is loaded eagerly, in a background
+    thread or only when first needed, depending on `preload`. When the
+    primary raises a CUDA error, during warmup or mid-utterance, the manager
+    switches to the already-warm fallback and retries the decode there, so
+    a cublas failure costs one retry instead of a model reload.
+
+    Decode settings come from named profiles ({"beam_size", "vad_filter",
+    "compute_type", "cpu_threads"}); transcribe() takes a profile name.
+    A profile with "vocabulary" set gets the CommandVocabulary prompt as
+    initial_prompt ("hotwords" also passes its word list) and "snap"
+    corrects near-miss words in the output.
+    """
+    def __init__(self, primary, fallback=None, profiles=None, profile="accurate",
+                 fallback_profile=None, preload="background", loader=None):
+        self.profiles = dict(profiles or DEFAULT_PROFILES)
+        self.default_profile = profile
+        self.fallback_profile = fallback_profile or profile
+        for name in (self.default_profile, self.fallback_profile):
+            if name not in self.profiles:
+                raise ValueError(f"Unknown Whisper decode profile: {name}")
+
+        self.primary = _Slot("primary", self._load_settings(primary, self.default_profile))
+        self.fallback = _Slot("fallback", self._load_settings(fallback, self.fallback_profile)) if fallback else None
+        self.preload = preload
+        self.loader = loader
+        self.active = self.primary
+        self.vocabulary = None
+        self.lock = threading.Lock()
+        self.switches = 0
+
+    @classmethod
+    def from_config(cls, w_config):
+        """Builds a manager from config['ears']['whisper']."""
+        primary = {k: w_config[k] for k in ("model_size", "device", "compute_type") if k in w_config}
+        fallback = w_config.get("fallback")
+        if fallback is None and primary.get("device") != "cpu":
+            # Same behaviour as before: retry on CPU with int8
+            fallback = {"device": "cpu", "compute_type": "int8"}
+        if fallback:
+            fallback = dict({"model_size": primary.get("model_size")}, **fallback)
+        return cls(
+            primary,
+            fallback=fallback,
+            profiles=w_config.get("profiles"),
+            profile=w_config.get("profile", "accurate"),
+            fallback_profile=(fallback or {}).get("profile"),
+            preload=(fallback or {}).get("preload", "background"),
+        )
+
+    def reconfigure(self, w_config):
+        """
+        Switches decode profiles without touching the loaded models. Changes
+        to the models themselves (size, device, compute type) are reported
+        and need a restart.
+        """
+        profiles = dict(w_config.get("profiles") or DEFAULT_PROFILES)
+        profile = w_config.get("profile", "accurate")
+        fallback_profile = (w_config.get("fallback") or {}).get("profile") or profile
+        missing = [name for name in (profile, fallback_profile) if name not in profiles]
+        if missing:
+            logging.error(f"Unknown Whisper decode profile(s) {', '.join(missing)}; keeping the current ones.")
+            return
+        # Swap the dict as a whole; decodes in progress keep the one they started with
+        self.profiles = profiles
+        self.default_profile = profile
+        self.fallback_profile = fallback_profile
+
+        primary = {k: w_config[k] for k in ("model_size", "device", "compute_type") if k in w_config}
+        if self._load_settings(primary, profile) != self.primary.settings:
+            logging.warning("Whisper model settings changed; they take effect after a restart.")
+        logging.info(f"Whisper decode profile: {profile} (fallback: {fallback_profile})")
+
+    def _load_settings(self, settings, profile):
+        # Load-time keys of the profile override the model block
+        merged = {"model_size": "tiny.en", "device": "cpu", "compute_type": "int8"}
+        merged.update({k: v for k, v in settings.items() if k in ("model_size", "device", "compute_type", "cpu_threads")})
+        merged.update({k: v for k, v in self.profiles[profile].items() if k in LOAD_KEYS})
+        return merged
+
+    # --- Loading ---------------------------------------------------------
+
+    def start(self):
+        """
+        Loads and warms the primary model (falling back if it fails) and
+        schedules the fallback according to `preload`.
+        """
+        if not self._load(self.primary):
+            if not self.fallback:
+                raise self.primary.error
+            logging.warning("Primary Whisper model unavailable; using the fallback.")
+            self._switch_to_fallback()
+            if not self._load(self.fallback):
+                raise self.fallback.error
+            return
+
+        if self.fallback:
+            if self.preload == "eager":
+                self._load(self.fallback)
+            elif self.preload == "background":
+                threading.Thread(
+                    target=self._load, args=(self.fallback,), name="whisper-fallback-load", daemon=True
+                ).start()
+
+    def _load(self, slot):
+        """Loads and warms one slot. Returns True on success; safe to call concurrently."""
+        with self.lock:
+            if slot.ready.is_set():
+                return slot.model is not None
+            if slot.loading:
+                wait = True
+            else:
+                slot.loading = True
+                wait = False
+        if wait:
+            slot.ready.wait()
+            return slot.model is not None
+
+        s = slot.settings
+        logging.info(f"Loading Whisper {slot.describe()}...")
+        start = time.perf_counter()
+        try:
+            model = self._create(s)
+            # Warmup: forces lazy CUDA/DLL loading now rather than on the first command
+            segments, _ = model.transcribe(np.zeros(16000, dtype=np.float32), beam_size=1)
+            list(segments)
+            slot.model = model
+            slot.load_ms = (time.perf_counter() - start) * 1000
+            logging.info(f"Whisper {slot.name} model warm ({slot.load_ms:.0f}ms).")
+        except Exception as e:
+            slot.error = e
+            logging.error(f"Failed to load Whisper {slot.describe()}: {e}")
+        finally:
+            slot.ready.set()
+        return slot.model is not None
+
+    def _create(self, settings):
+        if self.loader:
+            return self.loader(settings)
+        from faster_whisper import WhisperModel
+        kwargs = {"device": settings["device"], "compute_type": settings["compute_type"]}
+        if settings.get("cpu_threads"):
+            kwargs["cpu_threads"] = settings["cpu_threads"]
+        return WhisperModel(settings["model_size"], **kwargs)
+
+    def _switch_to_fallback(self):
+        with self.lock:
+            if self.active is self.fallback:
+                return
+            self.active = self.fallback
+            self.switches += 1
+        logging.warning(f"Whisper switched to {self.fallback.describe()}.")
+
+    # --- Decoding --------------------------------------------------------
+
+    def profile(self, name=None):
+        """Returns the decode kwargs for a profile (None = the active model's default)."""
+        if name is not None and name not in self.profiles:
+            raise ValueError(f"Unknown Whisper decode profile: {name}")
+        settings = self._settings(name)
+        kwargs = {k: v for k, v in settings.items() if k in DECODE_KEYS}
+        if self.vocabulary is not None:
+            if settings.get("vocabulary"):
+                kwargs["initial_prompt"] = self.vocabulary.prompt
+            if settings.get("hotwords"):
+                kwargs["hotwords"] = self.vocabulary.hotwords
+        return kwargs
+
+    def transcribe(self, audio, profile=None):
+        """
+        Decodes float32 16kHz audio with the active model and returns the
+        joined text. A CUDA error on the primary, or a primary that fails
+        to load, switches to the fallback (and retries once); with no
+        usable model the load error is raised.
+        """
+        slot = self.active
+        if slot.model is None and not self._load(slot):
+            if slot is not self.primary or not self.fallback:
+                raise slot.error
+            self._switch_to_fallback()
+            slot = self.fallback
+            if not self._load(slot):
+                raise slot.error
+        try:
+            return self._run(slot, audio, profile)
+        except Exception as e:
+            if slot is not self.primary or not self.fallback or not _is_cuda_error(e):
+                raise
+            logging.warning(f"CUDA error during transcription: {e}")
+            self._switch_to_fallback()
+            if not self._load(self.fallback):
+                raise self.fallback.error
+            return self._run(self.fallback, audio, profile)
+
+    def _run(self, slot, audio, profile):
+        segments, _ = slot.model.transcribe(audio, **self.profile(profile))
+        text = " ".join(segment.text for segment in segments).strip()
+        if self.vocabulary is not None and self._settings(profile).get("snap"):
+            text = self.vocabulary.snap(text)
+        return text
+
+    def _settings(self, name):
+        if name is None:
+            name = self.fallback_profile if self.active is self.fallback else self.default_profile
+        return self.profiles.get(name, {})
+
+    def stats(self):
+        return {
+            "active": self.active.name,
+            "switches": self.switches,
+            "primary_load_ms": self.primary.load_ms,
+            "fallback_load_ms": self.fallback.load_ms if self.fallback else None,
+            "fallback_ready": bool(self.fallback and self.fallback.model is not None),
+        }
@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+
+# Add the project root to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dcs_stand_in import DcsStandIn
+from src.utils.dcs_bios import DcsBiosSender
+from src.utils.dcs_bios_export import CockpitState, ExportListener
+
+COMMAND_PORT = 17778
+EXPORT_PORT = 15010
+
+# Made-up addresses; real ones come from the DCS-BIOS aircraft JSON
+CONTROLS = {
+    "PLT_MASTER_ARM": (0x1000, 0x0100, 8),
+    "PLT_LASER_ARM": (0x1000, 0x0200, 9),
+}
+
+def run_benchmark(rounds=200, drop_rate=0.2):
+    dcs = DcsStandIn(CONTROLS, command_port=COMMAND_PORT, export_port=EXPORT_PORT,
+                     drop_rate=drop_rate, delay=0.005, seed=1)
+    dcs.start()
+
+    state = CockpitState(CONTROLS)
+    listener = ExportListener(state, group=None, port=EXPORT_PORT)
+    listener.start()
+
+    sender = DcsBiosSender(cockpit=state)
+    sender.ip, sender.port = "127.0.0.1", COMMAND_PORT
+    sender.target = (sender.ip, sender.port)
+    sender.ack_deadline = 0.05
+
+    print(f"Sending {rounds} acknowledged commands with {drop_rate:.0%} simulated loss...")
+    results = []
+    for i in range(rounds):
+        control = "PLT_MASTER_ARM" if i % 2 else "PLT_LASER_ARM"
+        results.append(sender.send_acknowledged(f"{control} {(i // 2) % 2}"))
+        time.sleep(0.01)
+    confirmed = sum(1 for f in results if f.result(timeout=5))
+
+    for control, s in sender.ack_stats().items():
+        p50 = f"{s['p50_ms']:.1f}" if s['p50_ms'] is not None else "-"
+        p95 = f"{s['p95_ms']:.1f}" if s['p95_ms'] is not None else "-"
+        p99 = f"{s['p99_ms']:.1f}" if s['p99_ms'] is not None else "-"
+        print(f"{control:<16} ok={s['confirmed']} retries={s['retries']} failed={s['failed']} "
+              f"p50={p50}ms p95={p95}ms p99={p99}ms")
+    print(f"Confirmed {confirmed}/{rounds} (stand-in dropped {dcs.dropped}/{dcs.received})")
+
+    sender.close()
+    listener.close()
+    dcs.close()
+
+if __name__ == "__main__":
+    run_benchmark()
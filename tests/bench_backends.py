@@ -0,0 +1,111 @@
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add the project root to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.brain import SYSTEM_PROMPT
+from src.profiles import oh58d
+from src.utils.config_loader import load_config
+from src.utils.intents import IntentValidator
+from src.utils.llm_backends import create_backend
+from src.utils.llm_client import GeminiClient
+from src.utils.llm_stub import StubLlmServer
+
+# Latency and intent accuracy of the Brain's LLM backends on the same
+# labelled utterances. Runs the local stub as a reference, Gemini when an
+# API key is configured (env GEMINI_API_KEY or config.json) and llama.cpp
+# when brain.llama_cpp.model_path (or the first argument) points at a GGUF.
+#
+# Usage: python tests/bench_backends.py [model.gguf]
+
+CASES = [
+    ("master arm on", {"action": "set_master_arm", "parameters": {"state": 1}}),
+    ("go ahead and safe the master arm", {"action": "set_master_arm", "parameters": {"state": 0}}),
+    ("give me the hellfires", {"action": "weapon_hellfire", "parameters": {}}),
+    ("switch to rockets", {"action": "weapon_rockets", "parameters": {}}),
+    ("guns please", {"action": "weapon_gun", "parameters": {}}),
+    ("arm the laser", {"action": "laser_arm", "parameters": {}}),
+    ("scan the sector to our left", {"action": "search_sector", "parameters": {"direction": "left"}}),
+    ("take us up to angels two", {"action": "set_flight_parameters", "parameters": {"altitude": 2000}}),
+    ("come left to heading two seven zero", {"action": "set_flight_parameters", "parameters": {"heading": 270}}),
+    ("sixty knots heading west at cherubs five",
+     {"action": "set_flight_parameters", "parameters": {"speed": 60, "heading": 270, "altitude": 500}}),
+    ("slow down to forty knots", {"action": "set_flight_parameters", "parameters": {"speed": 40}}),
+    ("head north east", {"action": "set_flight_parameters", "parameters": {"heading": 45}}),
+]
+
+def correct(expected, intent):
+    """Same action and parameters; numbers compared as floats, states as ints."""
+    if isinstance(intent, list):
+        intent = intent[0] if len(intent) == 1 else None
+    if not isinstance(intent, dict) or intent.get("action") != expected["action"]:
+        return False
+    params = intent.get("parameters") or {}
+    for key, want in expected["parameters"].items():
+        got = params.get(key)
+        try:
+            if float(got) != float(want):
+                return False
+        except (TypeError, ValueError):
+            if str(got).lower() != str(want).lower():
+                return False
+    return True
+
+async def run_backend(backend):
+    await backend.warm()
+    latencies, right = [], 0
+    for text, expected in CASES:
+        start = time.perf_counter()
+        try:
+            intent = IntentValidator.loads(await backend.generate(text))
+        except Exception as e:
+            print(f"  [{backend.name}] '{text}': {e}")
+            intent = None
+        latencies.append((time.perf_counter() - start) * 1000)
+        if correct(expected, intent):
+            right += 1
+        else:
+            print(f"  [{backend.name}] '{text}' -> {intent}")
+    return np.array(latencies), right
+
+def report(label, latencies, right):
+    print(
+        f"{label:<12}{np.percentile(latencies, 50):>8.0f}ms{np.percentile(latencies, 90):>8.0f}ms"
+        f"{latencies.max():>8.0f}ms{right:>6}/{len(CASES)}"
+    )
+
+if __name__ == "__main__":
+    b_config = load_config().get('brain', {})
+    results = []
+
+    stub = StubLlmServer(latency=0.0, jitter=0.0).start()
+    backend = GeminiClient("stub", "stub", SYSTEM_PROMPT, endpoint=stub.url)
+    backend.name = "stub"
+    results.append(("stub", asyncio.run(run_backend(backend))))
+    stub.close()
+
+    api_key = os.getenv("GEMINI_API_KEY") or b_config.get('api_key')
+    gemini = create_backend(dict(b_config, backend='gemini', endpoint=None), SYSTEM_PROMPT, oh58d, api_key=api_key)
+    if gemini:
+        results.append(("gemini", asyncio.run(run_backend(gemini))))
+    else:
+        print("Gemini skipped (no API key).")
+
+    l_config = dict(b_config.get('llama_cpp', {}))
+    if len(sys.argv) > 1:
+        l_config['model_path'] = sys.argv[1]
+    local = create_backend(dict(b_config, backend='llama_cpp', llama_cpp=l_config), SYSTEM_PROMPT, oh58d)
+    if local:
+        results.append(("llama_cpp", asyncio.run(run_backend(local))))
+        local.close()
+    else:
+        print("llama.cpp skipped (no model or llama-cpp-python).")
+
+    print(f"\n{'backend':<12}{'p50':>10}{'p90':>10}{'max':>10}{'correct':>9}")
+    for label, (latencies, right) in results:
+        report(label, latencies, right)
@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add the project root to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.brain import Brain, SYSTEM_PROMPT
+from src.utils.intent_cache import IntentCache
+from src.utils.llm_client import GeminiClient
+from src.utils.llm_stub import StubLlmServer
+
+# Offline Brain latency benchmark against a local stub of the Gemini API.
+# The stub has a heavy tail (SLOW_RATE of requests take SLOW_LATENCY), which
+# is what deadlines and hedged requests are meant to cut off.
+#
+# Usage: python tests/bench_brain.py [requests]
+
+SLOW_RATE = 0.1
+SLOW_LATENCY = 4.0
+
+# Wordy enough to miss the strict fast path, so every one goes to the "LLM"
+PHRASES = [
+    "could you please go ahead and arm the laser for me",
+    "alright now can you select the hellfires",
+    "okay could you switch over to the rockets",
+    "could you please go and search the sector to the left",
+    "alright give me the guns now please",
+]
+
+def run(brain, n, label):
+    latencies = []
+    answered = 0
+    for i in range(n):
+        # Vary the text so the cache never answers
+        text = f"{PHRASES[i % len(PHRASES)]} {'now ' * (i // len(PHRASES) % 3)}".strip()
+        brain.cache.clear()
+        start = time.perf_counter()
+        intent = brain.think(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+        answered += intent is not None
+    lat = np.array(latencies)
+    s = brain.stats()
+    print(
+        f"{label:<22}{np.percentile(lat, 50):>7.0f}ms{np.percentile(lat, 90):>7.0f}ms"
+        f"{np.percentile(lat, 99):>7.0f}ms{lat.max():>7.0f}ms{answered:>7}/{n}"
+        f"{s['hedges']:>8}{s['hedge_wins']:>6}{s['deadline_misses']:>8}{s['degraded']:>9}"
+    )
+
+def make_brain(stub, hedge, deadline):
+    brain = Brain()
+    brain.cache = IntentCache()
+    brain.hedge_enabled = hedge
+    brain.deadline = deadline
+    brain.backend = GeminiClient("stub", "stub-model", SYSTEM_PROMPT, endpoint=stub.url)
+    return brain
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    print(f"{'':<22}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}{'answered':>10}{'hedges':>8}{'won':>6}{'missed':>8}{'degraded':>9}")
+    for label, hedge, deadline in [
+        ("no hedge, 10s limit", False, 10.0),
+        ("hedged, 10s limit", True, 10.0),
+        ("hedged, 1.5s deadline", True, 1.5),
+    ]:
+        stub = StubLlmServer(latency=0.2, jitter=0.05, slow_rate=SLOW_RATE, slow_latency=SLOW_LATENCY, seed=1).start()
+        brain = make_brain(stub, hedge, deadline)
+        run(brain, n, label)
+        brain.close()
+        stub.close()
@@ -0,0 +1,93 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import wave
+
+import numpy as np
+
+# Add the project root to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.audio_stream import SAMPLE_RATE, StreamingCapture, WavFileSource
+from src.utils.buffer_pool import AudioBufferPool
+
+# Capture-to-Whisper hand-over for a session of phrases, old path against
+# the buffer pool. "copy" is what Ears did before: ring extract, AudioData
+# bytes, frombuffer/flatten/astype/divide. "pooled" extracts into a reused
+# int16 buffer and converts in place into its float32 twin. Reports the
+# conversion time and the bytes newly allocated per phrase (tracemalloc
+# peak, so numpy temporaries count), plus the pool's high-water mark.
+#
+# Usage: python tests/bench_buffers.py [phrases]
+
+FRAME_MS = 30
+
+def make_session(path, phrases, seed=0):
+    """Rotor-like noise with one 2-4s voiced burst every few seconds."""
+    rng = np.random.default_rng(seed)
+    chunks = []
+    for _ in range(phrases):
+        gap = rng.uniform(1.0, 2.0)
+        talk = rng.uniform(2.0, 4.0)
+        t = np.arange(int((gap + talk) * SAMPLE_RATE)) / SAMPLE_RATE
+        audio = 0.02 * rng.standard_normal(len(t)) + 0.01 * np.sin(2 * np.pi * 22 * t)
+        s = int(gap * SAMPLE_RATE)
+        audio[s:] += 0.3 * np.sin(2 * np.pi * 180 * t[s:]) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t[s:]) ** 2)
+        chunks.append(audio)
+    chunks.append(0.02 * rng.standard_normal(SAMPLE_RATE))
+    with wave.open(path, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes((np.clip(np.concatenate(chunks), -1, 1) * 32767).astype(np.int16).tobytes())
+
+def run(path, pooled):
+    capture = StreamingCapture(WavFileSource(path, SAMPLE_RATE * FRAME_MS // 1000), frame_ms=FRAME_MS)
+    pool = AudioBufferPool(capture.max_utterance) if pooled else None
+    convert_s, allocated, phrases = 0.0, [], 0
+    while True:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        if pooled:
+            buffer = capture.capture(into=pool)
+            if buffer is None:
+                break
+            t = time.perf_counter()
+            audio = buffer.to_float()
+        else:
+            samples = capture.capture()
+            if samples is None:
+                break
+            raw = samples.tobytes()  # sr.AudioData
+            t = time.perf_counter()
+            audio = np.frombuffer(raw, np.int16).flatten().astype(np.float32) / 32768.0
+        convert_s += time.perf_counter() - t
+        allocated.append(tracemalloc.get_traced_memory()[1] - base)
+        phrases += 1
+        # Whisper would decode `audio` here
+        if pooled:
+            buffer.release()
+        del audio
+    capture.close()
+    return phrases, convert_s, allocated, pool
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    path = os.path.join(tempfile.mkdtemp(), "session.wav")
+    make_session(path, count)
+
+    tracemalloc.start()
+    print(f"{'path':<8}{'phrases':>9}{'convert':>12}{'alloc/phrase':>15}{'alloc after 5':>16}")
+    for pooled in (False, True):
+        phrases, convert_s, allocated, pool = run(path, pooled)
+        # The first phrases create the pool's buffers; steady state is what matters
+        steady = allocated[5:] or allocated
+        print(f"{'pooled' if pooled else 'copy':<8}{phrases:>9}"
+              f"{convert_s * 1000 / max(phrases, 1):>10.3f}ms"
+              f"{np.mean(allocated) / 1024:>13.0f}KB{np.mean(steady) / 1024:>14.1f}KB")
+        if pool:
+            s = pool.stats()
+            print(f"\nPool: {s['created']} buffer(s) of {s['capacity_s']:.1f}s ({s['pooled_mb']:.1f}MB), "
+                  f"high water {s['high_water']}, {s['acquires']} acquires, {s['overflows']} overflow(s)")
@@ -0,0 +1,350 @@
+import argparse
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+
+import numpy as np
+
+# Add the project root to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.bridge import Bridge
+from src.profiles import oh58d
+from src.utils.input_backends import RecordingBackend
+from src.utils.input_emitter import InputEmitter
+from src.utils.intent_cache import IntentCache
+from src.utils.intent_matcher import IntentMatcher
+from src.utils.intents import IntentError, IntentValidator
+from src.utils.tracing import TRACER
+
+# End-to-end replay: utterances (typed transcripts or recorded WAVs) go
+# through Ears' decoder, the Brain and the real Bridge. DCS-BIOS datagrams
+# land in an in-process UDP sink and key presses in the recording input
+# backend, so nothing reaches a real sim or desktop. Reports per-stage
+# p50/p95/p99, throughput, and intent and output accuracy against the
+# expected intents; --save/--compare keep a baseline to catch regressions
+# between versions.
+#
+# Corpus: JSON lines, each with "expected" (an intent or list of intents)
+# and either "text" (a transcript) or "audio" (a 16kHz mono WAV, relative
+# to the corpus file; "text" is then the reference transcript for WER):
+#   {"text": "master arm on", "expected": {"aircraft": "OH-58D", "action": "set_master_arm", "parameters": {"state": 1}}}
+#
+# Brain modes: stub (default; local Gemini stand-in), cached (stub, corpus
+# replayed once first so answers come from the intent cache), real (as
+# configured in config.json) and none (local fast path only).
+#
+# Usage: python tests/bench_e2e.py [corpus.jsonl] [--brain MODE] [--repeat N]
+#                                  [--save baseline.json] [--compare baseline.json]
+
+def _intent(action, **parameters):
+    return {"aircraft": oh58d.AIRCRAFT, "action": action, "parameters": parameters}
+
+CORPUS = [
+    {"text": "master arm on", "expected": _intent("set_master_arm", state=1)},
+    {"text": "safe the master arm", "expected": _intent("set_master_arm", state=0)},
+    {"text": "select hellfire", "expected": _intent("weapon_hellfire")},
+    {"text": "rockets", "expected": _intent("weapon_rockets")},
+    {"text": "arm the laser", "expected": _intent("laser_arm")},
+    {"text": "search left", "expected": _intent("search_sector", direction="left")},
+    {"text": "angels two", "expected": _intent("set_flight_parameters", altitude=2000)},
+    {"text": "heading two seven zero", "expected": _intent("set_flight_parameters", heading=270)},
+    {"text": "sixty knots heading west at cherubs five",
+     "expected": _intent("set_flight_parameters", speed=60, heading=270, altitude=500)},
+    {"text": "could you please go ahead and arm the laser for me", "expected": _intent("laser_arm")},
+    {"text": "alright give me the guns now please", "expected": _intent("weapon_gun")},
+    {"text": "okay could you switch over to the rockets", "expected": _intent("weapon_rockets")},
+    {"text": "heading one eighty", "expected": _intent("set_flight_parameters", heading=180)},
+    {"text": "one twenty knots at one five hundred feet",
+     "expected": _intent("set_flight_parameters", speed=120, altitude=1500)},
+    {"text": "master arm on and select rockets",
+     "expected": [_intent("set_master_arm", state=1), _intent("weapon_rockets")]},
+]
+
+STAGES = ("capture", "stt", "resolve", "execute", "deliver", "total")
+
+
+class UdpSink:
+    """In-process DCS-BIOS stand-in: records every command line with its arrival time."""
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.settimeout(0.2)
+        self.port = self.sock.getsockname()[1]
+        self.received = []  # (perf_counter, command line)
+        self.datagrams = 0
+        self.lock = threading.Lock()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="udp-sink", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while self.running:
+            try:
+                data, _ = self.sock.recvfrom(65536)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            now = time.perf_counter()
+            with self.lock:
+                self.datagrams += 1
+                self.received.extend((now, line) for line in data.decode("utf-8").splitlines() if line)
+
+    def wait(self, datagrams, timeout=1.0):
+        deadline = time.perf_counter() + timeout
+        while self.datagrams < datagrams and time.perf_counter() < deadline:
+            time.sleep(0.001)
+
+    def clear(self):
+        with self.lock:
+            self.received.clear()
+            self.datagrams = 0
+
+    def close(self):
+        self.running = False
+        self.thread.join(timeout=1)
+        self.sock.close()
+
+
+def load_corpus(path):
+    folder = os.path.dirname(os.path.abspath(path))
+    corpus = []
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                if entry.get("audio") and not os.path.isabs(entry["audio"]):
+                    entry["audio"] = os.path.join(folder, entry["audio"])
+                corpus.append(entry)
+    return corpus
+
+
+class Transcriber:
+    """Ears' Whisper path for WAV entries: VAD endpointing, then the biased decoder."""
+    def __init__(self):
+        from src.utils.audio_stream import SAMPLE_RATE, StreamingCapture, WavFileSource
+        from src.utils.buffer_pool import AudioBufferPool
+        from src.utils.command_vocabulary import CommandVocabulary
+        from src.utils.config_loader import load_config
+        from src.utils.whisper_models import WhisperModelManager
+
+        e_config = load_config()["ears"]
+        self.v_config = e_config["vad"]
+        self.frame_samples = SAMPLE_RATE * self.v_config["frame_ms"] // 1000
+        self.capture_class, self.source_class = StreamingCapture, WavFileSource
+        self.model = WhisperModelManager.from_config(e_config["whisper"])
+        self.model.start()
+        self.model.vocabulary = CommandVocabulary(oh58d)
+        self.buffers = AudioBufferPool(int(SAMPLE_RATE * self.v_config["max_phrase_s"]) + self.frame_samples)
+
+    def capture(self, path):
+        capture = self.capture_class(self.source_class(path, self.frame_samples), **self.v_config)
+        buffer = capture.capture(into=self.buffers)
+        capture.close()
+        return buffer
+
+    def transcribe(self, buffer):
+        with buffer:
+            return self.model.transcribe(buffer.to_float())
+
+
+def make_resolver(mode, corpus, stub_latency):
+    """Returns (resolve(text) -> intents or None, close())."""
+    if mode == "none":
+        matcher = IntentMatcher()
+        return matcher.match, lambda: None
+
+    from src.brain import Brain, SYSTEM_PROMPT
+    brain = Brain()
+    stub = None
+    if mode in ("stub", "cached"):
+        from src.utils.llm_client import GeminiClient
+        from src.utils.llm_stub import StubLlmServer
+        stub = StubLlmServer(latency=stub_latency, jitter=stub_latency / 5, seed=1).start()
+        brain.backend = GeminiClient("stub", "stub-model", SYSTEM_PROMPT, endpoint=stub.url)
+        # In memory only; the replay must not touch intent_cache.json
+        brain.cache = IntentCache()
+    if mode == "cached":
+        for entry in corpus:
+            if entry.get("text"):
+                brain.think(entry["text"])
+
+    def close():
+        brain.close()
+        if stub:
+            stub.close()
+    return brain.think, close
+
+
+def expected_output(bridge, intents):
+    """BIOS lines and key-down sequence the Bridge should emit for these intents."""
+    bios, keys = [], []
+    for step in bridge.build_plan(intents):
+        if step["type"] == "bios":
+            bios.append(step["payload"])
+        elif step["type"] == "keyboard":
+            keys.extend(k.lower() for k in step["payload"])
+    return bios, keys
+
+
+def replay(corpus, resolve, bridge, sink, recorder, transcriber, validator):
+    times = {stage: [] for stage in STAGES}
+    results = {"intents_ok": 0, "outputs_ok": 0, "wer": [], "failures": []}
+
+    start_all = time.perf_counter()
+    for entry in corpus:
+        expected = validator.parse(entry["expected"])
+        want_bios, want_keys = expected_output(bridge, expected)
+        sink.clear()
+        recorder.clear()
+        trace_id = TRACER.begin()
+
+        start = time.perf_counter()
+        text = entry.get("text")
+        if entry.get("audio"):
+            samples = transcriber.capture(entry["audio"])
+            captured = time.perf_counter()
+            times["capture"].append(captured - start)
+            heard = transcriber.transcribe(samples) if samples is not None else None
+            times["stt"].append(time.perf_counter() - captured)
+            if text:
+                from src.utils.command_vocabulary import word_error_rate
+                results["wer"].append(word_error_rate(text, heard or ""))
+            text = heard
+
+        resolving = time.perf_counter()
+        answer = resolve(text) if text else None
+        times["resolve"].append(time.perf_counter() - resolving)
+        try:
+            intents = validator.parse(answer) if answer else None
+        except IntentError:
+            intents = None
+
+        executing = time.perf_counter()
+        if intents:
+            bridge.process_intent(intents)
+        times["execute"].append(time.perf_counter() - executing)
+
+        report = bridge.last_report if intents else None
+        if report:
+            for future in report["pending"]:
+                # Waits without raising; a failed combo shows up as an output mismatch
+                future.exception(timeout=5)
+            sink.wait(report["datagrams"])
+        arrivals = [t for t, _ in sink.received] + [t for t, _, _ in recorder.log]
+        times["deliver"].append((max(arrivals) if arrivals else time.perf_counter()) - executing)
+        times["total"].append(time.perf_counter() - start)
+        TRACER.finish(trace_id)
+
+        got_bios = [line for _, line in sink.received]
+        got_keys = [name for _, name, kind in recorder.log if kind == "down"]
+        intent_ok = intents == expected
+        output_ok = (got_bios, got_keys) == (want_bios, want_keys)
+        results["intents_ok"] += intent_ok
+        results["outputs_ok"] += output_ok
+        if not (intent_ok and output_ok):
+            results["failures"].append((entry.get("text") or entry.get("audio"), text, intents))
+    results["wall"] = time.perf_counter() - start_all
+    return times, results
+
+
+def summarize(times, results, n):
+    summary = {"utterances": n, "throughput": n / results["wall"],
+               "intent_accuracy": results["intents_ok"] / n, "output_accuracy": results["outputs_ok"] / n,
+               "wer": float(np.mean(results["wer"])) if results["wer"] else None, "stages": {}}
+    for stage in STAGES:
+        if times[stage]:
+            ms = np.array(times[stage]) * 1000
+            summary["stages"][stage] = {f"p{p}_ms": float(np.percentile(ms, p)) for p in (50, 95, 99)}
+    return summary
+
+
+def print_summary(summary, baseline=None):
+    print(f"\n{'stage':<10}{'p50':>10}{'p95':>10}{'p99':>10}" + (f"{'p95 base':>12}{'change':>9}" if baseline else ""))
+    for stage, s in summary["stages"].items():
+        row = f"{stage:<10}{s['p50_ms']:>8.1f}ms{s['p95_ms']:>8.1f}ms{s['p99_ms']:>8.1f}ms"
+        base = baseline and baseline["stages"].get(stage)
+        if base:
+            change = (s["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0.0
+            row += f"{base['p95_ms']:>10.1f}ms{change:>+9.0%}"
+        print(row)
+    wer = f", WER {summary['wer']:.1%}" if summary["wer"] is not None else ""
+    print(f"\n{summary['utterances']} utterances, {summary['throughput']:.1f}/s; intents "
+          f"{summary['intent_accuracy']:.0%} correct, outputs {summary['output_accuracy']:.0%} correct{wer}")
+
+
+def regressions(summary, baseline, tolerance):
+    """p95 slower than the baseline by more than `tolerance` (and 1ms), or lower accuracy."""
+    found = []
+    for stage, s in summary["stages"].items():
+        base = baseline["stages"].get(stage)
+        if base and s["p95_ms"] > base["p95_ms"] * (1 + tolerance) and s["p95_ms"] - base["p95_ms"] > 1.0:
+            found.append(f"{stage} p95 {base['p95_ms']:.1f}ms -> {s['p95_ms']:.1f}ms")
+    for key in ("intent_accuracy", "output_accuracy"):
+        if summary[key] < baseline[key]:
+            found.append(f"{key} {baseline[key]:.0%} -> {summary[key]:.0%}")
+    return found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end replay benchmark")
+    parser.add_argument("corpus", nargs="?", help="JSON lines corpus (default: built-in transcripts)")
+    parser.add_argument("--brain", choices=("stub", "cached", "real", "none"), default="stub")
+    parser.add_argument("--stub-latency", type=float, default=0.2, help="stub LLM latency in seconds")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--save", help="write the summary as a baseline JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 slowdown (0.2 = 20%%)")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+    corpus = load_corpus(args.corpus) if args.corpus else CORPUS
+    corpus = corpus * args.repeat
+    transcriber = Transcriber() if any(e.get("audio") for e in corpus) else None
+
+    sink = UdpSink()
+    bridge = Bridge()
+    bridge.sender.ip, bridge.sender.port = "127.0.0.1", sink.port
+    bridge.sender.target = (bridge.sender.ip, bridge.sender.port)
+    recorder = RecordingBackend()
+    bridge.keyboard.close()
+    bridge.keyboard = InputEmitter(backend=recorder)
+    validator = IntentValidator(bridge.profiles)
+    resolve, close_resolver = make_resolver(args.brain, corpus, args.stub_latency)
+
+    TRACER.enabled = True
+    print(f"Replaying {len(corpus)} utterances (brain: {args.brain})...")
+    times, results = replay(corpus, resolve, bridge, sink, recorder, transcriber, validator)
+    summary = summarize(times, results, len(corpus))
+
+    for source, heard, intents in results["failures"]:
+        shown = f" (heard '{heard}')" if heard != source else ""
+        print(f"  wrong: '{source}'{shown} -> {[tuple(i) for i in intents] if intents else None}")
+    print("\nInternal stages:")
+    print(TRACER.format_summary())
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+    print_summary(summary, baseline)
+
+    close_resolver()
+    bridge.close()
+    sink.close()
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"Baseline written to {args.save}")
+    if baseline:
+        found = regressions(summary, baseline, args.tolerance)
+        for problem in found:
+            print(f"REGRESSION: {problem}")
+        sys.exit(1 if found else 0)
@@ -0,0 +1,57 @@
+import glob
+import os
+import sys
+import tempfile
+import wave
+
+import numpy as np
+
+# Add the project root to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.audio_stream import SAMPLE_RATE, StreamingCapture, WavFileSource
+
+FRAME_MS = 30
+
+def make_synthetic(path, seconds=4.0, speech=(1.0, 2.2), seed=0):
+    """Writes rotor-like noise with a louder voiced burst, for a quick run without recordings."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    audio = 0.02 * rng.standard_normal(len(t)) + 0.01 * np.sin(2 * np.pi * 22 * t)
+    s, e = (int(x * SAMPLE_RATE) for x in speech)
+    audio[s:e] += 0.3 * np.sin(2 * np.pi * 180 * t[s:e]) * np.sin(2 * np.pi * 3 * t[s:e]) ** 2
+    with wave.open(path, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes((np.clip(audio, -1, 1) * 32767).astype(np.int16).tobytes())
+
+def run_benchmark(folder=None):
+    if folder:
+        paths = sorted(glob.glob(os.path.join(folder, "*.wav")))
+    else:
+        tmp = tempfile.mkdtemp()
+        paths = [os.path.join(tmp, "synthetic.wav")]
+        make_synthetic(paths[0])
+        print("No folder given; using a synthetic noise + speech clip.")
+
+    print(f"{'file':<30}{'speech_end':>12}{'cut':>10}{'delay':>10}{'vad/frame':>12}")
+    for path in paths:
+        source = WavFileSource(path, SAMPLE_RATE * FRAME_MS // 1000)
+        capture = StreamingCapture(source, frame_ms=FRAME_MS)
+        samples = capture.capture()
+        capture.close()
+        if samples is None:
+            print(f"{os.path.basename(path):<30}{'no speech detected':>44}")
+            continue
+        s = capture.last_stats
+        print(
+            f"{os.path.basename(path):<30}"
+            f"{s['speech_end_sample'] / SAMPLE_RATE * 1000:>10.0f}ms"
+            f"{s['cut_sample'] / SAMPLE_RATE * 1000:>8.0f}ms"
+            f"{s['endpoint_delay_ms']:>8.0f}ms"
+            f"{s['vad_us_per_frame']:>10.1f}us"
+        )
+
+if __name__ == "__main__":
+    run_benchmark(sys.argv[1] if len(sys.argv) > 1 else None)
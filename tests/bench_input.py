@@ -0,0 +1,52 @@
+import os
+import statistics
+import sys
+import time
+
+# Add the project root to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.input_backends import RecordingBackend
+from src.utils.input_emitter import InputEmitter
+
+COMBOS = [
+    ["ralt", "rshift", "f6"],
+    ["lctrl", "ralt", "7"],
+    ["lalt", "lctrl", "lshift", "lwin", "0"],
+]
+
+def run_benchmark(rounds=20):
+    backend = RecordingBackend()
+    emitter = InputEmitter(backend=backend)
+
+    # Submit latency: how long press_combo blocks the caller
+    submit = []
+    futures = []
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for keys in COMBOS:
+            t = time.perf_counter()
+            futures.append(emitter.press_combo(keys))
+            submit.append(time.perf_counter() - t)
+    for f in futures:
+        f.result()
+    total = time.perf_counter() - start
+    emitter.close()
+
+    # Ordering: every combo must be downs in order, then ups in reverse
+    log = backend.log
+    expected = []
+    for _ in range(rounds):
+        for keys in COMBOS:
+            expected += [(k, "down") for k in keys] + [(k, "up") for k in reversed(keys)]
+    ordered = [(name, kind) for _, name, kind in log] == expected
+
+    combos = rounds * len(COMBOS)
+    print(f"Combos:           {combos}")
+    print(f"Backend batches:  {backend.batches} ({backend.batches / combos:.1f} per combo)")
+    print(f"Event ordering:   {'OK' if ordered else 'WRONG'}")
+    print(f"Submit latency:   median {statistics.median(submit) * 1e6:.1f}us, max {max(submit) * 1e6:.1f}us")
+    print(f"Total wall time:  {total:.2f}s ({combos / total:.1f} combos/s)")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,109 @@
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+# Add the project root to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.profiles import oh58d
+from src.utils.intents import IntentError, IntentValidator
+
+# Per-intent parse/validate cost at a high command rate.
+#
+# Replays a recorded mission (a file with one model answer per line, as the
+# LLM returned it) or a synthetic one, through the IntentValidator, and for
+# comparison through the old path: json.loads in the Brain, then dict
+# type-sniffing and .get() lookups in the Bridge.
+#
+# Usage: python tests/bench_intents.py [mission.jsonl] [repeat]
+
+def synthetic_mission(n=5000, seed=0):
+    rng = random.Random(seed)
+    answers = []
+    for _ in range(n):
+        kind = rng.random()
+        if kind < 0.4:
+            intent = {"aircraft": "OH-58D", "action": "set_flight_parameters", "parameters": {
+                "heading": rng.choice([0, 22.5, 90, 180, 270]), "altitude": rng.randrange(500, 5000, 100),
+                "speed": rng.randrange(10, 120, 10)}}
+        elif kind < 0.7:
+            intent = {"aircraft": "OH-58D", "action": "set_master_arm", "parameters": {"state": rng.randint(0, 1)}}
+        elif kind < 0.9:
+            intent = [
+                {"aircraft": "OH-58D", "action": "set_master_arm", "parameters": {"state": 1}},
+                {"aircraft": "OH-58D", "action": rng.choice(["weapon_rockets", "weapon_gun", "weapon_hellfire"]),
+                 "parameters": {}},
+            ]
+        elif kind < 0.97:
+            intent = {"aircraft": "OH-58D", "action": "search_sector", "parameters": {"direction": "left"}}
+        else:
+            # What validation is for: hallucinated actions and impossible values
+            intent = rng.choice([
+                {"aircraft": "OH-58D", "action": "eject", "parameters": {}},
+                {"aircraft": "OH-58D", "action": "set_flight_parameters", "parameters": {"altitude": 90000}},
+            ])
+        text = json.dumps(intent)
+        answers.append(f"```json\n{text}\n```" if rng.random() < 0.1 else text)
+    return answers
+
+def legacy(answer):
+    """The old Brain -> Bridge path: fence slicing, json.loads, type sniffing, .get()."""
+    clean_text = answer.strip()
+    if clean_text.startswith("```json"):
+        clean_text = clean_text[7:-3]
+    elif clean_text.startswith("```"):
+        clean_text = clean_text[3:-3]
+    data = json.loads(clean_text)
+    intents = data if isinstance(data, list) else [data]
+    out = []
+    for d in intents:
+        if not isinstance(d, dict):
+            continue
+        aircraft, action = d.get("aircraft"), d.get("action")
+        parameters = d.get("parameters") or {}
+        if aircraft and action:
+            out.append((aircraft, action, parameters))
+    return out
+
+def measure(label, func, answers, repeat):
+    times = np.empty(len(answers) * repeat)
+    rejected = 0
+    i = 0
+    for _ in range(repeat):
+        for answer in answers:
+            start = time.perf_counter()
+            try:
+                func(answer)
+            except IntentError:
+                rejected += 1
+            times[i] = time.perf_counter() - start
+            i += 1
+    us = times * 1e6
+    print(
+        f"{label:<14}{np.mean(us):>9.2f}us{np.percentile(us, 50):>9.2f}us{np.percentile(us, 99):>9.2f}us"
+        f"{len(times) / times.sum():>12,.0f}/s{rejected // repeat:>10}"
+    )
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], 'r') as f:
+            answers = [line.strip() for line in f if line.strip()]
+    else:
+        answers = synthetic_mission()
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    start = time.perf_counter()
+    validator = IntentValidator({oh58d.AIRCRAFT: oh58d})
+    # Validators are compiled on first use of an aircraft
+    validator.parse({"aircraft": oh58d.AIRCRAFT, "action": "laser_arm"})
+    print(f"Validator compiled in {(time.perf_counter() - start) * 1e3:.2f}ms; {len(answers)} answers x {repeat}\n")
+
+    print(f"{'path':<14}{'mean':>11}{'p50':>11}{'p99':>11}{'throughput':>14}{'rejected':>10}")
+    measure("legacy", legacy, answers, repeat)
+    measure("validator", validator.parse, answers, repeat)
+    parsed = [validator.loads(a) for a in answers]
+    measure("validate only", validator.parse, parsed, repeat)
@@ -0,0 +1,141 @@
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add the project root to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.audio_stream import SAMPLE_RATE, StreamingCapture, WavFileSource
+from src.utils.keyword_spotter import KeywordSpotter
+
+# Cost and accuracy of the keyword gate in front of Whisper.
+#
+# Noise corpus: long WAVs of cockpit noise and radio chatter with no
+# commands. They are segmented by the VAD exactly like loop mode, and every
+# segment that crosses the energy threshold goes to the spotter. A passed
+# segment is a false trigger. Command corpus: WAVs that start with the wake
+# word; a rejected one is a miss. Idle CPU is the CPU time of VAD + spotter
+# per second of noise audio. With --whisper, every noise segment is also
+# decoded, to show what an ungated loop would have spent.
+#
+# Usage: python tests/bench_kws.py [templates_dir noise_dir commands_dir] [--whisper]
+# Without folders, synthetic rotor noise, bursts and a tone "wake word" are used.
+
+FRAME_MS = 30
+
+def segments(path):
+    """VAD segments of a WAV, as loop mode would capture them (not paced)."""
+    capture = StreamingCapture(WavFileSource(path, SAMPLE_RATE * FRAME_MS // 1000), frame_ms=FRAME_MS)
+    while True:
+        samples = capture.capture()
+        if samples is None:
+            break
+        yield samples
+    capture.close()
+
+def wav_seconds(path):
+    import wave
+    with wave.open(path, 'rb') as w:
+        return w.getnframes() / w.getframerate()
+
+def synthetic(folder, seed=0):
+    """Writes templates/, noise/ and commands/ with synthetic audio; returns the three paths."""
+    import wave
+    rng = np.random.default_rng(seed)
+
+    def tone_word(f0s, dur):
+        t = np.arange(int(dur * SAMPLE_RATE)) / SAMPLE_RATE
+        phase = 2 * np.pi * np.cumsum(np.interp(t, np.linspace(0, t[-1], len(f0s)), f0s)) / SAMPLE_RATE
+        return sum(np.sin(k * phase) / k for k in range(1, 8)) * 0.25
+
+    def rotor(seconds):
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        return 0.02 * rng.standard_normal(len(t)) + 0.02 * np.sin(2 * np.pi * 22 * t)
+
+    def write(path, audio):
+        with wave.open(path, 'wb') as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(SAMPLE_RATE)
+            w.writeframes((np.clip(audio, -1, 1) * 32767).astype(np.int16).tobytes())
+
+    wake = [120, 200, 150, 110]
+    dirs = [os.path.join(folder, d) for d in ("templates", "noise", "commands")]
+    for d in dirs:
+        os.makedirs(d, exist_ok=True)
+    # Enrolled in the cockpit, like 'enroll handler' would record them
+    for i, stretch in enumerate((1.0, 1.1, 0.9)):
+        word = tone_word(wake, 0.5 * stretch)
+        write(os.path.join(dirs[0], f"handler_{i + 1}.wav"), word + rotor(1)[:len(word)])
+
+    # 60s of rotor noise with broadband bursts and other "speech"
+    noise = rotor(60)
+    for i in range(20):
+        start = int(rng.uniform(0, 58) * SAMPLE_RATE)
+        if i % 2:
+            burst = 0.3 * rng.standard_normal(int(rng.uniform(0.2, 1.0) * SAMPLE_RATE))
+        else:
+            burst = tone_word(list(rng.uniform(100, 250, 4)), rng.uniform(0.4, 1.2))
+        noise[start:start + len(burst)] += burst[:len(noise) - start]
+    write(os.path.join(dirs[1], "noise.wav"), noise)
+
+    for i in range(10):
+        word = tone_word(wake, 0.5 * rng.uniform(0.9, 1.1))
+        command = np.concatenate([
+            rotor(0.5), word + rotor(len(word) / SAMPLE_RATE)[:len(word)],
+            rotor(0.1), tone_word(list(rng.uniform(100, 250, 6)), 1.0), rotor(1.0)])
+        write(os.path.join(dirs[2], f"command_{i}.wav"), command)
+    return dirs
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if len(args) >= 3:
+        templates, noise_dir, commands_dir = args[:3]
+    else:
+        import tempfile
+        templates, noise_dir, commands_dir = synthetic(tempfile.mkdtemp())
+        print("No folders given; using synthetic rotor noise, bursts and a tone wake word.")
+
+    spotter = KeywordSpotter.from_config({"templates": templates, "wake_word": "handler"})
+    decoder = None
+    if "--whisper" in sys.argv:
+        from src.utils.config_loader import load_config
+        from src.utils.whisper_models import WhisperModelManager
+        decoder = WhisperModelManager.from_config(load_config()["ears"]["whisper"])
+        decoder.start()
+
+    # Noise: false triggers and idle CPU
+    noise_paths = sorted(glob.glob(os.path.join(noise_dir, "*.wav")))
+    audio_s = sum(wav_seconds(p) for p in noise_paths)
+    cpu_start = time.process_time()
+    segs = passed = 0
+    whisper_cpu = 0.0
+    for path in noise_paths:
+        for samples in segments(path):
+            segs += 1
+            passed += spotter.check(samples)[0]
+            if decoder:
+                t = time.process_time()
+                decoder.transcribe(samples.astype(np.float32) / 32768.0)
+                whisper_cpu += time.process_time() - t
+    gated_cpu = time.process_time() - cpu_start - whisper_cpu
+    kws = spotter.stats()
+
+    # Commands: misses
+    commands = sorted(glob.glob(os.path.join(commands_dir, "*.wav")))
+    hits = 0
+    for path in commands:
+        samples = next(segments(path), None)
+        hits += samples is not None and spotter.check(samples)[0]
+
+    print(f"\nNoise audio:        {audio_s:.0f}s, {segs} VAD segment(s)")
+    print(f"False triggers:     {passed}/{segs} ({passed / max(audio_s, 1e-9) * 3600:.0f}/hour)")
+    print(f"Spotter CPU:        {kws['cpu_ms_per_segment']:.1f}ms per segment")
+    print(f"Idle CPU (VAD+KWS): {gated_cpu / audio_s:.2%} of one core")
+    if decoder:
+        print(f"Ungated Whisper:    {whisper_cpu / audio_s:.2%} of one core "
+              f"({whisper_cpu * 1000 / max(segs, 1):.0f}ms per segment)")
+    print(f"Wake word hits:     {hits}/{len(commands)}")
@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+
+# Add the project root to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.intent_matcher import IntentMatcher
+from src.utils.text_normalizer import normalize_numbers
+
+# Spoken-number normalization: how pilots actually read numbers (radio digit
+# groups, "hundred and", ICAO words) -> digits, then what the fast-path
+# matcher makes of them. Every case must come out exactly as listed; a wrong
+# number that the matcher accepts goes to the sim without an LLM fallback.
+#
+# Usage: python tests/bench_normalizer.py [repeat]
+
+CASES = [
+    ("heading one eighty", "heading 180"),
+    ("two seventy", "270"),
+    ("three sixty", "360"),
+    ("one twenty knots", "120 knots"),
+    ("one five hundred feet", "1500 feet"),
+    ("one hundred and twenty", "120"),
+    ("one eighty five", "185"),
+    ("one fifteen", "115"),
+    ("two seven zero", "270"),
+    ("angels one five", "angels 15"),
+    ("twenty five", "25"),
+    ("one hundred five", "105"),
+    ("two thousand five hundred", "2500"),
+    ("fifteen hundred", "1500"),
+    ("one thousand and fifty", "1050"),
+    ("one point five", "1.5"),
+    ("rock and roll", "rock and roll"),
+]
+
+MATCHES = [
+    ("heading one eighty", {"heading": 180}),
+    ("one twenty knots", {"speed": 120}),
+    ("climb to one five hundred feet", {"altitude": 1500}),
+    ("turn to three sixty", {"heading": 360}),
+]
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    failures = 0
+    for text, expected in CASES:
+        got = normalize_numbers(text)
+        if got != expected:
+            failures += 1
+            print(f"FAIL {text!r}: {got!r} (expected {expected!r})")
+
+    matcher = IntentMatcher()
+    for text, expected in MATCHES:
+        intent = matcher.match(text)
+        got = intent["parameters"] if isinstance(intent, dict) else intent
+        if got != expected:
+            failures += 1
+            print(f"FAIL match {text!r}: {got!r} (expected {expected!r})")
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text, _ in CASES:
+            normalize_numbers(text)
+    per = (time.perf_counter() - start) * 1e6 / (repeat * len(CASES))
+
+    print(f"{len(CASES) + len(MATCHES) - failures}/{len(CASES) + len(MATCHES)} cases ok, "
+          f"{per:.1f}us per phrase")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,117 @@
+import os
+import sys
+import time
+
+# Add the project root to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_e2e import UdpSink
+from src.bridge import Bridge
+from src.utils.input_backends import RecordingBackend
+from src.utils.input_emitter import InputEmitter
+from src.utils.procedures import compile_procedure
+
+# Procedure engine timing: a 10-step sequence (BIOS switches interleaved with
+# key combos) run through the real Bridge, with DCS-BIOS datagrams going to an
+# in-process UDP sink and keys to the recording input backend. Compared with
+# the naive macro (blocking sleeps of a fixed settle time after every step)
+# and against the floor set by the key hold and gap times. Also measures how
+# long starting one blocks and how fast a new command cancels a procedure.
+#
+# Usage: python tests/bench_procedures.py [rounds] [naive_settle_seconds]
+
+AIRCRAFT = "OH-58D"
+
+SEQUENCE = [
+    {"action": "set_master_arm", "parameters": {"state": 0}},
+    {"bind": "Take Off"},
+    {"action": "laser_arm"},
+    {"bind": "Set 60 knt"},
+    {"action": "weapon_hellfire"},
+    {"bind": "Set 500 ft"},
+    {"bios": "PLT_MASTER_ARM 1"},
+    {"bind": "Head to 270"},
+    {"action": "weapon_rockets"},
+    {"bind": "Set 1000 ft"},
+]
+
+def make_bridge(sink):
+    bridge = Bridge()
+    bridge.sender.ip, bridge.sender.port = "127.0.0.1", sink.port
+    bridge.sender.target = (bridge.sender.ip, bridge.sender.port)
+    recorder = RecordingBackend()
+    bridge.keyboard.close()
+    bridge.keyboard = InputEmitter(backend=recorder)
+    return bridge, recorder
+
+def start_procedure(bridge, profile, steps):
+    # Not a profile action, so planned directly rather than through the validator
+    profile.procedures["bench_sequence"] = steps
+    plan = bridge.build_plan([(AIRCRAFT, "bench_sequence", {})])
+    return bridge.execute_plan(plan)["pending"][0]
+
+def run_procedure(bridge, profile, steps):
+    start = time.perf_counter()
+    run = start_procedure(bridge, profile, steps)
+    blocked = time.perf_counter() - start
+    report = run.result(timeout=10)
+    return blocked, time.perf_counter() - start, report
+
+def run_naive(bridge, steps, settle):
+    # What a hand-written macro does: send, then sleep long enough to be safe
+    start = time.perf_counter()
+    for step in steps:
+        if step.kind == "bios":
+            bridge.sender.send_commands(list(step.payload))
+        else:
+            bridge.keyboard.press_combo(list(step.payload)).result()
+        time.sleep(settle)
+    return time.perf_counter() - start
+
+def run_cancel(bridge, profile, steps):
+    run = start_procedure(bridge, profile, steps)
+    time.sleep(0.2)
+    start = time.perf_counter()
+    bridge.process_intent({"aircraft": AIRCRAFT, "action": "cancel_procedure", "parameters": {}})
+    report = run.result(timeout=1)
+    return (time.perf_counter() - start) * 1000, report
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    settle = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+
+    sink = UdpSink()
+    bridge, recorder = make_bridge(sink)
+    profile = bridge.profiles[AIRCRAFT]
+    steps = compile_procedure(profile, SEQUENCE)
+    keys = sum(1 for s in steps if s.kind == "keys")
+    emitter = bridge.keyboard
+    floor = keys * emitter.hold + (keys - 1) * emitter.gap
+
+    print(f"{len(SEQUENCE)} steps ({len(steps)} after merging, {keys} key combos); "
+          f"floor {floor * 1000:.0f}ms (hold {emitter.hold * 1000:.0f}ms, gap {emitter.gap * 1000:.0f}ms)\n")
+
+    blocked, totals, lateness = [], [], []
+    for _ in range(rounds):
+        b, total, report = run_procedure(bridge, profile, steps)
+        assert report["ok"], report
+        blocked.append(b * 1000)
+        totals.append(total * 1000)
+        lateness.extend(t["lateness_ms"] for t in report["steps"])
+    lines = len(sink.received)
+    naive = [run_naive(bridge, steps, settle) * 1000 for _ in range(rounds)]
+
+    print(f"{'path':<26}{'total':>10}")
+    print(f"{'procedure engine':<26}{min(totals):>8.0f}ms  (median {sorted(totals)[len(totals) // 2]:.0f}ms)")
+    print(f"{f'naive, {settle:g}s settle':<26}{min(naive):>8.0f}ms")
+    print(f"\nexecute_plan blocked for {max(blocked):.2f}ms at most")
+    print(f"step lateness: mean {sum(lateness) / len(lateness):.2f}ms, max {max(lateness):.2f}ms")
+    print(f"BIOS lines received: {lines} ({rounds} rounds)")
+
+    cancel_ms, report = run_cancel(bridge, profile, steps)
+    print(f"cancel: {cancel_ms:.2f}ms, stopped after {report['completed']}/{len(steps)} steps")
+
+    bridge.close()
+    sink.close()
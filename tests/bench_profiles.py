@@ -0,0 +1,90 @@
+import importlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Add the project root to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.intents import compile_profile
+from src.utils.keybind_index import KEYBINDS_PATH, KeybindIndex
+from src.utils.profile_registry import PROFILES_DIR, ProfileRegistry
+
+# Startup and aircraft-switch cost as the number of airframes grows.
+# Synthetic airframes are copies of the OH-58D profile module (renamed) with
+# their own keybinds.json section of `binds` entries. "eager" is the old
+# way: import every module and compile every profile and the whole keybind
+# index up front. "lazy" builds the registry (startup) and then switches to
+# one aircraft, first with an empty cache (compile) and then with the cache
+# written by that run (a later session).
+#
+# Usage: python tests/bench_profiles.py [airframes] [binds_per_airframe]
+
+PACKAGE = "bench_airframes"
+
+def make_airframes(root, count, binds):
+    package = os.path.join(root, PACKAGE)
+    os.makedirs(package)
+    open(os.path.join(package, "__init__.py"), "w").close()
+    with open(os.path.join(PROFILES_DIR, "oh58d.py")) as f:
+        source = f.read()
+    with open(KEYBINDS_PATH) as f:
+        keybinds = json.load(f)
+    names = []
+    for i in range(count):
+        name = f"AF-{i:03d}"
+        names.append(name)
+        with open(os.path.join(package, f"af{i:03d}.py"), "w") as f:
+            # Copied modules resolve binds through the shared KEYBINDS, which has no
+            # synthetic airframes, so their PROCEDURES could not compile
+            f.write(source.replace('AIRCRAFT = "OH-58D"', f'AIRCRAFT = "{name}"')
+                          .replace("PROCEDURES = {", "_PROCEDURES = {"))
+        section = {}
+        for j in range(binds):
+            section[f"Set {j * 10} knt" if j % 3 == 0 else f"Set {j * 100} ft" if j % 3 == 1 else f"Head to {j % 360}"] = ["lctrl", str(j % 10)]
+        keybinds[name] = section
+    path = os.path.join(root, "keybinds.json")
+    with open(path, "w") as f:
+        json.dump(keybinds, f)
+    return package, path, names
+
+def forget_modules():
+    for name in [m for m in sys.modules if m.startswith(PACKAGE + ".")]:
+        del sys.modules[name]
+
+def eager(package, keybinds, names):
+    forget_modules()
+    start = time.perf_counter()
+    KeybindIndex(keybinds)
+    for i in range(len(names)):
+        compile_profile(importlib.import_module(f"{PACKAGE}.af{i:03d}"))
+    return (time.perf_counter() - start) * 1000
+
+def lazy(package, keybinds, cache, aircraft):
+    forget_modules()
+    start = time.perf_counter()
+    registry = ProfileRegistry(package, KeybindIndex(keybinds, lazy=True), cache, package=PACKAGE)
+    startup = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    profile = registry[aircraft]
+    profile.get_commands("set_flight_parameters", {"speed": 60, "altitude": 1500, "heading": 270})
+    return startup, (time.perf_counter() - start) * 1000, profile.source
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    binds = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    root = tempfile.mkdtemp()
+    sys.path.insert(0, root)
+    package, keybinds, names = make_airframes(root, count, binds)
+    cache = os.path.join(root, "cache")
+
+    print(f"{count} airframes, {binds} keybinds each\n")
+    print(f"{'path':<16}{'startup':>12}{'first use':>12}")
+    print(f"{'eager':<16}{eager(package, keybinds, names):>10.1f}ms{'-':>12}")
+    for label in ("lazy, no cache", "lazy, cached"):
+        startup, first, source = lazy(package, keybinds, cache, names[-1])
+        print(f"{label:<16}{startup:>10.1f}ms{first:>10.1f}ms  ({source})")
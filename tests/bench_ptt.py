@@ -0,0 +1,128 @@
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+# Add the project root to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_endpointing import make_synthetic
+from src.utils.audio_stream import SAMPLE_RATE, PushToTalkCapture, StreamingCapture, WavFileSource
+from src.utils.push_to_talk import UdpTrigger
+
+# Push-to-talk against VAD endpointing on the same clip, played at real-time
+# pace. The button is pressed exactly at speech onset (the worst case for
+# clipping) and released at speech end, over the local UDP trigger.
+# Reports release-to-audio latency and whether the onset survived thanks
+# to the pre-roll, next to the VAD's silence-timeout cut. Also checks that
+# presses made while nothing was capturing are not replayed as commands.
+#
+# Usage: python tests/bench_ptt.py [clip.wav speech_start_s speech_end_s]
+
+FRAME_MS = 30
+PORT = 17780
+
+def run_ptt(path, speech):
+    capture = PushToTalkCapture(WavFileSource(path, SAMPLE_RATE * FRAME_MS // 1000, realtime=True),
+                                frame_ms=FRAME_MS, preroll_ms=300)
+    trigger = UdpTrigger(capture, port=PORT).start()
+    button = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def press_and_release():
+        time.sleep(speech[0])
+        button.sendto(b"press", ("127.0.0.1", PORT))
+        time.sleep(speech[1] - speech[0])
+        button.sendto(b"release", ("127.0.0.1", PORT))
+
+    threading.Thread(target=press_and_release, daemon=True).start()
+    samples = capture.capture(timeout=10)
+    s = capture.last_stats
+    trigger.close()
+    capture.close()
+    button.close()
+    if samples is None:
+        print("push-to-talk: nothing captured")
+        return
+    onset = int(speech[0] * SAMPLE_RATE)
+    print(f"{'push-to-talk':<14}{s['endpoint_delay_ms']:>10.2f}ms{s['duration_ms']:>10.0f}ms"
+          f"{(onset - s['start_sample']) * 1000 / SAMPLE_RATE:>10.0f}ms")
+
+class GatedSource:
+    """Holds back the wrapped source's frames until `go` is set."""
+    def __init__(self, source):
+        self.source = source
+        self.go = threading.Event()
+
+    def read(self):
+        self.go.wait()
+        return self.source.read()
+
+    def close(self):
+        self.source.close()
+
+def check_stale(folder):
+    frame_samples = SAMPLE_RATE * FRAME_MS // 1000
+
+    # A tap, then more audio than the ring holds, before anyone captures
+    long_clip = os.path.join(folder, "long.wav")
+    make_synthetic(long_clip, seconds=12.0)
+    source = GatedSource(WavFileSource(long_clip, frame_samples))
+    capture = PushToTalkCapture(source, frame_ms=FRAME_MS)
+    capture.press()
+    capture.release()
+    source.go.set()
+    capture.reader.join(timeout=5)
+    overwritten = capture.capture(timeout=0.1) is None
+    capture.close()
+
+    # Radio transmissions while idle, then a fresh tap just before capture()
+    clip = os.path.join(folder, "idle.wav")
+    make_synthetic(clip)
+    capture = PushToTalkCapture(WavFileSource(clip, frame_samples, realtime=True),
+                                frame_ms=FRAME_MS, stale_s=0.2)
+    for _ in range(4):
+        capture.press()
+        time.sleep(0.06)
+        capture.release()
+    time.sleep(0.3)
+    capture.press()
+    time.sleep(0.06)
+    capture.release()
+    fresh = capture.capture(timeout=0.5)
+    replayed = capture.capture(timeout=0.1)
+    capture.close()
+
+    ok = overwritten and fresh is not None and replayed is None
+    print(f"stale presses: {'dropped' if ok else 'REPLAYED'} (overwritten: {overwritten}, "
+          f"fresh tap kept: {fresh is not None}, idle presses replayed: {replayed is not None})")
+    return ok
+
+def run_vad(path, speech):
+    capture = StreamingCapture(WavFileSource(path, SAMPLE_RATE * FRAME_MS // 1000, realtime=True),
+                               frame_ms=FRAME_MS)
+    samples = capture.capture(timeout=10)
+    s = capture.last_stats
+    capture.close()
+    if samples is None:
+        print("vad: no speech detected")
+        return
+    onset = int(speech[0] * SAMPLE_RATE)
+    print(f"{'vad':<14}{s['endpoint_delay_ms']:>10.2f}ms{s['duration_ms']:>10.0f}ms"
+          f"{(onset - s['start_sample']) * 1000 / SAMPLE_RATE:>10.0f}ms")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3:
+        path, speech = sys.argv[1], (float(sys.argv[2]), float(sys.argv[3]))
+    else:
+        path = os.path.join(tempfile.mkdtemp(), "synthetic.wav")
+        speech = (1.0, 2.2)
+        make_synthetic(path, speech=speech)
+        print("No clip given; using a synthetic noise + speech clip.")
+
+    print(f"{'capture':<14}{'end delay':>12}{'length':>12}{'pre-onset':>12}")
+    run_ptt(path, speech)
+    run_vad(path, speech)
+    print()
+    check_stale(tempfile.mkdtemp())
@@ -0,0 +1,90 @@
+import glob
+import json
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+
+# Add the project root to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.profiles import oh58d
+from src.utils.command_vocabulary import CommandVocabulary, word_error_rate
+from src.utils.config_loader import load_config
+from src.utils.intent_matcher import IntentMatcher
+from src.utils.whisper_models import WhisperModelManager
+
+# Offline accuracy/latency comparison of Whisper decode profiles.
+#
+# The folder holds 16kHz mono 16-bit WAVs of spoken commands and a
+# transcripts.json mapping each file name to what was said, e.g.
+#   {"master_arm_on.wav": "master arm on", "angels_5.wav": "angels five heading west"}
+# A file without an entry is still timed but left out of the accuracy columns.
+#
+# Usage: python tests/bench_vocabulary.py <folder> [profile ...]
+#   (default profiles: accurate fast command)
+
+def load_wav(path):
+    with wave.open(path, 'rb') as w:
+        if w.getframerate() != 16000 or w.getnchannels() != 1 or w.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16kHz mono 16-bit PCM")
+        raw = w.readframes(w.getnframes())
+    return np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+
+def same_intent(matcher, expected, heard):
+    """True if the fast-path matcher resolves both transcripts to the same intent."""
+    want = matcher.match(expected)
+    return want is not None and want == matcher.match(heard)
+
+def run_benchmark(folder, profiles):
+    paths = sorted(glob.glob(os.path.join(folder, "*.wav")))
+    if not paths:
+        print(f"No WAV files in {folder}")
+        return
+    labels_path = os.path.join(folder, "transcripts.json")
+    labels = {}
+    if os.path.exists(labels_path):
+        with open(labels_path, 'r') as f:
+            labels = json.load(f)
+
+    w_config = load_config()['ears']['whisper']
+    models = WhisperModelManager.from_config(dict(w_config, fallback={"preload": "lazy"}))
+    models.start()
+    models.vocabulary = CommandVocabulary(oh58d)
+    matcher = IntentMatcher()
+    clips = [(os.path.basename(p), load_wav(p)) for p in paths]
+    print(f"{len(clips)} clips, {len(labels)} labelled, model: {models.active.describe()}\n")
+
+    print(f"{'profile':<12}{'mean':>9}{'p50':>9}{'p90':>9}{'WER':>8}{'exact':>8}{'intent':>8}")
+    for profile in profiles:
+        latencies, wers, exact, intents, labelled = [], [], 0, 0, 0
+        for name, audio in clips:
+            start = time.perf_counter()
+            text = models.transcribe(audio, profile)
+            latencies.append((time.perf_counter() - start) * 1000)
+            expected = labels.get(name)
+            if expected is None:
+                continue
+            labelled += 1
+            wers.append(word_error_rate(expected, text))
+            exact += wers[-1] == 0
+            intents += same_intent(matcher, expected, text)
+            if wers[-1]:
+                print(f"  [{profile}] {name}: heard '{text}', expected '{expected}'")
+
+        lat = np.array(latencies)
+        wer = f"{np.mean(wers) * 100:>7.1f}%" if wers else f"{'-':>8}"
+        exact_pct = f"{exact * 100 / labelled:>7.0f}%" if labelled else f"{'-':>8}"
+        intent_pct = f"{intents * 100 / labelled:>7.0f}%" if labelled else f"{'-':>8}"
+        print(
+            f"{profile:<12}{lat.mean():>7.0f}ms{np.percentile(lat, 50):>7.0f}ms"
+            f"{np.percentile(lat, 90):>7.0f}ms{wer}{exact_pct}{intent_pct}"
+        )
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python tests/bench_vocabulary.py <folder of command WAVs> [profile ...]")
+        sys.exit(1)
+    run_benchmark(sys.argv[1], sys.argv[2:] or ["accurate", "fast", "command"])
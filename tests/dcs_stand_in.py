@@ -0,0 +1,67 @@
+import random
+import socket
+import threading
+import time
+
+from src.utils.dcs_bios_export import DEFAULT_PORT, ExportReplayer
+
+
+class DcsStandIn:
+    """
+    Minimal local stand-in for DCS + DCS-BIOS: receives import commands
+    ("<CONTROL> <value>") on the command port, applies them to its own
+    memory map using the export definitions and publishes a frame to the
+    export port. `drop_rate` randomly ignores commands to simulate UDP loss;
+    `delay` postpones the resulting frame like a sim frame would.
+    """
+    def __init__(self, controls, command_port=7778, export_port=DEFAULT_PORT,
+                 drop_rate=0.0, delay=0.0, seed=None):
+        self.controls = controls
+        self.words = {}
+        self.drop_rate = drop_rate
+        self.delay = delay
+        self.random = random.Random(seed)
+        self.replayer = ExportReplayer(port=export_port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", command_port))
+        self.sock.settimeout(0.5)
+        self.running = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="dcs-stand-in", daemon=True)
+        self.received = 0
+        self.dropped = 0
+
+    def start(self):
+        self.running.set()
+        self.thread.start()
+
+    def _run(self):
+        while self.running.is_set():
+            try:
+                data, _ = self.sock.recvfrom(65535)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            for line in data.decode('utf-8').splitlines():
+                self._apply(line)
+
+    def _apply(self, line):
+        parts = line.split()
+        if len(parts) != 2 or parts[0] not in self.controls:
+            return
+        self.received += 1
+        if self.random.random() < self.drop_rate:
+            self.dropped += 1
+            return
+        address, mask, shift = self.controls[parts[0]]
+        word = self.words.get(address, 0)
+        self.words[address] = (word & ~mask & 0xFFFF) | ((int(parts[1]) << shift) & mask)
+        if self.delay:
+            time.sleep(self.delay)
+        self.replayer.send_frame(dict(self.words))
+
+    def close(self):
+        self.running.clear()
+        self.thread.join(timeout=2)
+        self.sock.close()
+        self.replayer.close()
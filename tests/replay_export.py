@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+
+# Add the project root to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.dcs_bios_export import CockpitState, ExportListener, ExportReplayer
+
+UDP_PORT = 5010
+
+# Made-up addresses; real ones come from the DCS-BIOS aircraft JSON
+CONTROLS = {
+    "PLT_MASTER_ARM": (0x1000, 0x0100, 8),
+    "HEADING": (0x1002, 0xFFFF, 0),
+}
+
+def run_replay():
+    state = CockpitState(CONTROLS)
+    state.watch("PLT_MASTER_ARM", lambda name, value: print(f"{name} -> {value}"))
+    state.watch("HEADING", lambda name, value: print(f"{name} -> {value}"))
+
+    # group=None: plain unicast bind, which is what the replayer targets
+    listener = ExportListener(state, group=None, port=UDP_PORT)
+    listener.start()
+    replayer = ExportReplayer(port=UDP_PORT)
+
+    print(f"Replaying fake DCS-BIOS export frames to 127.0.0.1:{UDP_PORT}...")
+    try:
+        for i in range(90):
+            arm = 0x0100 if (i // 30) % 2 == 0 else 0
+            replayer.send_frame({0x1000: arm, 0x1002: (i * 4) % 360})
+            time.sleep(1 / 30)
+        time.sleep(0.2)
+    except KeyboardInterrupt:
+        pass
+
+    print(f"Frames decoded: {state.frames}, packets: {listener.packets}")
+    replayer.close()
+    listener.close()
+
+if __name__ == "__main__":
+    run_replay()